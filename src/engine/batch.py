@@ -0,0 +1,117 @@
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cache
+from typing import Iterator
+
+from pydantic import BaseModel
+
+from engine.hashing import WorldHasher
+
+
+class BatchJob(BaseModel):
+    """One headless simulation: Game.setup(width, height, seed) followed by `ticks` ticks."""
+    game: str                  # "module:ClassName" of a Game subclass
+    width: int
+    height: int
+    seed: int = 0
+    ticks: int
+    dt: float = 1 / 30
+
+
+class BatchResult(BaseModel):
+    """What a worker ships back: a few numbers, never the world itself."""
+    job: BatchJob
+    elapsed: float
+    state_hash: str | None = None
+    metrics: dict[str, float] = {}
+    error: str | None = None
+
+
+@cache
+def load_game_class(path: str) -> type:
+    """Imports a Game subclass from a "module:ClassName" path."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _warm_worker(game_paths: tuple[str, ...]):
+    # Runs once per worker process: pay for the imports before the first job
+    for path in game_paths:
+        load_game_class(path)
+
+
+def run_job(job: BatchJob) -> BatchResult:
+    """Runs a single job in the current process."""
+    start = time.perf_counter()
+    try:
+        game = load_game_class(job.game).setup(job.width, job.height, seed=job.seed)
+        for _ in range(job.ticks):
+            game.tick(job.dt)
+        state_hash = WorldHasher(game).hexdigest()
+        metrics = game.metrics()
+    except Exception as exc:
+        return BatchResult(job=job, elapsed=time.perf_counter() - start, error=f"{type(exc).__name__}: {exc}")
+    return BatchResult(job=job, elapsed=time.perf_counter() - start, state_hash=state_hash, metrics=metrics)
+
+
+def run_batch(jobs: list[BatchJob], output: str | None = None, workers: int | None = None) -> Iterator[BatchResult]:
+    """
+    Distributes jobs over a pool of warm worker processes and yields results as
+    they finish (not in submission order). Workers live for the whole batch, so
+    imports are paid once per process rather than once per job.
+
+    Args:
+        jobs: The simulations to run.
+        output: Optional JSONL path; each result is appended and flushed as it arrives,
+            so a long batch can be followed or resumed from a partial file.
+        workers: Pool size; defaults to the number of CPUs.
+    """
+    game_paths = tuple(sorted({job.game for job in jobs}))
+    sink = open(output, "a") if output else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=(game_paths,)) as pool:
+            futures = [pool.submit(run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                if sink is not None:
+                    sink.write(result.model_dump_json() + "\n")
+                    sink.flush()
+                yield result
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+def _parse_range(value: str) -> range:
+    start, _, stop = value.partition(":")
+    return range(int(start), int(stop)) if stop else range(int(start), int(start) + 1)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run many headless games across a process pool")
+    parser.add_argument("game", help="Game subclass as module:ClassName, e.g. main:LumberjackGame")
+    parser.add_argument("--seeds", type=_parse_range, default=range(0, 1), help="seed or START:STOP range")
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--world", default="32x32", help="world size as WIDTHxHEIGHT")
+    parser.add_argument("--dt", type=float, default=1 / 30)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL file results are appended to")
+    args = parser.parse_args(argv)
+
+    width, height = (int(part) for part in args.world.lower().split("x"))
+    jobs = [
+        BatchJob(game=args.game, width=width, height=height, seed=seed, ticks=args.ticks, dt=args.dt)
+        for seed in args.seeds
+    ]
+
+    start = time.perf_counter()
+    failed = 0
+    for result in run_batch(jobs, args.out, args.workers):
+        failed += result.error is not None
+    print(f"jobs={len(jobs)} failed={failed} elapsed={time.perf_counter() - start:.2f}s out={args.out}")
+
+
+if __name__ == "__main__":
+    main()
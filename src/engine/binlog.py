@@ -0,0 +1,85 @@
+import json
+import struct
+from typing import BinaryIO, Iterator
+
+# Every record starts with its kind and the size of its body
+RECORD_HEADER = struct.Struct("<BI")
+# Kind 0 is reserved for type-table entries: (type id, utf-8 name)
+TYPE_RECORD = 0
+TYPE_ID = struct.Struct("<H")
+
+
+class LogWriter:
+    """
+    Append-only binary log made of length-prefixed records.
+    The file opens with a magic tag and a JSON metadata blob. Type names (e.g.
+    command classes) are written once into a type table and referenced by a
+    2-byte id afterwards, which keeps per-record overhead to a few bytes.
+    """
+    def __init__(self, stream: BinaryIO, magic: bytes, metadata: dict):
+        self.stream = stream
+        self._type_ids: dict[str, int] = {}
+
+        header = json.dumps(metadata, separators=(",", ":")).encode()
+        stream.write(magic)
+        stream.write(struct.pack("<I", len(header)))
+        stream.write(header)
+
+    def type_id(self, name: str) -> int:
+        """Returns the id for a type name, declaring it in the log on first use."""
+        type_id = self._type_ids.get(name)
+        if type_id is None:
+            type_id = len(self._type_ids)
+            self._type_ids[name] = type_id
+            self.append(TYPE_RECORD, TYPE_ID.pack(type_id) + name.encode())
+        return type_id
+
+    def append(self, kind: int, body: bytes):
+        self.stream.write(RECORD_HEADER.pack(kind, len(body)))
+        self.stream.write(body)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+class LogReader:
+    """
+    Streams the records written by a LogWriter.
+    Type-table records are consumed internally; use type_name to resolve ids.
+    """
+    def __init__(self, stream: BinaryIO, magic: bytes):
+        self.stream = stream
+        if stream.read(len(magic)) != magic:
+            raise ValueError("Not a log of the expected kind (bad magic)")
+
+        (size,) = struct.unpack("<I", stream.read(4))
+        self.metadata: dict = json.loads(stream.read(size))
+        self._type_names: dict[int, str] = {}
+
+    def type_name(self, type_id: int) -> str:
+        return self._type_names[type_id]
+
+    def __iter__(self) -> Iterator[tuple[int, bytes]]:
+        """Yields (kind, body) pairs until the end of the log."""
+        read = self.stream.read
+        while True:
+            header = read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                # Clean end of file, or a record cut short by a crash
+                return
+            kind, size = RECORD_HEADER.unpack(header)
+            body = read(size)
+            if len(body) < size:
+                return
+
+            if kind == TYPE_RECORD:
+                (type_id,) = TYPE_ID.unpack_from(body)
+                self._type_names[type_id] = body[TYPE_ID.size:].decode()
+                continue
+            yield kind, body
+
+    def close(self):
+        self.stream.close()
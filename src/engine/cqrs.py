@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from pydantic import BaseModel
 
 class BaseEvent(BaseModel):
@@ -10,7 +12,7 @@ class BaseEvent(BaseModel):
 
 # TODO move this elsewhere
 class EntityArrivedEvent(BaseEvent):
-    entity_id: str
+    entity_id: int
 
 
 class BaseCommand(BaseModel):
@@ -18,7 +20,8 @@ class BaseCommand(BaseModel):
     A request to change the game state or initiate an action.
     Commands represent player or AI intent and are subject to validation by handlers.
     """
-    pass
+    # Fields holding entity handles, rebound when a command crosses shards (see engine.shard)
+    handle_fields: ClassVar[tuple[str, ...]] = ()
 
 
 class CommandHandler:
@@ -65,6 +68,10 @@ class CommandProcessor:
         """Registers a singleton handler for a specific command type."""
         self._handlers[command_type] = handler
 
+    def command_types(self) -> list[type[BaseCommand]]:
+        """Returns every command type that has a registered handler."""
+        return list(self._handlers)
+
     def process(self, game, command_queue: list[BaseCommand]):
         """Iterates through the queue and executes handlers for registered commands."""
         for cmd in command_queue:
@@ -83,6 +90,8 @@ class EventProcessor:
     """
     def __init__(self):
         self._handlers: dict[type[BaseEvent], list[EventHandler]] = {}
+        # Optional EventJournal that is handed every processed event; see engine.journal
+        self.journal = None
 
     def register_handler(self, event_type: type[BaseEvent], handler: EventHandler):
         """Subscribes a handler to an event type."""
@@ -96,3 +105,5 @@ class EventProcessor:
             handlers = self._handlers.get(type(event), [])
             for handler in handlers:
                 handler(game, event)
+        if self.journal is not None:
+            self.journal.record(game.current_tick, event_queue)
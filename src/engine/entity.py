@@ -1,20 +1,155 @@
-from typing import Generator, Type, TypeVar
-import uuid
+import copy
+import weakref
+from typing import TYPE_CHECKING, Generator, Type, TypeVar
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
-from engine.trait import BaseTrait
+from engine.trait import Trait
 
-T = TypeVar("T", bound=BaseTrait)
+if TYPE_CHECKING:
+    from engine.query import Query, TraitObserver
+
+T = TypeVar("T", bound=Trait)
+
+# An entity handle packs (generation << 32 | slot index) into one int. The index
+# addresses arrays directly; the generation makes handles to a recycled slot stale.
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def handle_index(handle: int) -> int:
+    return handle & INDEX_MASK
+
+
+def handle_generation(handle: int) -> int:
+    return handle >> INDEX_BITS
+
+
+class EntityListener:
+    """
+    Interface for objects that follow changes to an EntityMap (hashing, replication...).
+    Field assignments on entities and on their traits are reported as changes;
+    in-place container mutations are not, call BaseEntity.touch after those.
+    """
+    def on_entity_added(self, entity: "BaseEntity"):
+        pass
+
+    def on_entity_removed(self, entity: "BaseEntity"):
+        pass
+
+    def on_entity_changed(self, entity: "BaseEntity", trait: Trait | None):
+        """Called after a field assignment; trait is None for the entity's own fields."""
+        pass
+
+    def on_entity_traits_replaced(self, entity: "BaseEntity"):
+        """Called when an entity's trait list is replaced (see BaseEntity.add_trait)."""
+        pass
+
+    def on_entities_added(self, entities: list["BaseEntity"]):
+        """Called once for a batch insert. Override to update indexes in bulk."""
+        for entity in entities:
+            self.on_entity_added(entity)
+
+    def on_entities_removed(self, entities: list["BaseEntity"]):
+        """Called once for a batch removal. Override to update indexes in bulk."""
+        for entity in entities:
+            self.on_entity_removed(entity)
 
 
 class BaseEntity(BaseModel):
-    model_config = ConfigDict(validate_assignment=True)
+    # Compact traits are plain slotted classes, hence arbitrary types
+    model_config = ConfigDict(validate_assignment=True, arbitrary_types_allowed=True)
     
-    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    # Assigned by EntityMap.add; None until the entity joins a map
+    id: int | None = None
+    # Optional stable, human-readable name (e.g. from a level file or a test)
+    alias: str | None = None
     asset: str
     position: tuple[float, float]
-    traits: list[BaseTrait] = Field(default_factory=list)
+    traits: list[Trait] = Field(default_factory=list)
+
+    # The map this entity lives in, so that mutations can be reported to it
+    _map: "EntityMap | None" = PrivateAttr(default=None)
+
+    def model_post_init(self, context):
+        for trait in self.traits:
+            trait._owner = self
+
+    def __setattr__(self, name, value):
+        if name[0] == "_":
+            super().__setattr__(name, value)
+            return
+        self._before_write()
+        if name == "alias" and self._map is not None:
+            # Before the write, so that a taken alias leaves the entity unchanged
+            self._map._rename(self, value)
+        super().__setattr__(name, value)
+        if name == "traits":
+            for trait in self.traits:
+                trait._owner = self
+            if self._map is not None:
+                self._map._traits_replaced(self)
+        self.touch()
+
+    def __getstate__(self):
+        # Pickle (and deepcopy) the entity alone, not the map it points back to
+        state = super().__getstate__()
+        state["__pydantic_private__"] = {**state["__pydantic_private__"], "_map": None}
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        for trait in self.traits:
+            trait._owner = self
+
+    def __deepcopy__(self, memo=None):
+        # pydantic's own deepcopy would follow _map and copy the whole world
+        clone = type(self).__new__(type(self))
+        clone.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return clone
+
+    def __eq__(self, other):
+        # Compare state only: which map holds the entity is bookkeeping
+        if not isinstance(other, BaseEntity):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def _before_write(self):
+        # Forks of the map may still share this object, and a forked map's own
+        # entities may still share field values with the parent's
+        entity_map = self._map
+        if entity_map is not None and (entity_map._forks or entity_map._shared):
+            entity_map._preserve(self)
+
+    def _fork_copy(self) -> "BaseEntity":
+        return copy.deepcopy(self)
+
+    def _fork_shell(self, entity_map: "EntityMap") -> "BaseEntity":
+        # A new entity (and traits) over the same field values, containers
+        # included; _unshare copies them the first time the shell is written.
+        # Built without pydantic's copy, which costs several times more
+        cls = type(self)
+        shell = cls.__new__(cls)
+        traits = [trait.__copy__() for trait in self.traits]
+        object.__setattr__(shell, "__dict__", {**self.__dict__, "traits": traits})
+        object.__setattr__(shell, "__pydantic_extra__", None)
+        object.__setattr__(shell, "__pydantic_fields_set__", set(self.__pydantic_fields_set__))
+        object.__setattr__(shell, "__pydantic_private__", {"_map": entity_map})
+        for trait in traits:
+            trait._owner = shell
+        return shell
+
+    def _unshare(self):
+        for name, value in self.__dict__.items():
+            if name != "traits":
+                self.__dict__[name] = copy.deepcopy(value)
+        for trait in self.traits:
+            trait._unshare()
+
+    def touch(self, trait: Trait | None = None):
+        """Reports a change the map could not see, e.g. an in-place list mutation."""
+        if self._map is not None:
+            self._map._entity_changed(self, trait)
 
     def get_trait(self, trait_type: Type[T]) -> T | None:
         # TODO make use of dicts to ensure O(1) access
@@ -26,32 +161,417 @@ class BaseEntity(BaseModel):
     def has_trait(self, trait_type: Type[T]) -> bool:
         return self.get_trait(trait_type) is not None
 
+    def add_trait(self, trait: Trait):
+        # Rebuild rather than append, so that queries and observers are told
+        self.traits = [*self.traits, trait]
+
+    def remove_trait(self, trait_type: Type[T]):
+        self.traits = [trait for trait in self.traits if not isinstance(trait, trait_type)]
+
 
 class EntityMap(BaseModel):
-    entities: dict[str, BaseEntity] = Field(default_factory=dict)
-    # TODO we don't have an active_ids anymore, so we don't have quite a way to notify
-    # the engine what we need to update
+    entities: dict[int, BaseEntity] = Field(default_factory=dict)
+    _listeners: list[EntityListener] = PrivateAttr(default_factory=list)
+
+    # Slot storage behind the handles: slot i holds the live entity with index i
+    _slots: list[BaseEntity | None] = PrivateAttr(default_factory=list)
+    _generations: list[int] = PrivateAttr(default_factory=list)
+    _free: list[int] = PrivateAttr(default_factory=list)
+    # Slot indices handed out by reserve() whose entity has not been added yet
+    _reserved: set[int] = PrivateAttr(default_factory=set)
+    _aliases: dict[str, int] = PrivateAttr(default_factory=dict)
+    # Cached queries, kept up to date on every structural change
+    _queries: dict[tuple[frozenset, frozenset], "Query"] = PrivateAttr(default_factory=dict)
+    # Copy-on-write bookkeeping: weak references to live forks of this map,
+    # whether this map is itself a fork that may still share its parent's
+    # entities, and which of its entities still share field values with them
+    _forks: list[weakref.ref] = PrivateAttr(default_factory=list)
+    _parent: "EntityMap | None" = PrivateAttr(default=None)
+    _shared: set[int] = PrivateAttr(default_factory=set)
+
+    def add_listener(self, listener: EntityListener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: EntityListener):
+        self._listeners.remove(listener)
 
     def add(self, entity: BaseEntity):
-        self.entities[entity.id] = entity
+        """
+        Inserts an entity and assigns it a handle.
+        An entity that already carries a handle (e.g. a replica of a remote
+        world) keeps it, provided its slot is free.
+        """
+        self._insert(entity)
+        for listener in self._listeners:
+            listener.on_entity_added(entity)
+
+    def add_many(self, entities: list[BaseEntity]):
+        """Inserts a batch of entities, notifying listeners once for the whole batch."""
+        for entity in entities:
+            self._insert(entity)
+        if entities:
+            for listener in self._listeners:
+                listener.on_entities_added(entities)
  
-    def remove(self, entity_id: str):
-        if entity_id in self.entities:
-            del self.entities[entity_id]
+    def remove(self, entity_id: int):
+        entity = self._detach(entity_id)
+        if entity is not None:
+            for listener in self._listeners:
+                listener.on_entity_removed(entity)
+
+    def remove_many(self, entity_ids: list[int]):
+        """Removes a batch of entities, notifying listeners once. Unknown ids are skipped."""
+        removed = [entity for entity in map(self._detach, entity_ids) if entity is not None]
+        if removed:
+            for listener in self._listeners:
+                listener.on_entities_removed(removed)
+
+    def reserve(self) -> int:
+        """
+        Hands out a handle now for an entity that will be added later, so that
+        commands and events can refer to it before it exists.
+        """
+        handle = self._allocate()
+        self._reserved.add(handle_index(handle))
+        return handle
+
+    def release(self, handle: int):
+        """Gives back a reserved handle that will never be added."""
+        index = handle_index(handle)
+        if index in self._reserved and self._generations[index] == handle_generation(handle):
+            self._reserved.discard(index)
+            self._generations[index] += 1
+            self._free.append(index)
+
+    def get(self, entity_id: int | None) -> BaseEntity | None:
+        """Returns the entity for a handle, or None if it is unknown or stale."""
+        if entity_id is None:
+            return None
+        index = entity_id & INDEX_MASK
+        if index < len(self._slots):
+            entity = self._slots[index]
+            if entity is not None and entity.id == entity_id:
+                return entity
+        return None
+
+    def resolve(self, alias: str) -> BaseEntity | None:
+        """Looks an entity up by its external alias."""
+        entity_id = self._aliases.get(alias)
+        return self.get(entity_id) if entity_id is not None else None
+
+    def is_alive(self, entity_id: int) -> bool:
+        return self.get(entity_id) is not None
+
+    def query(self, *with_traits: type, without: tuple[type, ...] = ()) -> "Query":
+        """
+        Returns the cached query for entities having all of `with_traits` and
+        none of `without`. The first call scans the map; afterwards the result is
+        maintained incrementally as entities come, go or change their traits.
+        """
+        from engine.query import Query
+
+        key = (frozenset(with_traits), frozenset(without))
+        query = self._queries.get(key)
+        if query is None:
+            query = self._queries[key] = Query(self, with_traits, without)
+        return query
+
+    def observe(self, trait_type: type) -> "TraitObserver":
+        """
+        Starts recording which entities gained, lost or modified a trait type.
+        Each call returns an independent observer; drain it once per tick and
+        stop it with remove_listener when done.
+        """
+        from engine.query import TraitObserver
 
-    def get(self, entity_id: str) -> BaseEntity | None:
-        return self.entities.get(entity_id)
+        observer = TraitObserver(self, trait_type)
+        self.add_listener(observer)
+        return observer
 
     def yield_entities_with_trait(self, trait_class: Type[T]) -> Generator[tuple[BaseEntity, T], None, None]:
         """
         Iterates through all entities and yields pairs of (entity, trait_instance)
         only for entities that possess the requested trait.
         """
-        for entity in self.entities.values():
-            trait = entity.get_trait(trait_class)
-            if trait is not None:
-                # We yield the entity and the specific trait instance
-                yield entity, trait
+        # Backed by a cached query, so this costs O(matches) rather than O(entities)
+        for entity in self.query(trait_class):
+            # We yield the entity and the specific trait instance
+            yield entity, entity.get_trait(trait_class)
 
     def clear(self):
-        self.entities.clear()
+        for entity_id in list(self.entities):
+            self.remove(entity_id)
+
+    def fork(self) -> "EntityMap":
+        """
+        Returns a copy-on-write copy of the map. Only the index (dict and slot
+        lists) is copied up front; entities are shared until one side writes
+        to them. The fork hands out a shallow shell of an entity the first time
+        it is read (one object cannot show both maps' states) and copies the
+        entity's field values only when the shell is first written; this map
+        copies an entity into the fork just before writing to it itself.
+        In a fork, replace containers (lists, dicts) rather than mutate them in
+        place before any other write to their entity, as MovementSystem does.
+        Listeners and cached queries are not carried over.
+        Call discard() on a fork that is no longer needed, so that this map
+        stops preserving state for it.
+        """
+        branch = _EntityMapFork.model_construct()
+        branch.entities = _ForkedEntities(branch, dict.items(self.entities))
+        branch._slots = list(self._slots)
+        branch._generations = list(self._generations)
+        branch._free = list(self._free)
+        branch._reserved = set(self._reserved)
+        branch._aliases = dict(self._aliases)
+        branch._parent = self
+        forks = self._forks
+        forks.append(weakref.ref(branch, lambda ref: ref in forks and forks.remove(ref)))
+        return branch
+
+    def discard(self):
+        """Detaches a fork from its parent. Does nothing on a map that is not a fork."""
+        parent = self._parent
+        if parent is not None:
+            parent._forks[:] = [ref for ref in parent._forks if ref() not in (self, None)]
+
+    def restore(self, checkpoint: "EntityMap"):
+        """
+        Rewinds the map to the state of one of its forks that was never
+        modified (a checkpoint). Only entities written, added or removed since
+        the fork are replaced, in one batch, so listeners and queries follow.
+        """
+        saved = checkpoint.entities
+        stale = [eid for eid, entity in dict.items(self.entities) if dict.get(saved, eid) is not entity]
+        self.remove_many(stale)
+        restored = [entity._fork_copy() for eid, entity in dict.items(saved) if eid not in self.entities]
+        self.add_many(restored)
+
+        # Handle allocation resumes exactly where the checkpoint left it
+        self._generations = list(checkpoint._generations)
+        self._free = list(checkpoint._free)
+        self._reserved = set(checkpoint._reserved)
+        del self._slots[len(self._generations):]
+        self._slots.extend([None] * (len(self._generations) - len(self._slots)))
+
+    def _insert(self, entity: BaseEntity):
+        if entity.alias is not None:
+            self._check_alias(entity.alias, None)
+        if entity.id is None:
+            entity.id = self._allocate()
+        else:
+            self._claim(entity.id)
+
+        self._slots[handle_index(entity.id)] = entity
+        self.entities[entity.id] = entity
+        if entity.alias is not None:
+            self._aliases[entity.alias] = entity.id
+        entity._map = self
+        for query in self._queries.values():
+            query._update(entity)
+
+    def _detach(self, entity_id: int) -> BaseEntity | None:
+        entity = self.get(entity_id)
+        if entity is None:
+            return None
+        # Forks keep the entity as it was; it is about to leave this map's care
+        entity._before_write()
+
+        index = handle_index(entity_id)
+        del self.entities[entity_id]
+        self._slots[index] = None
+        # Bump the generation so every outstanding handle to this slot goes stale
+        self._generations[index] += 1
+        self._free.append(index)
+        # Only unbind the alias if it still names this entity
+        if entity.alias is not None and self._aliases.get(entity.alias) == entity_id:
+            del self._aliases[entity.alias]
+        entity._map = None
+        for query in self._queries.values():
+            query._discard(entity)
+        return entity
+
+    def _check_alias(self, alias: str, entity_id: int | None):
+        bound = self._aliases.get(alias)
+        if bound is not None and bound != entity_id and EntityMap.get(self, bound) is not None:
+            raise ValueError(f"Alias {alias!r} is already taken by entity {bound}")
+
+    def _rename(self, entity: BaseEntity, alias: str | None):
+        if alias is not None:
+            self._check_alias(alias, entity.id)
+        if entity.alias is not None and self._aliases.get(entity.alias) == entity.id:
+            del self._aliases[entity.alias]
+        if alias is not None:
+            self._aliases[alias] = entity.id
+
+    def _allocate(self) -> int:
+        # LIFO reuse keeps allocation deterministic, which replays rely on
+        if self._free:
+            index = self._free.pop()
+        else:
+            index = len(self._slots)
+            self._slots.append(None)
+            # Generations start at 1 so that no valid handle is ever 0 (falsy)
+            self._generations.append(1)
+        return self._generations[index] << INDEX_BITS | index
+
+    def _claim(self, handle: int):
+        index, generation = handle_index(handle), handle_generation(handle)
+        while len(self._slots) <= index:
+            self._free.append(len(self._slots))
+            self._slots.append(None)
+            self._generations.append(1)
+
+        if self._slots[index] is not None:
+            raise ValueError(f"Entity slot {index} is already taken")
+        if index in self._reserved:
+            if self._generations[index] != generation:
+                raise ValueError(f"Handle {handle} does not match the reservation for slot {index}")
+            self._reserved.discard(index)
+            return
+        self._free.remove(index)
+        self._generations[index] = generation
+
+    def _traits_replaced(self, entity: BaseEntity):
+        for query in self._queries.values():
+            query._update(entity)
+        for listener in self._listeners:
+            listener.on_entity_traits_replaced(entity)
+
+    def _entity_changed(self, entity: BaseEntity, trait: Trait | None):
+        for listener in self._listeners:
+            listener.on_entity_changed(entity, trait)
+
+    def _preserve(self, entity: BaseEntity):
+        """Called before this map writes to one of its entities."""
+        if entity.id in self._shared:
+            self._shared.discard(entity.id)
+            entity._unshare()
+        for ref in list(self._forks):
+            fork = ref()
+            if fork is not None:
+                fork._keep(entity, None)
+
+
+def _map_of(entity: BaseEntity) -> EntityMap | None:
+    # entity._map without pydantic's private-attribute lookup, for per-entity loops
+    return entity.__pydantic_private__["_map"]
+
+
+class _EntityMapFork(EntityMap):
+    """An EntityMap made by EntityMap.fork, which may still share entities with its parent."""
+
+    def get(self, entity_id: int | None) -> BaseEntity | None:
+        entity = super().get(entity_id)
+        if entity is None or _map_of(entity) is self:
+            return entity
+        return self._own(entity)
+
+    def _own(self, entity: BaseEntity) -> BaseEntity:
+        return self._own_all([entity])[0]
+
+    def _own_all(self, entities: list[BaseEntity]) -> list[BaseEntity]:
+        # Swap entities still shared with the parent for shells of this map's
+        # own, in one batch; their field values are copied on their first
+        # write (see _preserve)
+        shells = {entity.id: entity._fork_shell(self) for entity in entities if _map_of(entity) is not self}
+        if not shells:
+            return entities
+        self._shared.update(shells)
+        dict.update(self.entities, shells)
+        slots = self._slots
+        for entity_id, shell in shells.items():
+            slots[handle_index(entity_id)] = shell
+        for query in self._queries.values():
+            members = query._members
+            for entity_id in shells.keys() & members.keys():
+                members[entity_id] = shells[entity_id]
+        return [shells.get(entity.id, entity) for entity in entities]
+
+    def _keep(self, entity: BaseEntity, saved: BaseEntity | None):
+        # The parent is about to modify `entity`; keep its current state, and
+        # pass the copy down to forks of this fork that share it too
+        if dict.get(self.entities, entity.id) is entity:
+            if saved is None:
+                saved = entity._fork_copy()
+                saved._map = self
+            self._swap(entity, saved)
+        for ref in list(self._forks):
+            fork = ref()
+            if fork is not None:
+                fork._keep(entity, saved)
+
+    def _swap(self, old: BaseEntity, new: BaseEntity):
+        dict.__setitem__(self.entities, new.id, new)
+        self._slots[handle_index(new.id)] = new
+        for query in self._queries.values():
+            if new.id in query:
+                query._members[new.id] = new
+
+
+class _ForkedEntities(dict):
+    """
+    The entities dict of a forked map: lookups and iteration over values hand
+    out the fork's own entities (see EntityMap.fork), so code reading
+    `entities.entities` directly never mutates the parent's objects.
+    """
+    def __init__(self, owner: "_EntityMapFork", items):
+        super().__init__(items)
+        self._owner = owner
+
+    def _own(self, entity: BaseEntity) -> BaseEntity:
+        return entity if _map_of(entity) is self._owner else self._owner._own(entity)
+
+    def __getitem__(self, entity_id: int) -> BaseEntity:
+        return self._own(super().__getitem__(entity_id))
+
+    def get(self, entity_id: int, default=None):
+        entity = super().get(entity_id)
+        return default if entity is None else self._own(entity)
+
+    def values(self) -> list[BaseEntity]:
+        return self._owner._own_all(list(super().values()))
+
+    def items(self) -> list[tuple[int, BaseEntity]]:
+        return [(eid, self._own(entity)) for eid, entity in list(super().items())]
+
+
+class StructuralChangeBuffer:
+    """
+    Collects spawns and despawns requested while a tick is running and applies
+    them in one batch at the tick's sync point. Systems and handlers can then
+    iterate the map safely, and listeners (indexes, hashes, replication) see one
+    bulk update instead of one call per entity.
+    """
+    def __init__(self, entity_map: EntityMap):
+        self.entity_map = entity_map
+        self._spawns: dict[int, BaseEntity] = {}
+        # Ordered set: despawn order is replayed exactly, which keeps slot reuse deterministic
+        self._despawns: dict[int, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._spawns) + len(self._despawns)
+
+    def spawn(self, entity: BaseEntity) -> int:
+        """Queues an entity for insertion and returns its (already valid) handle."""
+        if entity.id is None:
+            entity.id = self.entity_map.reserve()
+        self._spawns[entity.id] = entity
+        return entity.id
+
+    def despawn(self, entity_id: int):
+        """Queues an entity for removal. Despawning a pending spawn cancels it."""
+        if self._spawns.pop(entity_id, None) is not None:
+            self.entity_map.release(entity_id)
+            return
+        self._despawns[entity_id] = None
+
+    def apply(self):
+        """Applies removals, then insertions, each as a single batch."""
+        if self._despawns:
+            despawns = list(self._despawns)
+            self._despawns.clear()
+            self.entity_map.remove_many(despawns)
+        if self._spawns:
+            spawns = list(self._spawns.values())
+            self._spawns.clear()
+            self.entity_map.add_many(spawns)
@@ -1,7 +1,10 @@
 from abc import abstractmethod
+import copy
+import random
 
-from engine.entity import EntityMap
+from engine.entity import BaseEntity, EntityMap, StructuralChangeBuffer
 from engine.cqrs import BaseCommand, BaseEvent, EventProcessor, CommandProcessor
+from engine.ingest import CommandInbox
 from engine.system import System
 from engine.terrain import TerrainMap
 
@@ -11,31 +14,77 @@ class Game:
     The central hub of the engine. It manages the lifecycle of 
     entities, systems, commands, and events.
     """
-    def __init__(self, terrain_map: "TerrainMap", entity_map: "EntityMap"):
+    def __init__(self, terrain_map: "TerrainMap", entity_map: "EntityMap", seed: int = 0):
         self.terrain = terrain_map
         self.entities = entity_map
-        
+        # Number of completed ticks, stamped onto published snapshots
+        self.current_tick = 0
+
+        # All game randomness must come from here so a seed reproduces a session
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        # Optional CommandRecorder; see engine.replay
+        self.recorder = None
+        self._in_tick = False
+        # ShardContext when this game simulates one region of a sharded world; see engine.shard
+        self.shard = None
+        # Optional LODSystem; see engine.lod
+        self.lod = None
+        # Optional VisibilitySystem; see engine.visibility
+        self.visibility = None
+
         # Simulation components
         self.systems: list["System"] = []
         
         # Transaction Queues
         self.command_queue: list["BaseCommand"] = []
+        # Commands submitted from other threads, moved into command_queue at tick start
+        self.inbox = CommandInbox()
         self.event_queue: list["BaseEvent"] = []
+        # Spawns/despawns wait here until the end of the tick
+        self.structural_changes = StructuralChangeBuffer(entity_map)
         
         # Processors
         self.command_processor = CommandProcessor()
         self.event_processor = EventProcessor()
 
+        # Forks taken by checkpoint(), by tick. Each one makes every write pay for
+        # a copy-on-write check, so only the most recent max_checkpoints are kept
+        self.max_checkpoints = 8
+        self._checkpoints: dict[int, "Game"] = {}
+
     def enqueue_command(self, command: "BaseCommand"):
+        # Commands issued by the simulation itself are reproduced by the replay,
+        # so only record the ones coming from outside the tick
+        if self.recorder is not None and not self._in_tick:
+            self.recorder.record_command(self.current_tick, command)
         self.command_queue.append(command)
 
     def enqueue_event(self, event: "BaseEvent"):
         self.event_queue.append(event)
 
+    def spawn(self, entity: "BaseEntity") -> int:
+        """Adds an entity at the end of the current tick; its handle is valid immediately."""
+        return self.structural_changes.spawn(entity)
+
+    def despawn(self, entity_id: int):
+        """Removes an entity at the end of the current tick."""
+        self.structural_changes.despawn(entity_id)
+
     def tick(self, dt: float):
         """
         The deterministic heartbeat of the game.
         """
+        # 0. Ingestion: commands from other threads join the queue (and get
+        # recorded) before the tick starts
+        for command in self.inbox.drain():
+            self.enqueue_command(command)
+
+        if self.recorder is not None:
+            self.recorder.record_tick(self.current_tick, dt)
+        self._in_tick = True
+
         # 1. Intent: What does the user/AI want to do?
         self.command_processor.process(self, self.command_queue)
         self.command_queue.clear()
@@ -48,9 +97,103 @@ class Game:
         self.event_processor.process(self, self.event_queue)
         self.event_queue.clear()
 
+        # 4. Sync point: structural changes land in one batch
+        self.structural_changes.apply()
+
+        self._in_tick = False
+        self.current_tick += 1
+
+    def fork(self) -> "Game":
+        """
+        Returns an independent copy of the game to simulate ahead and throw away
+        (AI lookahead, client-side prediction). Terrain columns and entities are
+        shared copy-on-write, so forking costs a copy of the indexes only, and a
+        branch pays for what it, or this game, modifies afterwards.
+
+        Systems, processors and handlers are shared, so they should keep their
+        state on the game; the LOD system is copied. A branch records and
+        journals nothing, receives no external commands and does not talk to other shards. Call discard() on it when done.
+        """
+        if self._in_tick:
+            raise RuntimeError("Cannot fork a game in the middle of a tick")
+
+        branch = copy.copy(self)
+        branch.terrain = self.terrain.fork()
+        branch.entities = self.entities.fork()
+        branch.random = random.Random()
+        branch.random.setstate(self.random.getstate())
+        branch.recorder = None
+        branch.shard = None
+        branch.inbox = CommandInbox(self.inbox.capacity, self.inbox.max_per_tick)
+        if self.event_processor.journal is not None:
+            # Same handlers, but the branch's events never happened
+            branch.event_processor = copy.copy(self.event_processor)
+            branch.event_processor.journal = None
+        branch.systems = list(self.systems)
+        branch.command_queue = list(self.command_queue)
+        branch.event_queue = list(self.event_queue)
+        branch.structural_changes = StructuralChangeBuffer(branch.entities)
+        branch._checkpoints = {}
+        if self.lod is not None:
+            branch.lod = self.lod.copy()
+            branch.systems = [branch.lod if system is self.lod else system for system in branch.systems]
+            branch.entities.add_listener(branch.lod)
+        return branch
+
+    def discard(self):
+        """Releases a fork, so that its parent stops preserving state for it."""
+        self.entities.discard()
+        for checkpoint in self._checkpoints.values():
+            checkpoint.discard()
+        self._checkpoints.clear()
+
+    def checkpoint(self) -> int:
+        """Records the current state so that rollback() can return to it; returns the tick."""
+        previous = self._checkpoints.pop(self.current_tick, None)
+        if previous is not None:
+            previous.discard()
+        self._checkpoints[self.current_tick] = self.fork()
+        while len(self._checkpoints) > self.max_checkpoints:
+            self.release_checkpoint(min(self._checkpoints))
+        return self.current_tick
+
+    def release_checkpoint(self, tick: int):
+        """Drops a checkpoint, so that writes stop preserving state for it. Unknown ticks are ignored."""
+        checkpoint = self._checkpoints.pop(tick, None)
+        if checkpoint is not None:
+            checkpoint.discard()
+
+    def rollback(self, tick: int):
+        """
+        Rewinds the game to a checkpoint. Only what changed since is undone, and
+        through the usual notifications, so listeners (hashes, queries, views)
+        stay in sync. Later checkpoints are dropped; this one can be reused.
+        """
+        saved = self._checkpoints[tick]
+        for later in [t for t in self._checkpoints if t > tick]:
+            self._checkpoints.pop(later).discard()
+
+        self.terrain.restore(saved.terrain)
+        self.entities.restore(saved.entities)
+        self.current_tick = saved.current_tick
+        self.random.setstate(saved.random.getstate())
+        self.command_queue = list(saved.command_queue)
+        self.event_queue = list(saved.event_queue)
+        self.structural_changes = StructuralChangeBuffer(self.entities)
+        if self.lod is not None:
+            self.lod._owed = dict(saved.lod._owed)
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Summary numbers reported by batch runs. Subclasses extend this with
+        game-specific values (resources gathered, units lost...).
+        """
+        return {"ticks": self.current_tick, "entities": len(self.entities.entities)}
+
     @classmethod
     @abstractmethod
-    def setup(cls, width: int, height: int) -> "Game":
+    def setup(cls, width: int, height: int, seed: int = 0) -> "Game":
         """
         Factory method to bootstrap a new game instance.
+        The same (width, height, seed) must always produce the same world.
         """
@@ -0,0 +1,239 @@
+"""
+Vectorized procedural terrain generation.
+
+Every function works on whole NumPy arrays and is deterministic from an
+integer seed. Noise is a function of absolute world coordinates, so a map
+generated chunk by chunk is identical to one generated in one go.
+Arrays are indexed [x, z], like TerrainMap.tiles.
+"""
+from typing import Callable, Literal
+
+import numpy as np
+from pydantic import BaseModel
+
+from engine.terrain import TerrainGenerationParams, TerrainType
+
+# Noise functions take the x and z coordinates of the columns and rows of a
+# grid (1D arrays) and return the (len(xs), len(zs)) grid of values in [0, 1]
+NoiseFunction = Callable[[np.ndarray, np.ndarray, int], np.ndarray]
+
+# Columns generated per batch; bounds the size of the temporaries
+CHUNK = 512
+
+_SQRT3 = np.sqrt(3.0)
+_F2 = 0.5 * (_SQRT3 - 1.0)
+_G2 = (3.0 - _SQRT3) / 6.0
+_GRADIENTS = np.array(
+    [(1, 1), (-1, 1), (1, -1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.float32
+)
+
+
+def _lattice_hash(seed: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Pseudo-random byte for every lattice point in i x j (1D integer arrays)."""
+    perm = np.random.default_rng(seed).permutation(256)
+    perm = np.concatenate([perm, perm])
+    return perm[perm[i & 255][:, None] + (j & 255)[None, :]]
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _axis(coords: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Lattice cell (relative to the first one), offset in the cell, and fade weight
+    base = np.floor(coords).astype(np.int64)
+    frac = (coords - base).astype(np.float32)
+    return base - base[0], frac, _fade(frac)
+
+
+def _interpolate(lattice: np.ndarray, xi, x0, x1, zj, z0, z1) -> np.ndarray:
+    # Sum over the 4 corners of lattice * x-weight * z-weight, done one axis at a
+    # time: the weights of a regular grid are separable, so the full-size work is
+    # a couple of row gathers instead of per-point 2D lookups
+    along_z = lattice[:, zj] * z0 + lattice[:, zj + 1] * z1
+    return along_z[xi] * x0[:, None] + along_z[xi + 1] * x1[:, None]
+
+
+def value_noise(xs: np.ndarray, zs: np.ndarray, seed: int) -> np.ndarray:
+    """Smoothly interpolated random lattice values, in [0, 1]."""
+    xi, _, u = _axis(xs)
+    zj, _, v = _axis(zs)
+    base_x, base_z = int(np.floor(xs[0])), int(np.floor(zs[0]))
+    hashes = _lattice_hash(seed, np.arange(base_x, base_x + xi[-1] + 2), np.arange(base_z, base_z + zj[-1] + 2))
+    values = np.random.default_rng(seed).random(256, dtype=np.float32)[hashes]
+    return _interpolate(values, xi, 1 - u, u, zj, 1 - v, v)
+
+
+def perlin_noise(xs: np.ndarray, zs: np.ndarray, seed: int) -> np.ndarray:
+    """Classic gradient noise, rescaled to [0, 1]."""
+    xi, fx, u = _axis(xs)
+    zj, fz, v = _axis(zs)
+    base_x, base_z = int(np.floor(xs[0])), int(np.floor(zs[0]))
+    gradients = _GRADIENTS[
+        _lattice_hash(seed, np.arange(base_x, base_x + xi[-1] + 2), np.arange(base_z, base_z + zj[-1] + 2)) & 7
+    ]
+    # Each corner contributes g . (offset to the corner); both products are
+    # separable, so the dot product splits into two interpolations
+    along_x = _interpolate(gradients[..., 0], xi, (1 - u) * fx, u * (fx - 1), zj, 1 - v, v)
+    along_z = _interpolate(gradients[..., 1], xi, 1 - u, u, zj, (1 - v) * fz, v * (fz - 1))
+    return np.clip((along_x + along_z) * np.float32(1 / np.sqrt(2)) + np.float32(0.5), 0.0, 1.0)
+
+
+def simplex_noise(xs: np.ndarray, zs: np.ndarray, seed: int) -> np.ndarray:
+    """2D simplex noise (fewer directional artefacts than Perlin), rescaled to [0, 1]."""
+    x, z = np.meshgrid(xs.astype(np.float32), zs.astype(np.float32), indexing="ij")
+    skew = (x + z) * np.float32(_F2)
+    fi, fj = np.floor(x + skew), np.floor(z + skew)
+    unskew = (fi + fj) * np.float32(_G2)
+    x0, z0 = x - (fi - unskew), z - (fj - unskew)
+    i, j = fi.astype(np.int64), fj.astype(np.int64)
+
+    # The skewed grid is not axis-aligned: hash the lattice points it covers once,
+    # then address them through flat indices
+    i_min, j_min = int(i.min()), int(j.min())
+    hashes = _lattice_hash(seed, np.arange(i_min, int(i.max()) + 2), np.arange(j_min, int(j.max()) + 2)) & 7
+    stride = hashes.shape[1]
+    grad_x, grad_z = _GRADIENTS[hashes.ravel(), 0], _GRADIENTS[hashes.ravel(), 1]
+    cell = (i - i_min) * stride + (j - j_min)
+
+    # Which of the two triangles of the skewed cell we are in
+    upper = x0 > z0
+    i1 = upper.astype(np.float32)
+    j1 = 1 - i1
+    g2 = np.float32(_G2)
+    corners = (
+        (x0, z0, cell),
+        (x0 - i1 + g2, z0 - j1 + g2, cell + np.where(upper, stride, 1)),
+        (x0 - 1 + 2 * g2, z0 - 1 + 2 * g2, cell + (stride + 1)),
+    )
+
+    total = np.zeros_like(x)
+    for cx, cz, index in corners:
+        t = np.maximum(np.float32(0.5) - cx * cx - cz * cz, np.float32(0.0))
+        t *= t
+        t *= t
+        total += t * (np.take(grad_x, index) * cx + np.take(grad_z, index) * cz)
+    return np.clip(total * np.float32(35) + np.float32(0.5), 0.0, 1.0)
+
+
+NOISES: dict[str, NoiseFunction] = {"value": value_noise, "perlin": perlin_noise, "simplex": simplex_noise}
+
+
+def fbm(noise: NoiseFunction, xs: np.ndarray, zs: np.ndarray, seed: int,
+        octaves: int = 5, lacunarity: float = 2.0, gain: float = 0.5) -> np.ndarray:
+    """Fractal Brownian motion: octaves of `noise` at rising frequency and falling amplitude, in [0, 1]."""
+    total = np.zeros((len(xs), len(zs)), dtype=np.float32)
+    frequency, amplitude, norm = 1.0, 1.0, 0.0
+    for octave in range(octaves):
+        total += np.float32(amplitude) * noise(xs * frequency, zs * frequency, seed + octave)
+        norm += amplitude
+        frequency *= lacunarity
+        amplitude *= gain
+    return total / np.float32(norm)
+
+
+class Biome(BaseModel):
+    """Tiles whose height is below `max_height` (and above the previous band) become `terrain`."""
+    terrain: str
+    max_height: float
+
+
+class ResourceRule(BaseModel):
+    """Turns a `density` fraction of the tiles of the `on` types into `terrain`."""
+    terrain: str
+    density: float
+    on: list[str]
+
+
+class NoiseTerrainParams(TerrainGenerationParams):
+    """A heightmap from fractal noise, cut into biome bands, then rivers and resources."""
+    noise: Literal["value", "perlin", "simplex"] = "perlin"
+    scale: float = 64.0          # tiles per noise period at the first octave
+    octaves: int = 5
+    lacunarity: float = 2.0
+    gain: float = 0.5
+    biomes: list[Biome]          # by increasing max_height; the last band takes the rest
+    rivers: int = 0
+    river_terrain: str | None = None
+    river_source_height: float = 0.7
+    resources: list[ResourceRule] = []
+
+
+def heightmap(width: int, height: int, params: NoiseTerrainParams, origin: tuple[int, int] = (0, 0)) -> np.ndarray:
+    """Fractal noise heights in [0, 1], float32, shaped (width, height)."""
+    noise = NOISES[params.noise]
+    heights = np.empty((width, height), dtype=np.float32)
+    zs = (np.arange(height, dtype=np.float64) + origin[1]) / params.scale
+    for x0 in range(0, width, CHUNK):
+        xs = (np.arange(x0, min(x0 + CHUNK, width), dtype=np.float64) + origin[0]) / params.scale
+        heights[x0:x0 + len(xs)] = fbm(noise, xs, zs, params.seed, params.octaves, params.lacunarity, params.gain)
+    return heights
+
+
+def classify(heights: np.ndarray, bounds: list[float]) -> np.ndarray:
+    """Band index of each height: 0 below bounds[0], 1 below bounds[1], and so on."""
+    return np.searchsorted(np.asarray(bounds), heights, side="right").astype(np.uint8)
+
+
+def carve_rivers(heights: np.ndarray, codes: np.ndarray, seed: int, count: int, river: int,
+                 source_height: float = 0.7, stop: tuple[int, ...] = ()) -> np.ndarray:
+    """
+    Runs `count` rivers downhill, by steepest descent, from random tiles above
+    `source_height` until they reach a `stop` code, the map edge or a pit.
+    Marks them as `river` in `codes`, in place, and returns `codes`.
+    """
+    rng = np.random.default_rng(seed + 0x5EED)
+    sources = np.flatnonzero(heights > source_height)
+    if not count or not len(sources):
+        return codes
+
+    width, height = heights.shape
+    stop_mask = np.isin(codes, stop) if stop else np.zeros(codes.shape, dtype=bool)
+    for source in rng.choice(sources, size=min(count, len(sources)), replace=False):
+        x, z = divmod(int(source), height)
+        for _ in range(width + height):
+            if stop_mask[x, z]:
+                break
+            codes[x, z] = river
+            x0, z0 = max(x - 1, 0), max(z - 1, 0)
+            window = heights[x0:x + 2, z0:z + 2]
+            dx, dz = np.unravel_index(np.argmin(window), window.shape)
+            nx, nz = x0 + int(dx), z0 + int(dz)
+            if heights[nx, nz] >= heights[x, z]:
+                break
+            x, z = nx, nz
+    return codes
+
+
+def scatter(codes: np.ndarray, seed: int, density: float, on: tuple[int, ...], resource: int) -> np.ndarray:
+    """Turns a random `density` fraction of the tiles with an `on` code into `resource`, in place."""
+    mask = np.isin(codes, on) & (np.random.default_rng(seed).random(codes.shape, dtype=np.float32) < density)
+    codes[mask] = resource
+    return codes
+
+
+def generate_codes(terrain_type: type[TerrainType], width: int, height: int,
+                   params: NoiseTerrainParams) -> tuple[np.ndarray, list[TerrainType]]:
+    """Runs the whole pipeline; returns a (width, height) uint8 array of palette indices and the palette."""
+    palette: list[TerrainType] = []
+
+    def code(value: str) -> int:
+        kind = terrain_type(value)
+        if kind not in palette:
+            palette.append(kind)
+        return palette.index(kind)
+
+    heights = heightmap(width, height, params)
+    band_codes = np.array([code(biome.terrain) for biome in params.biomes], dtype=np.uint8)
+    bands = classify(heights, [biome.max_height for biome in params.biomes[:-1]])
+    codes = band_codes[bands]
+
+    if params.rivers and params.river_terrain is not None:
+        # Rivers end where they meet the lowest band (the sea, usually)
+        carve_rivers(heights, codes, params.seed, params.rivers, code(params.river_terrain),
+                     params.river_source_height, stop=(int(band_codes[0]),))
+
+    for offset, rule in enumerate(params.resources, start=1):
+        scatter(codes, params.seed + offset, rule.density, tuple(code(t) for t in rule.on), code(rule.terrain))
+
+    return codes, palette
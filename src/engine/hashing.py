@@ -0,0 +1,163 @@
+from hashlib import blake2b
+
+from pydantic import BaseModel, ConfigDict
+
+from engine.entity import BaseEntity, EntityListener
+from engine.terrain import TerrainListener, Tile
+from engine.trait import CompactTrait, Trait
+
+# (combined hash, own-fields hash, ((trait name, trait hash), ...)) for one entity
+EntityDigest = tuple[int, int, tuple[tuple[str, int], ...]]
+
+
+def _digest(data: str) -> int:
+    # blake2b rather than hash(): str hashing is salted per process, and digests
+    # must be comparable across processes and machines
+    return int.from_bytes(blake2b(data.encode(), digest_size=8).digest(), "little")
+
+
+def trait_state(trait: Trait) -> tuple:
+    """Returns the field values that make up a trait's state, in declaration order."""
+    if isinstance(trait, CompactTrait):
+        return tuple(getattr(trait, field) for field in trait._fields)
+    return tuple(trait.__dict__.values())
+
+
+def entity_digest(entity: BaseEntity) -> EntityDigest:
+    """Hashes an entity and each of its traits separately, so diffs can name the culprit."""
+    traits = tuple(
+        (type(trait).__qualname__, _digest(repr((type(trait).__qualname__, trait_state(trait)))))
+        for trait in entity.traits
+    )
+    own = _digest(repr((entity.id, entity.asset, entity.position)))
+    return _digest(repr((own, traits))), own, traits
+
+
+class HashSnapshot(BaseModel):
+    """Per-entity and per-terrain-column digests of a world at one point in time."""
+    model_config = ConfigDict(frozen=True)
+
+    digest: int
+    entities: dict[int, EntityDigest]
+    columns: tuple[int, ...]
+
+
+class StateDiff(BaseModel):
+    """Where two snapshots diverge. Changed entities list 'entity' and/or trait names."""
+    added: list[int] = []
+    removed: list[int] = []
+    changed: dict[int, list[str]] = {}
+    columns: list[int] = []
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.columns)
+
+
+class WorldHasher(EntityListener, TerrainListener):
+    """
+    Keeps a running hash of a game's entities and terrain.
+    The world digest is the XOR of per-entity and per-column digests, so a change
+    only costs re-hashing what was touched: entities are marked dirty as they
+    mutate and re-hashed lazily on the next digest() call.
+    """
+    def __init__(self, game):
+        self.game = game
+        self._entities: dict[int, EntityDigest] = {}
+        self._dirty: set[int] = set()
+        self._entity_acc = 0
+
+        terrain = game.terrain
+        self._columns = [self._column_digest(x) for x in range(terrain.width)]
+        self._terrain_acc = 0
+        for value in self._columns:
+            self._terrain_acc ^= value
+
+        for entity in game.entities.entities.values():
+            self._store(entity)
+
+        game.entities.add_listener(self)
+        terrain.add_listener(self)
+
+    def detach(self):
+        self.game.entities.remove_listener(self)
+        self.game.terrain.remove_listener(self)
+
+    def digest(self) -> int:
+        """Returns the current 64-bit world digest."""
+        if self._dirty:
+            entities = self.game.entities.entities
+            for entity_id in self._dirty:
+                self._store(entities[entity_id])
+            self._dirty.clear()
+        return self._entity_acc ^ self._terrain_acc
+
+    def hexdigest(self) -> str:
+        return f"{self.digest():016x}"
+
+    def snapshot(self) -> HashSnapshot:
+        """Captures the digests needed to diff against another world later."""
+        digest = self.digest()
+        return HashSnapshot.model_construct(
+            digest=digest, entities=dict(self._entities), columns=tuple(self._columns)
+        )
+
+    # --- EntityListener ---
+
+    def on_entity_added(self, entity: BaseEntity):
+        self._dirty.add(entity.id)
+
+    def on_entity_removed(self, entity: BaseEntity):
+        self._dirty.discard(entity.id)
+        old = self._entities.pop(entity.id, None)
+        if old is not None:
+            self._entity_acc ^= old[0]
+
+    def on_entity_changed(self, entity: BaseEntity, trait: Trait | None):
+        self._dirty.add(entity.id)
+
+    # --- TerrainListener ---
+
+    def on_tile_changed(self, x: int, z: int, old: Tile, new: Tile):
+        self._terrain_acc ^= self._columns[x]
+        self._columns[x] = self._column_digest(x)
+        self._terrain_acc ^= self._columns[x]
+
+    # --- Internals ---
+
+    def _store(self, entity: BaseEntity):
+        old = self._entities.get(entity.id)
+        if old is not None:
+            self._entity_acc ^= old[0]
+        new = entity_digest(entity)
+        self._entities[entity.id] = new
+        self._entity_acc ^= new[0]
+
+    def _column_digest(self, x: int) -> int:
+        column = self.game.terrain.tiles[x]
+        return _digest(f"{x}:" + ",".join(tile.terrain.value for tile in column))
+
+
+def diff_snapshots(a: HashSnapshot, b: HashSnapshot) -> StateDiff:
+    """Reports which entities, traits and terrain columns differ between two snapshots."""
+    if a.digest == b.digest:
+        return StateDiff()
+
+    diff = StateDiff(
+        added=[eid for eid in b.entities if eid not in a.entities],
+        removed=[eid for eid in a.entities if eid not in b.entities],
+        columns=[x for x, (ca, cb) in enumerate(zip(a.columns, b.columns)) if ca != cb],
+    )
+
+    for eid, (hash_a, own_a, traits_a) in a.entities.items():
+        other = b.entities.get(eid)
+        if other is None or other[0] == hash_a:
+            continue
+        _, own_b, traits_b = other
+
+        changed = {name for name, _ in set(traits_a) ^ set(traits_b)}
+        if own_a != own_b:
+            changed.add("entity")
+        diff.changed[eid] = sorted(changed)
+
+    return diff
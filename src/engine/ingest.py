@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+from engine.cqrs import BaseCommand
+
+
+class CommandInbox:
+    """
+    Where commands from other threads (bots, consoles, network servers) wait
+    for the next tick. submit() never blocks: past `capacity` pending commands
+    new ones are dropped and counted, so a flood cannot stall the producers or
+    grow memory without bound. Game.tick drains the inbox into its command
+    queue before anything else, at most `max_per_tick` at a time; the rest
+    waits for the following tick.
+
+    No lock is taken: deque.append and popleft are atomic, and a drain only
+    pops as many commands as were there when it started. The capacity check is
+    therefore approximate under contention, by at most the number of producers.
+    """
+    def __init__(self, capacity: int = 10_000, max_per_tick: int | None = None):
+        self.capacity = capacity
+        self.max_per_tick = max_per_tick
+        self._queue: deque[BaseCommand] = deque()
+        self.accepted = 0
+        self.dropped = 0
+        self.drained = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, command: BaseCommand) -> bool:
+        """Queues a command from any thread; returns False if it was dropped."""
+        pending = len(self._queue)
+        if pending >= self.capacity:
+            self.dropped += 1
+            return False
+        self._queue.append(command)
+        self.accepted += 1
+        if pending >= self.high_water:
+            self.high_water = pending + 1
+        return True
+
+    def drain(self) -> list[BaseCommand]:
+        """Takes the commands waiting now, oldest first. Called by the ticking thread only."""
+        count = len(self._queue)
+        if self.max_per_tick is not None:
+            count = min(count, self.max_per_tick)
+        popleft = self._queue.popleft
+        commands = [popleft() for _ in range(count)]
+        self.drained += count
+        return commands
+
+    def metrics(self) -> dict[str, int]:
+        return {
+            "pending": len(self._queue),
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "drained": self.drained,
+            "high_water": self.high_water,
+        }
+
+
+class CommandServer:
+    """
+    Accepts commands over a local socket and submits them to a CommandInbox.
+
+    The protocol is one JSON object per line, {"type": "MoveCommand", "data": {...}},
+    answered by one line per command: {"ok": true}, {"ok": false, "error": "dropped"}
+    when the inbox is full, or {"ok": false, "error": "..."} for a malformed or
+    unknown command.
+
+    Args:
+        inbox: Usually game.inbox.
+        command_types: Accepted command classes, looked up by class name
+            (e.g. game.command_processor.command_types()).
+        address: A filesystem path for a Unix socket, or (host, port) for TCP;
+            port 0 picks a free one (see `address` once started).
+    """
+    # Longest accepted line, in bytes
+    LINE_LIMIT = 64 * 1024
+
+    def __init__(self, inbox: CommandInbox, command_types: list[type[BaseCommand]], address: str | tuple[str, int]):
+        self.inbox = inbox
+        self.address = address
+        self._types = {command_type.__name__: command_type for command_type in command_types}
+        self.rejected = 0
+        self._server: asyncio.AbstractServer | None = None
+        # Open client connections; wait_closed() waits for them, so close() hangs them up
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    async def start(self):
+        """Starts listening on the running event loop."""
+        if isinstance(self.address, str):
+            self._server = await asyncio.start_unix_server(self._handle, self.address, limit=self.LINE_LIMIT)
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(self._handle, host, port, limit=self.LINE_LIMIT)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """Stops listening and disconnects every client."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def serve_in_background(self):
+        """Runs the server on its own thread and event loop; returns once it is listening."""
+        ready = threading.Event()
+        failure: list[BaseException] = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as exc:
+                failure.append(exc)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="command-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            raise failure[0]
+
+    def stop(self, timeout: float | None = None):
+        """Stops a server started with serve_in_background."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while line := await reader.readline():
+                writer.write(self._accept(line))
+                await writer.drain()
+        except (ValueError, ConnectionError):
+            # Over-long line or client gone: drop the connection
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def _accept(self, line: bytes) -> bytes:
+        try:
+            message = json.loads(line)
+            command_type = self._types[message["type"]]
+            command = command_type.model_validate(message.get("data", {}))
+        except KeyError as exc:
+            self.rejected += 1
+            return _reply(False, f"unknown command {exc.args[0]!r}" if exc.args[0] != "type" else "missing 'type'")
+        except (ValueError, TypeError) as exc:
+            self.rejected += 1
+            return _reply(False, str(exc).splitlines()[0])
+        if not self.inbox.submit(command):
+            return _reply(False, "dropped")
+        return _reply(True)
+
+
+def _reply(ok: bool, error: str | None = None) -> bytes:
+    return (json.dumps({"ok": True} if ok else {"ok": False, "error": error}) + "\n").encode()
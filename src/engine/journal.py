@@ -0,0 +1,288 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple
+
+import numpy as np
+
+from engine.binlog import RECORD_HEADER, TYPE_ID, TYPE_RECORD, LogReader, LogWriter
+from engine.cqrs import BaseEvent
+
+if TYPE_CHECKING:
+    from engine.game import Game
+
+MAGIC = b"ISOJOURNAL1"
+
+# A block of events: BLOCK header, the ids of the event types it holds, then
+# the zlib-compressed columns ticks (u32), type ids (u16), payload sizes (u32)
+# and the concatenated JSON payloads
+BLOCK_RECORD = 1
+BLOCK = struct.Struct("<IIIH")
+
+
+class JournalBlock(NamedTuple):
+    """Index entry for one block: where it is and what it holds."""
+    offset: int
+    size: int
+    first_tick: int
+    last_tick: int
+    count: int
+    type_ids: frozenset[int]
+
+
+class JournalEntry(NamedTuple):
+    tick: int
+    type_name: str
+    # The event model when its class was given to the reader, else the decoded JSON
+    event: BaseEvent | dict[str, Any]
+
+
+class EventJournal:
+    """
+    Appends every event the game processes to an append-only log, for analytics
+    and debugging. The tick thread only hands events over; a background thread
+    serialises them into compressed column blocks and writes them out, every
+    `block_size` events or `flush_interval` seconds, whichever comes first.
+
+    Events are serialised after the tick that produced them, so they must not
+    be mutated once processed (events are facts; handlers only read them).
+    Branches from Game.fork are not journaled. After a rollback the replayed
+    ticks are journaled again, after the ones they replace.
+
+    Usage:
+        journal = EventJournal("session.journal")
+        journal.attach(game)
+        ...
+        journal.close()
+    """
+    def __init__(self, path: str, block_size: int = 4096, flush_interval: float = 1.0, compression: int = 6):
+        self.path = path
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self._writer: LogWriter | None = None
+        self._thread: threading.Thread | None = None
+
+        # Guards everything below, shared by the tick thread and the writer thread
+        self._condition = threading.Condition()
+        self._ticks: list[int] = []
+        self._events: list[BaseEvent] = []
+        self._requested = 0
+        self._completed = 0
+        self._closing = False
+        self._failure: BaseException | None = None
+
+        self.events = 0
+        self.blocks = 0
+        self.bytes_written = 0
+
+    def attach(self, game: "Game"):
+        metadata = {
+            "game": type(game).__qualname__,
+            "seed": game.seed,
+            "width": game.terrain.width,
+            "height": game.terrain.height,
+            "start_tick": game.current_tick,
+        }
+        self._writer = LogWriter(open(self.path, "wb"), MAGIC, metadata)
+        self._writer.flush()
+        self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+        self._thread.start()
+        game.event_processor.journal = self
+
+    def record(self, tick: int, events: list[BaseEvent]):
+        """Queues the events processed during `tick`. Called by the EventProcessor."""
+        if not events:
+            return
+        with self._condition:
+            self._ticks.extend([tick] * len(events))
+            self._events.extend(events)
+            if len(self._events) >= self.block_size:
+                self._condition.notify()
+
+    def flush(self):
+        """Blocks until everything recorded so far is on disk."""
+        with self._condition:
+            self._requested += 1
+            target = self._requested
+            self._condition.notify()
+            while self._completed < target and self._thread.is_alive():
+                self._condition.wait(0.1)
+        if self._failure is not None:
+            raise RuntimeError("The event journal writer failed") from self._failure
+
+    def close(self):
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        self._writer.close()
+        if self._failure is not None:
+            raise RuntimeError("The event journal writer failed") from self._failure
+
+    def metrics(self) -> dict[str, int]:
+        with self._condition:
+            pending = len(self._events)
+        return {"events": self.events, "pending": pending, "blocks": self.blocks, "bytes": self.bytes_written}
+
+    # --- Writer thread ---
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not (self._closing or self._requested > self._completed or len(self._events) >= self.block_size):
+                    self._condition.wait(self.flush_interval)
+                requested, closing = self._requested, self._closing
+                ticks, self._ticks = self._ticks, []
+                events, self._events = self._events, []
+
+            try:
+                for start in range(0, len(events), self.block_size):
+                    end = start + self.block_size
+                    self._write_block(ticks[start:end], events[start:end])
+                if events:
+                    self._writer.flush()
+            except BaseException as exc:
+                self._failure = exc
+                return
+
+            with self._condition:
+                self._completed = requested
+                self._condition.notify_all()
+            if closing:
+                return
+
+    def _write_block(self, ticks: list[int], events: list[BaseEvent]):
+        type_id = self._writer.type_id
+        type_ids = np.array([type_id(type(event).__qualname__) for event in events], dtype="<u2")
+        payloads = [event.model_dump_json().encode() for event in events]
+        tick_column = np.array(ticks, dtype="<u4")
+        sizes = np.array([len(payload) for payload in payloads], dtype="<u4")
+
+        columns = tick_column.tobytes() + type_ids.tobytes() + sizes.tobytes() + b"".join(payloads)
+        present = np.unique(type_ids)
+        header = BLOCK.pack(int(tick_column.min()), int(tick_column.max()), len(events), len(present))
+        body = header + present.tobytes() + zlib.compress(columns, self.compression)
+        self._writer.append(BLOCK_RECORD, body)
+
+        self.events += len(events)
+        self.blocks += 1
+        self.bytes_written += RECORD_HEADER.size + len(body)
+
+
+class JournalReader:
+    """
+    Reads a journal written by EventJournal, including one still being written.
+
+    The file is indexed by block (tick range and event types present, read from
+    the block headers without decompressing anything), so a range or type query
+    over a long session only inflates the blocks that can match.
+
+    Args:
+        path: The journal file.
+        event_types: Event classes to decode entries into; others come out as dicts.
+    """
+    def __init__(self, path: str, event_types: Iterable[type[BaseEvent]] = ()):
+        self._stream = open(path, "rb")
+        self.metadata = LogReader(self._stream, MAGIC).metadata
+        self._event_types = {event_type.__qualname__: event_type for event_type in event_types}
+        self._type_names: dict[int, str] = {}
+        self.blocks: list[JournalBlock] = []
+        # Everything before this offset has been indexed
+        self._indexed = self._stream.tell()
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Indexes the blocks appended since the last call; returns how many there were."""
+        stream = self._stream
+        size = os.fstat(stream.fileno()).st_size
+        found = 0
+        while self._indexed + RECORD_HEADER.size <= size:
+            stream.seek(self._indexed)
+            kind, length = RECORD_HEADER.unpack(stream.read(RECORD_HEADER.size))
+            offset = self._indexed + RECORD_HEADER.size
+            if offset + length > size:
+                # Still being written
+                break
+
+            if kind == TYPE_RECORD:
+                body = stream.read(length)
+                (type_id,) = TYPE_ID.unpack_from(body)
+                self._type_names[type_id] = body[TYPE_ID.size:].decode()
+            elif kind == BLOCK_RECORD:
+                first_tick, last_tick, count, type_count = BLOCK.unpack(stream.read(BLOCK.size))
+                type_ids = np.frombuffer(stream.read(type_count * 2), dtype="<u2")
+                self.blocks.append(JournalBlock(offset, length, first_tick, last_tick, count, frozenset(type_ids.tolist())))
+                found += 1
+            self._indexed = offset + length
+        return found
+
+    def read(self, start_tick: int = 0, end_tick: int | None = None,
+             types: Iterable[str | type[BaseEvent]] | None = None, follow: bool = False,
+             poll_interval: float = 0.1, idle_timeout: float | None = None) -> Iterator[JournalEntry]:
+        """
+        Yields the entries with start_tick <= tick <= end_tick, of the given
+        event types (classes or class names), in the order they were written.
+
+        With follow=True, keeps tailing the file once the end is reached, until
+        `idle_timeout` seconds pass without new blocks (or forever if None).
+        """
+        names = None if types is None else {t if isinstance(t, str) else t.__qualname__ for t in types}
+        position = 0
+        idle_since = time.monotonic()
+        while True:
+            while position < len(self.blocks):
+                block = self.blocks[position]
+                position += 1
+                if block.last_tick < start_tick or (end_tick is not None and block.first_tick > end_tick):
+                    continue
+                wanted = None
+                if names is not None:
+                    wanted = {type_id for type_id, name in self._type_names.items() if name in names}
+                    if not block.type_ids & wanted:
+                        continue
+                yield from self._entries(block, start_tick, end_tick, wanted)
+
+            if not follow:
+                return
+            if self.refresh():
+                idle_since = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return
+            else:
+                time.sleep(poll_interval)
+
+    def close(self):
+        self._stream.close()
+
+    def _entries(self, block: JournalBlock, start_tick: int, end_tick: int | None,
+                 wanted: set[int] | None) -> Iterator[JournalEntry]:
+        skip = BLOCK.size + len(block.type_ids) * 2
+        self._stream.seek(block.offset + skip)
+        columns = zlib.decompress(self._stream.read(block.size - skip))
+
+        count = block.count
+        ticks = np.frombuffer(columns, dtype="<u4", count=count)
+        type_ids = np.frombuffer(columns, dtype="<u2", count=count, offset=4 * count)
+        sizes = np.frombuffer(columns, dtype="<u4", count=count, offset=6 * count)
+        ends = np.cumsum(sizes, dtype=np.int64) + 10 * count
+        starts = ends - sizes
+
+        mask = ticks >= start_tick
+        if end_tick is not None:
+            mask &= ticks <= end_tick
+        if wanted is not None:
+            mask &= np.isin(type_ids, list(wanted))
+
+        for i in np.flatnonzero(mask).tolist():
+            name = self._type_names[int(type_ids[i])]
+            payload = columns[starts[i]:ends[i]]
+            event_type = self._event_types.get(name)
+            event = event_type.model_validate_json(payload) if event_type is not None else json.loads(payload)
+            yield JournalEntry(int(ticks[i]), name, event)
@@ -0,0 +1,104 @@
+from typing import TYPE_CHECKING
+
+from engine.entity import BaseEntity, EntityListener, handle_index
+from engine.system import System
+from engine.trait import CompactTrait
+
+if TYPE_CHECKING:
+    from engine.game import Game
+
+
+class ObserverTrait(CompactTrait):
+    """Marks an entity (usually a player unit) that keeps the world around it at full fidelity."""
+    radius: float = 16.0
+
+
+class LODSystem(System, EntityListener):
+    """
+    Region-based simulation level of detail.
+
+    The map is divided into square cells. A cell is hot when a camera focus
+    point or an ObserverTrait entity is within range; everything else is cold.
+    Systems ask step() how much time to simulate for an entity: hot entities
+    get every tick, cold ones only every `cold_interval` ticks, with the time
+    they skipped added up. A cold unit therefore covers its path in a few large
+    strides, landing at its destination at most one interval late, and is
+    promoted back to full fidelity, time owed included, as soon as it is seen.
+
+    Usage:
+        lod = LODSystem(cell_size=16, cold_interval=8)
+        lod.attach(game)
+        lod.set_focus("camera", x, y, radius=24)
+    """
+    def __init__(self, cell_size: float = 16.0, cold_interval: int = 8):
+        self.cell_size = cell_size
+        self.cold_interval = cold_interval
+        self.hot_cells: set[tuple[int, int]] = set()
+        self._focus: dict[str, tuple[float, float, float]] = {}
+        # Simulation time each deferred entity is owed
+        self._owed: dict[int, float] = {}
+        self._tick = 0
+
+    def attach(self, game: "Game"):
+        """Installs the system ahead of every other one and exposes it as game.lod."""
+        game.systems.insert(0, self)
+        game.entities.add_listener(self)
+        game.lod = self
+
+    def copy(self) -> "LODSystem":
+        """An independent copy for a forked game."""
+        clone = LODSystem(self.cell_size, self.cold_interval)
+        clone.hot_cells = set(self.hot_cells)
+        clone._focus = dict(self._focus)
+        clone._owed = dict(self._owed)
+        clone._tick = self._tick
+        return clone
+
+    def set_focus(self, name: str, x: float, y: float, radius: float):
+        """Adds or moves a named focus point, e.g. the camera of one player."""
+        self._focus[name] = (x, y, radius)
+
+    def clear_focus(self, name: str):
+        self._focus.pop(name, None)
+
+    def is_hot(self, position: tuple[float, float]) -> bool:
+        return self._cell(*position) in self.hot_cells
+
+    def step(self, entity: BaseEntity, dt: float) -> float:
+        """
+        Returns the time to simulate for an entity this tick: dt plus whatever it
+        is owed when it is due, 0.0 when its update is deferred.
+        Cold entities are staggered by handle so each tick carries a similar load.
+        """
+        if self.is_hot(entity.position) or (self._tick + handle_index(entity.id)) % self.cold_interval == 0:
+            return self._owed.pop(entity.id, 0.0) + dt
+        self._owed[entity.id] = self._owed.get(entity.id, 0.0) + dt
+        return 0.0
+
+    def settle(self, entity: BaseEntity):
+        """Forgets the time an entity is owed, e.g. once it has nowhere to go."""
+        self._owed.pop(entity.id, None)
+
+    def update(self, game: "Game", dt: float):
+        self._tick = game.current_tick
+
+        points = list(self._focus.values())
+        for entity, observer in game.entities.yield_entities_with_trait(ObserverTrait):
+            points.append((*entity.position, observer.radius))
+
+        hot = set()
+        for x, y, radius in points:
+            (x0, y0), (x1, y1) = self._cell(x - radius, y - radius), self._cell(x + radius, y + radius)
+            hot.update((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+        self.hot_cells = hot
+
+    def metrics(self) -> dict[str, float]:
+        return {"lod_hot_cells": len(self.hot_cells), "lod_deferred": len(self._owed)}
+
+    # --- EntityListener ---
+
+    def on_entity_removed(self, entity: BaseEntity):
+        self._owed.pop(entity.id, None)
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
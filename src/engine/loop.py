@@ -0,0 +1,52 @@
+import threading
+import time
+
+from engine.cqrs import BaseCommand
+from engine.snapshot import SnapshotBuffer, WorldSnapshot
+
+
+class SimulationLoop(threading.Thread):
+    """
+    Runs Game.tick on its own thread at a fixed rate, publishing a WorldSnapshot
+    after every tick. The render side reads snapshots from the buffer and never
+    touches the live world, so a slow tick does not drop frames and vice versa.
+    """
+    def __init__(self, game, tick_rate: float = 30.0, buffer: SnapshotBuffer | None = None, max_catch_up: int = 5):
+        super().__init__(name="simulation", daemon=True)
+        self.game = game
+        self.dt = 1.0 / tick_rate
+        self.buffer = buffer or SnapshotBuffer()
+        # How many ticks we may run back-to-back before giving up on real time
+        self.max_catch_up = max_catch_up
+        self._stop_event = threading.Event()
+
+    def enqueue_command(self, command: BaseCommand) -> bool:
+        """Thread-safe: queues a command for the next tick; False if the game's inbox is full."""
+        return self.game.inbox.submit(command)
+
+    def stop(self, timeout: float | None = None):
+        """Asks the loop to exit after the current tick and waits for it."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def step(self):
+        """Runs exactly one tick and publishes its snapshot."""
+        # The tick drains the game's inbox itself
+        self.game.tick(self.dt)
+        self.buffer.publish(WorldSnapshot.capture(self.game, self.buffer.latest()))
+
+    def run(self):
+        self.buffer.publish(WorldSnapshot.capture(self.game, self.buffer.latest()))
+        next_tick = time.perf_counter()
+
+        while not self._stop_event.is_set():
+            self.step()
+            next_tick += self.dt
+
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            elif -delay > self.dt * self.max_catch_up:
+                # We fell too far behind: drop the backlog instead of spiralling
+                next_tick = time.perf_counter()
@@ -0,0 +1,121 @@
+from typing import TYPE_CHECKING, Iterator, NamedTuple
+
+from engine.entity import BaseEntity, EntityListener
+from engine.trait import Trait
+
+if TYPE_CHECKING:
+    from engine.entity import EntityMap
+
+
+class Query:
+    """
+    A live set of the entities that have every trait in `with_traits` and no
+    trait in `without` (subclasses match, as with get_trait). Obtain one through
+    EntityMap.query, which keeps it current on adds, removes and trait changes.
+    """
+    def __init__(self, entity_map: "EntityMap", with_traits: tuple[type, ...], without: tuple[type, ...] = ()):
+        self.with_traits = tuple(with_traits)
+        self.without = tuple(without)
+        # Set on forked maps, which hand out their own shells of shared entities
+        self._fork = entity_map if entity_map._parent is not None else None
+        # Ordered by arrival, so iteration order is deterministic
+        self._members: dict[int, BaseEntity] = {
+            entity.id: entity for entity in dict.values(entity_map.entities) if self.matches(entity)
+        }
+
+    def matches(self, entity: BaseEntity) -> bool:
+        return (
+            all(entity.get_trait(trait) is not None for trait in self.with_traits)
+            and not any(entity.get_trait(trait) is not None for trait in self.without)
+        )
+
+    def __iter__(self) -> Iterator[BaseEntity]:
+        # Iterate over a copy: callers may add or remove entities while looping
+        members = list(self._members.values())
+        if self._fork is not None:
+            members = self._fork._own_all(members)
+        return iter(members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, entity_id: int) -> bool:
+        return entity_id in self._members
+
+    def _update(self, entity: BaseEntity):
+        if self.matches(entity):
+            self._members[entity.id] = entity
+        else:
+            self._members.pop(entity.id, None)
+
+    def _discard(self, entity: BaseEntity):
+        self._members.pop(entity.id, None)
+
+
+class TraitChanges(NamedTuple):
+    """Entity ids whose trait of the observed type appeared, disappeared or was modified."""
+    added: set[int]
+    removed: set[int]
+    modified: set[int]
+
+
+class TraitObserver(EntityListener):
+    """
+    Accumulates changes to one trait type until drained.
+    An entity is reported at most once per drain: an entity that gained the
+    trait and was then modified is only 'added', and one that appeared and
+    vanished in between two drains is not reported at all.
+    """
+    def __init__(self, entity_map: "EntityMap", trait_type: type):
+        self.trait_type = trait_type
+        # Entities currently carrying the trait, to classify trait-list replacements
+        self._present: set[int] = {
+            entity.id for entity in entity_map.entities.values() if entity.get_trait(trait_type) is not None
+        }
+        self._changes = TraitChanges(set(), set(), set())
+
+    def drain(self) -> TraitChanges:
+        """Returns the changes since the last drain and starts a new window."""
+        changes = self._changes
+        self._changes = TraitChanges(set(), set(), set())
+        return changes
+
+    def on_entity_added(self, entity: BaseEntity):
+        if entity.get_trait(self.trait_type) is not None:
+            self._appear(entity.id)
+
+    def on_entity_removed(self, entity: BaseEntity):
+        if entity.id in self._present:
+            self._vanish(entity.id)
+
+    def on_entity_changed(self, entity: BaseEntity, trait: Trait | None):
+        if isinstance(trait, self.trait_type) and entity.id not in self._changes.added:
+            self._changes.modified.add(entity.id)
+
+    def on_entity_traits_replaced(self, entity: BaseEntity):
+        has_trait = entity.get_trait(self.trait_type) is not None
+        had_trait = entity.id in self._present
+        if has_trait and not had_trait:
+            self._appear(entity.id)
+        elif had_trait and not has_trait:
+            self._vanish(entity.id)
+        elif has_trait and entity.id not in self._changes.added:
+            # The trait object may have been swapped for a new one
+            self._changes.modified.add(entity.id)
+
+    def _appear(self, entity_id: int):
+        self._present.add(entity_id)
+        if entity_id in self._changes.removed:
+            # Removed and re-added within one window: report as a modification
+            self._changes.removed.discard(entity_id)
+            self._changes.modified.add(entity_id)
+        else:
+            self._changes.added.add(entity_id)
+
+    def _vanish(self, entity_id: int):
+        self._present.discard(entity_id)
+        self._changes.modified.discard(entity_id)
+        if entity_id in self._changes.added:
+            self._changes.added.discard(entity_id)
+        else:
+            self._changes.removed.add(entity_id)
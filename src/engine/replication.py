@@ -0,0 +1,457 @@
+import socket
+import struct
+
+import numpy as np
+
+from engine.entity import BaseEntity, EntityListener, EntityMap
+from engine.game import Game
+from engine.terrain import TerrainListener, TerrainMap, TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+from engine.trait import Trait
+
+FULL_STATE = 1
+DELTA = 2
+
+# Positions travel as fixed-point integers in 1/QUANTUM tile units
+QUANTUM = 256
+
+FRAME = struct.Struct("<I")
+HEADER = struct.Struct("<BI")          # message kind, tick
+COUNT = struct.Struct("<I")
+POSITION = struct.Struct("<ii")
+HANDLE = struct.Struct("<Q")
+TILE = struct.Struct("<HH")
+U8 = struct.Struct("<B")
+U16 = struct.Struct("<H")
+
+# Flags of an entity update in a delta: which fields follow the handle
+MOVED = 1
+ASSET_CHANGED = 2
+
+
+def _quantize(position: tuple[float, float]) -> tuple[int, int]:
+    return round(position[0] * QUANTUM), round(position[1] * QUANTUM)
+
+
+def _pack_str(out: bytearray, value: str):
+    data = value.encode()
+    out += U16.pack(len(data))
+    out += data
+
+
+def _pack_traits(out: bytearray, traits: list[Trait]):
+    out += U8.pack(len(traits))
+    for trait in traits:
+        _pack_str(out, type(trait).__qualname__)
+        payload = trait.model_dump_json().encode()
+        out += COUNT.pack(len(payload))
+        out += payload
+
+
+def _pack_entity(out: bytearray, entity: BaseEntity):
+    out += HANDLE.pack(entity.id)
+    # Empty string stands for "no alias"
+    _pack_str(out, entity.alias or "")
+    _pack_str(out, entity.asset)
+    out += POSITION.pack(*_quantize(entity.position))
+    _pack_traits(out, entity.traits)
+
+
+class _Reader:
+    """Cursor over a received message."""
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+    def bytes(self, size: int) -> bytes:
+        value = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+    def handle(self) -> int:
+        return self.unpack(HANDLE)[0]
+
+    def str(self) -> str:
+        (size,) = self.unpack(U16)
+        return self.bytes(size).decode()
+
+
+class DeltaEncoder(EntityListener, TerrainListener):
+    """
+    Turns a game into a full-state message once, then into per-tick deltas.
+    Changes are collected as they happen, so encoding a delta costs time
+    proportional to what changed that tick rather than to the size of the world.
+    Deltas carry removed ids, spawned entities, the quantised position and/or
+    asset of entities that moved or changed asset, the whole trait list of
+    entities whose traits changed or were replaced, and tile edits.
+    """
+    def __init__(self, game: Game):
+        self.game = game
+        self._spawned: dict[int, BaseEntity] = {}
+        self._removed: set[int] = set()
+        self._updated: set[int] = set()
+        self._traits: set[int] = set()
+        self._tiles: dict[tuple[int, int], Tile] = {}
+        # Last position and asset clients were told about; sub-quantum jitter is not resent
+        self._sent_positions: dict[int, tuple[int, int]] = {}
+        self._sent_assets: dict[int, str] = {}
+
+        game.entities.add_listener(self)
+        game.terrain.add_listener(self)
+
+    def detach(self):
+        self.game.entities.remove_listener(self)
+        self.game.terrain.remove_listener(self)
+
+    def encode_full(self) -> bytes:
+        """Encodes the whole world. Does not consume pending changes."""
+        game = self.game
+        terrain = game.terrain
+        out = bytearray(HEADER.pack(FULL_STATE, game.current_tick))
+
+        # Terrain as a palette of type values plus one byte per tile
+        if isinstance(terrain, ArrayTerrainMap):
+            palette = {kind.value: code for code, kind in enumerate(terrain.palette)}
+            cells = terrain.codes.tobytes()
+        else:
+            palette: dict[str, int] = {}
+            cells = bytearray()
+            for column in terrain.tiles:
+                for tile in column:
+                    cells.append(palette.setdefault(tile.terrain.value, len(palette)))
+        out += TILE.pack(terrain.width, terrain.height)
+        out += U8.pack(len(palette))
+        for value in palette:
+            _pack_str(out, value)
+        out += cells
+
+        entities = game.entities.entities
+        out += COUNT.pack(len(entities))
+        for entity in entities.values():
+            _pack_entity(out, entity)
+            self._sent_positions[entity.id] = _quantize(entity.position)
+            self._sent_assets[entity.id] = entity.asset
+
+        return bytes(out)
+
+    def encode_delta(self) -> bytes:
+        """Encodes and consumes every change since the previous delta."""
+        out = bytearray(HEADER.pack(DELTA, self.game.current_tick))
+
+        out += COUNT.pack(len(self._removed))
+        for entity_id in self._removed:
+            out += HANDLE.pack(entity_id)
+            self._sent_positions.pop(entity_id, None)
+            self._sent_assets.pop(entity_id, None)
+
+        out += COUNT.pack(len(self._spawned))
+        for entity in self._spawned.values():
+            _pack_entity(out, entity)
+            self._sent_positions[entity.id] = _quantize(entity.position)
+            self._sent_assets[entity.id] = entity.asset
+
+        updates = bytearray()
+        update_count = 0
+        entities = self.game.entities.entities
+        for entity_id in self._updated:
+            entity = entities[entity_id]
+            position = _quantize(entity.position)
+            flags = (MOVED if self._sent_positions.get(entity_id) != position else 0) | (
+                ASSET_CHANGED if self._sent_assets.get(entity_id) != entity.asset else 0
+            )
+            if not flags:
+                continue
+            updates += HANDLE.pack(entity_id)
+            updates += U8.pack(flags)
+            if flags & MOVED:
+                self._sent_positions[entity_id] = position
+                updates += POSITION.pack(*position)
+            if flags & ASSET_CHANGED:
+                self._sent_assets[entity_id] = entity.asset
+                _pack_str(updates, entity.asset)
+            update_count += 1
+        out += COUNT.pack(update_count)
+        out += updates
+
+        out += COUNT.pack(len(self._traits))
+        for entity_id in self._traits:
+            out += HANDLE.pack(entity_id)
+            _pack_traits(out, entities[entity_id].traits)
+
+        out += COUNT.pack(len(self._tiles))
+        for (x, z), tile in self._tiles.items():
+            out += TILE.pack(x, z)
+            _pack_str(out, tile.terrain.value)
+
+        self.reset()
+        return bytes(out)
+
+    def reset(self):
+        """Drops pending changes, e.g. when nobody is listening."""
+        self._spawned.clear()
+        self._removed.clear()
+        self._updated.clear()
+        self._traits.clear()
+        self._tiles.clear()
+
+    # --- EntityListener ---
+
+    def on_entity_added(self, entity: BaseEntity):
+        self._removed.discard(entity.id)
+        self._spawned[entity.id] = entity
+
+    def on_entity_removed(self, entity: BaseEntity):
+        self._updated.discard(entity.id)
+        self._traits.discard(entity.id)
+        # Spawned and removed within the same tick: clients never need to know
+        if self._spawned.pop(entity.id, None) is None:
+            self._removed.add(entity.id)
+
+    def on_entity_changed(self, entity: BaseEntity, trait: Trait | None):
+        if entity.id in self._spawned:
+            return
+        if trait is None:
+            self._updated.add(entity.id)
+        else:
+            self._traits.add(entity.id)
+
+    def on_entity_traits_replaced(self, entity: BaseEntity):
+        if entity.id not in self._spawned:
+            self._traits.add(entity.id)
+
+    # --- TerrainListener ---
+
+    def on_tile_changed(self, x: int, z: int, old: Tile, new: Tile):
+        self._tiles[(x, z)] = new
+
+
+class ReplicaDecoder:
+    """
+    Rebuilds a Game from the messages of a DeltaEncoder.
+    The replica has no systems or handlers; it only mirrors state, which is all
+    SceneMapper needs.
+
+    Args:
+        terrain_cls: The TerrainMap subclass used to hold the replicated grid.
+        terrain_type: The TerrainType enum the tiles' values belong to.
+        trait_types: The trait classes that may appear on entities.
+    """
+    def __init__(self, terrain_cls: type[TerrainMap], terrain_type: type[TerrainType], trait_types: list[type[Trait]]):
+        self.terrain_cls = terrain_cls
+        self.terrain_type = terrain_type
+        self.trait_types = {cls.__qualname__: cls for cls in trait_types}
+        self.game: Game | None = None
+
+    def apply(self, message: bytes):
+        reader = _Reader(message)
+        kind, tick = reader.unpack(HEADER)
+        if kind == FULL_STATE:
+            self._apply_full(reader)
+        elif kind == DELTA:
+            if self.game is None:
+                raise ValueError("Received a delta before the full state")
+            self._apply_delta(reader)
+        else:
+            raise ValueError(f"Unknown message kind {kind}")
+        self.game.current_tick = tick
+
+    def _apply_full(self, reader: _Reader):
+        width, height = reader.unpack(TILE)
+        (palette_size,) = reader.unpack(U8)
+        # One shared Tile per terrain type: replicas never mutate tiles in place
+        palette = [Tile(terrain=self.terrain_type(reader.str())) for _ in range(palette_size)]
+        cells = reader.bytes(width * height)
+        if issubclass(self.terrain_cls, ArrayTerrainMap):
+            codes = np.frombuffer(cells, dtype=np.uint8).reshape(width, height).copy()
+            terrain = self.terrain_cls(width, height, codes, [tile.terrain for tile in palette])
+        else:
+            tiles = [[palette[cells[x * height + z]] for z in range(height)] for x in range(width)]
+            terrain = self.terrain_cls(width, height, tiles)
+
+        entities = EntityMap()
+        for _ in range(reader.count()):
+            entities.add(self._read_entity(reader))
+        self.game = Game(terrain, entities)
+
+    def _apply_delta(self, reader: _Reader):
+        entities = self.game.entities
+
+        for _ in range(reader.count()):
+            entities.remove(reader.handle())
+
+        for _ in range(reader.count()):
+            entities.add(self._read_entity(reader))
+
+        for _ in range(reader.count()):
+            entity = entities.get(reader.handle())
+            (flags,) = reader.unpack(U8)
+            if flags & MOVED:
+                qx, qy = reader.unpack(POSITION)
+                if entity is not None:
+                    entity.position = (qx / QUANTUM, qy / QUANTUM)
+            if flags & ASSET_CHANGED:
+                asset = reader.str()
+                if entity is not None:
+                    entity.asset = asset
+
+        for _ in range(reader.count()):
+            entity = entities.get(reader.handle())
+            traits = self._read_traits(reader)
+            if entity is not None:
+                entity.traits = traits
+
+        for _ in range(reader.count()):
+            x, z = reader.unpack(TILE)
+            self.game.terrain.set_tile(x, z, Tile(terrain=self.terrain_type(reader.str())))
+
+    def _read_entity(self, reader: _Reader) -> BaseEntity:
+        entity_id = reader.handle()
+        alias = reader.str() or None
+        asset = reader.str()
+        qx, qy = reader.unpack(POSITION)
+        traits = self._read_traits(reader)
+        # The replica keeps the server's handles so deltas can address entities
+        return BaseEntity(id=entity_id, alias=alias, asset=asset,
+                          position=(qx / QUANTUM, qy / QUANTUM), traits=traits)
+
+    def _read_traits(self, reader: _Reader) -> list[Trait]:
+        traits = []
+        (count,) = reader.unpack(U8)
+        for _ in range(count):
+            trait_cls = self.trait_types[reader.str()]
+            payload = reader.bytes(reader.count())
+            traits.append(trait_cls.model_validate_json(payload))
+        return traits
+
+
+def _open_socket(address: str | tuple[str, int]) -> socket.socket:
+    # A string is a Unix socket path, a (host, port) tuple is TCP
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    return socket.socket(family, socket.SOCK_STREAM)
+
+
+class SnapshotPublisher:
+    """
+    Serves a headless game to spectators over a local socket.
+    Call publish() once per tick, after Game.tick. New clients get the full state,
+    connected ones get the tick's delta. Sockets are non-blocking and each client
+    has a bounded backlog: a client that cannot keep up is dropped rather than
+    slowing down the simulation.
+    """
+    def __init__(self, game: Game, address: str | tuple[str, int], max_backlog: int = 8 * 1024 * 1024):
+        self.encoder = DeltaEncoder(game)
+        self.max_backlog = max_backlog
+
+        self._server = _open_socket(address)
+        self._server.bind(address)
+        self._server.listen()
+        self._server.setblocking(False)
+        self.address = self._server.getsockname()
+
+        self._clients: dict[socket.socket, bytearray] = {}
+
+    def publish(self):
+        new_clients = self._accept()
+
+        if self._clients.keys() - new_clients:
+            frame = self._frame(self.encoder.encode_delta())
+            for client, backlog in self._clients.items():
+                if client not in new_clients:
+                    backlog += frame
+        else:
+            self.encoder.reset()
+
+        if new_clients:
+            frame = self._frame(self.encoder.encode_full())
+            for client in new_clients:
+                self._clients[client] += frame
+
+        self._flush()
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+        self._clients.clear()
+        self._server.close()
+        self.encoder.detach()
+
+    def _accept(self) -> set[socket.socket]:
+        accepted = set()
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except BlockingIOError:
+                return accepted
+            client.setblocking(False)
+            self._clients[client] = bytearray()
+            accepted.add(client)
+
+    def _flush(self):
+        for client, backlog in list(self._clients.items()):
+            try:
+                sent = client.send(backlog) if backlog else 0
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop(client)
+                continue
+            del backlog[:sent]
+            if len(backlog) > self.max_backlog:
+                self._drop(client)
+
+    def _drop(self, client: socket.socket):
+        client.close()
+        del self._clients[client]
+
+    @staticmethod
+    def _frame(message: bytes) -> bytes:
+        return FRAME.pack(len(message)) + message
+
+
+class SnapshotClient:
+    """
+    Connects to a SnapshotPublisher and keeps decoder.game up to date.
+    Call poll() once per frame; it applies whatever messages have arrived.
+    """
+    def __init__(self, address: str | tuple[str, int], decoder: ReplicaDecoder):
+        self.decoder = decoder
+        self._socket = _open_socket(address)
+        self._socket.connect(address)
+        self._socket.setblocking(False)
+        self._buffer = bytearray()
+
+    @property
+    def game(self) -> Game | None:
+        return self.decoder.game
+
+    def poll(self) -> int:
+        """Applies all complete messages received so far; returns how many."""
+        while True:
+            try:
+                chunk = self._socket.recv(65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                raise ConnectionError("Publisher closed the connection")
+            self._buffer += chunk
+
+        applied = 0
+        while len(self._buffer) >= FRAME.size:
+            (size,) = FRAME.unpack_from(self._buffer)
+            if len(self._buffer) < FRAME.size + size:
+                break
+            self.decoder.apply(bytes(self._buffer[FRAME.size:FRAME.size + size]))
+            del self._buffer[:FRAME.size + size]
+            applied += 1
+        return applied
+
+    def close(self):
+        self._socket.close()
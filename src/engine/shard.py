@@ -0,0 +1,428 @@
+import multiprocessing
+import struct
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+
+from pydantic import BaseModel
+
+from engine.batch import load_game_class
+from engine.cqrs import BaseCommand
+from engine.entity import BaseEntity, EntityMap
+
+# Border buffer layout: two slots, each one float64 count then (x, y) pairs
+_COUNT = struct.Struct("<d")
+_POINT = struct.Struct("<dd")
+
+# Stands in for a handle whose entity is not in this shard; no valid handle is 0
+NO_ENTITY = 0
+
+# (trait index, field name) of a handle held by one of an entity's traits
+Slot = tuple[int, str]
+# Handle fields of a command -> global name of the entity they refer to (None: gone)
+Bindings = dict[str, str | None]
+
+
+class ShardLayout(BaseModel):
+    """Splits a width x height world into a grid of columns x rows rectangular regions."""
+    width: int
+    height: int
+    columns: int = 2
+    rows: int = 1
+
+    @property
+    def count(self) -> int:
+        return self.columns * self.rows
+
+    def shard_at(self, x: float, y: float) -> int:
+        """Returns the shard owning a world position; positions off the map clamp to the edge."""
+        column = min(max(int(x * self.columns // self.width), 0), self.columns - 1)
+        row = min(max(int(y * self.rows // self.height), 0), self.rows - 1)
+        return row * self.columns + column
+
+    def region(self, shard: int) -> tuple[float, float, float, float]:
+        """Returns (x0, y0, x1, y1) of a shard, lower bounds inclusive."""
+        row, column = divmod(shard, self.columns)
+        return (
+            column * self.width / self.columns,
+            row * self.height / self.rows,
+            (column + 1) * self.width / self.columns,
+            (row + 1) * self.height / self.rows,
+        )
+
+
+def _references(entity: BaseEntity) -> list[tuple[Slot, int]]:
+    """The handles an entity's traits hold, by slot (see handle_fields)."""
+    references = []
+    for position, trait in enumerate(entity.traits):
+        for field in getattr(type(trait), "handle_fields", ()):
+            handle = getattr(trait, field)
+            if handle is not None:
+                references.append(((position, field), handle))
+    return references
+
+
+def _distance_to_region(region: tuple[float, float, float, float], x: float, y: float) -> float:
+    x0, y0, x1, y1 = region
+    dx = max(x0 - x, 0.0, x - x1)
+    dy = max(y0 - y, 0.0, y - y1)
+    return max(dx, dy)
+
+
+class ShardContext:
+    """
+    What a sharded game sees of the rest of the world, available as `game.shard`
+    (None when the game runs unsharded).
+
+    Each shard publishes the positions of its entities within `halo` of its
+    border to a shared-memory buffer after every tick; neighbours read them into
+    `ghost_positions` at the start of the next tick. Shards run a tick
+    concurrently, so a fast shard may publish tick N while a slow neighbour is
+    still reading: every buffer has two slots, tick N writes slot N % 2 and
+    reads slot (N - 1) % 2. The coordinator only starts tick N + 1, which
+    writes the slot read during tick N, once every shard has finished tick N.
+    Ghosts are therefore always exactly one tick old.
+
+    Handles are local to a shard. Across shards an entity is known by its
+    global name, its alias (given one as `"<shard>:<handle>"` when first
+    needed). Trait fields listed in a trait's `handle_fields` are carried by
+    name when entities migrate and rebound on arrival; a reference to an entity
+    in another shard reads None until the two are in the same shard again.
+    Commands name their handle fields in `handle_fields` too, and are rebound
+    the same way when they cross shards.
+    """
+    def __init__(self, index: int, layout: ShardLayout, buffers: list[SharedMemory], halo: float, capacity: int):
+        self.index = index
+        self.layout = layout
+        self.region = layout.region(index)
+        self.halo = halo
+        self.capacity = capacity
+        # Ticks this shard has completed; picks the buffer slots (see publish_border)
+        self.tick = 0
+        self._buffers = buffers
+        self._neighbours = [
+            shard for shard in range(layout.count)
+            if shard != index and self._touches(layout.region(shard))
+        ]
+        self.outbox: list[tuple[BaseCommand, tuple[float, float], Bindings]] = []
+        # Set by the worker process
+        self.entities: EntityMap | None = None
+        self.ghost_positions: list[tuple[float, float]] = []
+
+        # References from local entities to entities in other shards:
+        # entity handle -> {slot: global name}
+        self._remote: dict[int, dict[Slot, str]] = {}
+        # Entities that left during the last tick: handle -> name, name -> position
+        self._departed_handles: dict[int, str] = {}
+        self._departed: dict[str, tuple[float, float]] = {}
+
+    def owns(self, x: float, y: float) -> bool:
+        return self.layout.shard_at(x, y) == self.index
+
+    def name(self, entity: BaseEntity) -> str:
+        """The entity's global name, giving it one if it has no alias yet."""
+        if entity.alias is None:
+            entity.alias = f"{self.index}:{entity.id}"
+        return entity.alias
+
+    def send(self, command: BaseCommand, at: tuple[float, float]):
+        """
+        Queues a command for whichever shard owns `at`; it is processed there on
+        the next tick, with its handle fields rebound to that shard's handles.
+        """
+        self.outbox.append((command, at, self._bind(command)))
+
+    def deliver(self, game, command: BaseCommand, bindings: Bindings):
+        """
+        Enqueues a command routed to this shard. Bound handle fields are
+        resolved here; a command about an entity that left this shard during
+        the last tick follows it to its new shard.
+        """
+        named = dict(bindings)
+        for field in type(command).handle_fields:
+            handle = getattr(command, field)
+            if field not in named and handle in self._departed_handles:
+                named[field] = self._departed_handles[handle]
+
+        update = {}
+        for field, name in named.items():
+            target = self.entities.resolve(name) if name is not None else None
+            if target is None and name in self._departed:
+                self.outbox.append((command, self._departed[name], {**self._bind(command), **named}))
+                return
+            update[field] = target.id if target is not None else NO_ENTITY
+        game.enqueue_command(command.model_copy(update=update) if update else command)
+
+    def refresh_ghosts(self):
+        """Reads the neighbours' border buffers into ghost_positions."""
+        self.ghost_positions = self.ghosts()
+
+    def ghosts(self) -> list[tuple[float, float]]:
+        """
+        Positions of the neighbours' entities that lie within `halo` of this
+        region, as published at the end of the previous tick.
+        """
+        offset = _slot_offset(self.capacity, (self.tick - 1) % 2)
+        points = []
+        for shard in self._neighbours:
+            buf = self._buffers[shard].buf
+            count = int(_COUNT.unpack_from(buf, offset)[0])
+            for i in range(count):
+                x, y = _POINT.unpack_from(buf, offset + _COUNT.size + i * _POINT.size)
+                if _distance_to_region(self.region, x, y) <= self.halo:
+                    points.append((x, y))
+        return points
+
+    def emigrate(self) -> list[tuple[BaseEntity, dict[Slot, str | None]]]:
+        """
+        Removes the entities that left this region, each with the global names
+        of the entities its traits referred to. Local references to the leavers
+        become remote ones.
+        """
+        entities = self.entities
+        leaving = [entity for entity in entities.entities.values() if not self.owns(*entity.position)]
+        self._departed_handles = {entity.id: self.name(entity) for entity in leaving}
+        self._departed = {self._departed_handles[entity.id]: entity.position for entity in leaving}
+        if not leaving:
+            return []
+
+        packets = []
+        for entity in leaving:
+            references = self._remote.pop(entity.id, {})
+            for slot, handle in _references(entity):
+                target = entities.get(handle)
+                references[slot] = self.name(target) if target is not None else None
+            packets.append((entity, references))
+
+        entities.remove_many(list(self._departed_handles))
+        for entity, references in packets:
+            entity.id = None
+            for position, field in references:
+                setattr(entity.traits[position], field, None)
+
+        for entity in entities.entities.values():
+            for (position, field), handle in _references(entity):
+                name = self._departed_handles.get(handle)
+                if name is not None:
+                    self._remote.setdefault(entity.id, {})[(position, field)] = name
+                    setattr(entity.traits[position], field, None)
+        return packets
+
+    def immigrate(self, packets: list[tuple[BaseEntity, dict[Slot, str | None]]]):
+        """Adds entities arriving from other shards and rebinds references by name."""
+        if not packets:
+            return
+        self.entities.add_many([entity for entity, _ in packets])
+        for entity, references in packets:
+            named = {slot: name for slot, name in references.items() if name is not None}
+            if named:
+                self._remote[entity.id] = named
+
+        # Newcomers may refer to local entities and the other way around
+        for entity_id, references in list(self._remote.items()):
+            entity = self.entities.get(entity_id)
+            if entity is None:
+                del self._remote[entity_id]
+                continue
+            for (position, field), name in list(references.items()):
+                target = self.entities.resolve(name)
+                if target is None:
+                    continue
+                del references[(position, field)]
+                trait = entity.traits[position] if position < len(entity.traits) else None
+                # Unless the entity has picked another target since
+                if trait is not None and getattr(trait, field, NO_ENTITY) is None:
+                    setattr(trait, field, target.id)
+            if not references:
+                del self._remote[entity_id]
+
+    def publish_border(self, entities: list[BaseEntity]):
+        """
+        Writes this shard's entities near its edges to this tick's slot of its
+        border buffer, and ends the tick.
+        """
+        x0, y0, x1, y1 = self.region
+        buf = self._buffers[self.index].buf
+        offset = _slot_offset(self.capacity, self.tick % 2)
+        count = 0
+        for entity in entities:
+            if count == self.capacity:
+                break
+            x, y = entity.position
+            if min(x - x0, x1 - x, y - y0, y1 - y) <= self.halo:
+                _POINT.pack_into(buf, offset + _COUNT.size + count * _POINT.size, x, y)
+                count += 1
+        _COUNT.pack_into(buf, offset, float(count))
+        self.tick += 1
+
+    def _bind(self, command: BaseCommand) -> Bindings:
+        bindings = {}
+        for field in type(command).handle_fields:
+            handle = getattr(command, field)
+            entity = self.entities.get(handle)
+            bindings[field] = self.name(entity) if entity is not None else self._departed_handles.get(handle)
+        return bindings
+
+    def _touches(self, other: tuple[float, float, float, float]) -> bool:
+        x0, y0, x1, y1 = self.region
+        ox0, oy0, ox1, oy1 = other
+        return ox0 <= x1 + self.halo and x0 <= ox1 + self.halo and oy0 <= y1 + self.halo and y0 <= oy1 + self.halo
+
+
+def _slot_offset(capacity: int, slot: int) -> int:
+    return slot * (_COUNT.size + capacity * _POINT.size)
+
+
+def _border_buffer_size(capacity: int) -> int:
+    return _slot_offset(capacity, 2)
+
+
+def _shard_main(conn: Connection, game_path: str, width: int, height: int, seed: int,
+                context: ShardContext):
+    # Every shard builds the same world from the seed and keeps only its region's
+    # entities. The terrain is NOT split: each process holds the whole map (see
+    # ShardedSimulation)
+    game = load_game_class(game_path).setup(width, height, seed=seed)
+    entities = game.entities
+    entities.remove_many([
+        entity.id for entity in entities.entities.values() if not context.owns(*entity.position)
+    ])
+    game.shard = context
+    context.entities = entities
+
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == "tick":
+                _, dt, immigrants, commands = message
+                context.immigrate(immigrants)
+                context.refresh_ghosts()
+                for command, bindings in commands:
+                    context.deliver(game, command, bindings)
+                game.tick(dt)
+
+                emigrants = context.emigrate()
+                context.publish_border(list(entities.entities.values()))
+                outbox, context.outbox = context.outbox, []
+                metrics = {**game.metrics(), "ghosts": len(context.ghost_positions)}
+                conn.send((emigrants, outbox, metrics))
+            elif message[0] == "collect":
+                conn.send(list(entities.entities.values()))
+            else:
+                break
+    finally:
+        conn.close()
+
+
+class ShardedSimulation:
+    """
+    Runs one world as several games, one per region of a ShardLayout, each in
+    its own process. Ticks are lockstep: the coordinator sends every shard a
+    tick, waits for all of them, then routes entities that crossed a border and
+    commands sent across one (ShardContext.send) to their new owner for the next
+    tick. Throughput scales with cores as long as entities are spread out and
+    few of them cross borders each tick.
+
+    Limitation: only entities and simulation work are partitioned. Every worker
+    builds and keeps the full TerrainMap, with world coordinates, so memory per
+    process still grows with the whole world. Splitting the terrain itself
+    needs maps (and the terrain index, fog of war...) that address a window of
+    the world by an origin offset, which they do not support yet.
+
+    Usage:
+        with ShardedSimulation("main:LumberjackGame", 256, 256, ShardLayout(width=256, height=256, columns=4)) as sim:
+            for _ in range(1000):
+                sim.tick(1 / 30)
+    """
+    def __init__(self, game: str, width: int, height: int, layout: ShardLayout,
+                 seed: int = 0, halo: float = 2.0, capacity: int = 4096):
+        self.game = game
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.seed = seed
+        self.halo = halo
+        self.capacity = capacity
+        self.current_tick = 0
+        self.metrics: list[dict[str, float]] = []
+
+        self._buffers: list[SharedMemory] = []
+        self._connections: list[Connection] = []
+        self._processes: list[multiprocessing.Process] = []
+        self._immigrants: list[list[tuple[BaseEntity, dict]]] = [[] for _ in range(layout.count)]
+        self._commands: list[list[tuple[BaseCommand, Bindings]]] = [[] for _ in range(layout.count)]
+
+    def __enter__(self) -> "ShardedSimulation":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        size = _border_buffer_size(self.capacity)
+        self._buffers = [SharedMemory(create=True, size=size) for _ in range(self.layout.count)]
+        for buffer in self._buffers:
+            for slot in (0, 1):
+                _COUNT.pack_into(buffer.buf, _slot_offset(self.capacity, slot), 0.0)
+
+        for index in range(self.layout.count):
+            context = ShardContext(index, self.layout, self._buffers, self.halo, self.capacity)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_main,
+                args=(child, self.game, self.width, self.height, self.seed, context),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def enqueue_command(self, command: BaseCommand, at: tuple[float, float]):
+        """
+        Queues an external command for the shard owning `at`, where its handles
+        must be valid (as listed by collect()).
+        """
+        self._commands[self.layout.shard_at(*at)].append((command, {}))
+
+    def tick(self, dt: float):
+        for index, conn in enumerate(self._connections):
+            conn.send(("tick", dt, self._immigrants[index], self._commands[index]))
+            self._immigrants[index] = []
+            self._commands[index] = []
+
+        self.metrics = []
+        for conn in self._connections:
+            emigrants, outbox, metrics = conn.recv()
+            for packet in emigrants:
+                self._immigrants[self.layout.shard_at(*packet[0].position)].append(packet)
+            for command, at, bindings in outbox:
+                self._commands[self.layout.shard_at(*at)].append((command, bindings))
+            self.metrics.append(metrics)
+        self.current_tick += 1
+
+    def collect(self) -> list[list[BaseEntity]]:
+        """
+        Fetches copies of every shard's entities, indexed by shard. Entities in
+        transit between two shards are listed under their destination.
+        """
+        for conn in self._connections:
+            conn.send(("collect",))
+        return [
+            conn.recv() + [entity for entity, _ in self._immigrants[index]]
+            for index, conn in enumerate(self._connections)
+        ]
+
+    def close(self):
+        for conn in self._connections:
+            try:
+                conn.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._connections, self._processes, self._buffers = [], [], []
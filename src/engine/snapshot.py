@@ -0,0 +1,95 @@
+import threading
+from math import floor
+from typing import NamedTuple
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from engine.terrain import TerrainMap
+
+
+class EntityState(NamedTuple):
+    """The render-relevant slice of an entity, frozen at the end of a tick."""
+    id: int
+    asset: str
+    x: float
+    y: float
+
+
+class WorldSnapshot(BaseModel):
+    """
+    An immutable, compact copy of the world as it stood at the end of a tick.
+    Snapshots are produced by the simulation thread and consumed by the render
+    thread, so nothing inside them may be mutated after capture.
+    """
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    tick: int
+    # A copy-on-write fork of the terrain: later edits copy the live map's
+    # columns (or array), never this one's. Reused while no tile changes
+    terrain: TerrainMap
+    entities: tuple[EntityState, ...]
+    # Per-player visible masks when the game has a VisibilitySystem, else None (no fog)
+    visible: dict[int, np.ndarray] | None = None
+
+    @classmethod
+    def capture(cls, game, previous: "WorldSnapshot | None" = None) -> "WorldSnapshot":
+        """
+        Copies the current entity positions, and fog of war if any, out of the game.
+        Must be called from the thread that ticks the game, between ticks.
+        Pass the previous snapshot to share its terrain when no tile has changed since.
+        """
+        entities = tuple(
+            EntityState(entity.id, entity.asset, entity.position[0], entity.position[1])
+            for entity in game.entities.entities.values()
+        )
+        visible = game.visibility.visible_masks() if game.visibility is not None else None
+        if previous is not None and game.terrain.unchanged_since(previous.terrain):
+            terrain = previous.terrain
+        else:
+            terrain = game.terrain.fork()
+        # Skip validation: the data comes straight from already-validated models
+        return cls.model_construct(tick=game.current_tick, terrain=terrain, entities=entities, visible=visible)
+
+    def entity(self, entity_id: int) -> EntityState | None:
+        """The captured state of one entity, or None if it did not exist at capture."""
+        for state in self.entities:
+            if state.id == entity_id:
+                return state
+        return None
+
+    def is_visible(self, player: int, x: float, z: float) -> bool:
+        """Whether a player saw the tile at (x, z) at capture; always True without fog of war."""
+        if self.visible is None:
+            return True
+        mask = self.visible.get(player)
+        tx, tz = floor(x), floor(z)
+        return mask is not None and 0 <= tx < mask.shape[0] and 0 <= tz < mask.shape[1] and bool(mask[tx, tz])
+
+
+class SnapshotBuffer:
+    """
+    Hand-off point between the simulation and render threads.
+    The producer publishes whole snapshots; consumers always read the most recent
+    one (and the one before it, for interpolation). Because snapshots are immutable,
+    publishing is a reference swap and readers never block the simulation.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: WorldSnapshot | None = None
+        self._current: WorldSnapshot | None = None
+
+    def publish(self, snapshot: WorldSnapshot):
+        """Makes a snapshot visible to readers, retiring the oldest one."""
+        # The lock only guards the two-reference swap, never any world data
+        with self._lock:
+            self._previous, self._current = self._current, snapshot
+
+    def latest(self) -> WorldSnapshot | None:
+        """Returns the newest published snapshot, or None before the first tick."""
+        return self._current
+
+    def pair(self) -> tuple[WorldSnapshot | None, WorldSnapshot | None]:
+        """Returns the (previous, current) snapshots as a consistent pair."""
+        with self._lock:
+            return self._previous, self._current
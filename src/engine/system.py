@@ -19,9 +19,18 @@ class System:
 
 class MovementSystem(System):
     def update(self, game: "Game", dt: float):
+        lod = game.lod
         # Optimized: Only iterate over entities the map knows are active
         for entity, movable in game.entities.yield_entities_with_trait(MovableTrait):
             if not movable.destination:
+                # A halted unit owes nothing, or its next order would start with a leap
+                if lod is not None:
+                    lod.settle(entity)
+                continue
+
+            # Far from any player, units are stepped less often but further (see engine.lod)
+            step_dt = dt if lod is None else lod.step(entity, dt)
+            if not step_dt:
                 continue
 
             if not movable.path:
@@ -34,14 +43,16 @@ class MovementSystem(System):
                 continue
 
             # Here we will have to navigate to the next waypoint in the path
-            dest_pos = movable.path.pop()
+            # Reassign rather than pop() in place, so listeners and forks see the change
+            *remaining, dest_pos = movable.path
+            movable.path = remaining
 
             current_pos = entity.position
             dx = dest_pos[0] - current_pos[0]
             dy = dest_pos[1] - current_pos[1]
             distance = sqrt(dx**2 + dy**2)
 
-            move_distance = movable.speed * dt
+            move_distance = movable.speed * step_dt
 
             # Check if we arrive this tick (with epsilon buffer)
             if distance <= move_distance + EPSILON:
@@ -83,6 +94,10 @@ class InteractionSystem(System):
                 continue
 
             if not action_trait.target_id:
+                # Idle, or (when sharded) aiming at an entity in another shard,
+                # which engine.shard rebinds once the two meet again
+                if not action_trait.is_active or game.shard is not None:
+                    continue
                 raise ValueError("Active trait has no target")
 
             target = game.entities.get(action_trait.target_id)
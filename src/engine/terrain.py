@@ -1,7 +1,11 @@
+import copy
 from abc import ABC, abstractmethod
 from enum import Enum
 from pydantic import BaseModel
-from typing import Iterator, Tuple
+from typing import TYPE_CHECKING, Iterator, Tuple
+
+if TYPE_CHECKING:
+    from engine.terrain_index import TerrainIndex
 
 
 class TerrainType(str, Enum):
@@ -15,7 +19,14 @@ class Tile(BaseModel):
 
 class TerrainGenerationParams(BaseModel):
     """Configuration for the generator remains a BaseModel for easy serialization."""
-    pass
+    # Generators must draw all randomness from this, so a seed reproduces a map
+    seed: int = 0
+
+
+class TerrainListener:
+    """Interface for objects that follow tile edits made through TerrainMap.set_tile."""
+    def on_tile_changed(self, x: int, z: int, old: Tile, new: Tile):
+        pass
 
 
 class TerrainMap(ABC):
@@ -27,6 +38,16 @@ class TerrainMap(ABC):
         self.width = width
         self.height = height
         self.tiles = tiles
+        self._listeners: list[TerrainListener] = []
+        # Columns this map may write in place; the others are shared with a fork
+        self._owned_columns: set[int] = set(range(width))
+        self._features: "TerrainIndex | None" = None
+
+    def add_listener(self, listener: TerrainListener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: TerrainListener):
+        self._listeners.remove(listener)
 
     @classmethod
     @abstractmethod
@@ -39,6 +60,19 @@ class TerrainMap(ABC):
         """Defines the terrain generation logic."""
         pass
 
+    @property
+    def features(self) -> "TerrainIndex":
+        """
+        The feature index of this map (tiles by type, counts in rectangles,
+        nearest tile of a type), built in one pass on first use and kept
+        up to date through set_tile afterwards.
+        """
+        if self._features is None:
+            from engine.terrain_index import TerrainIndex
+
+            self._features = TerrainIndex(self)
+        return self._features
+
     def in_bounds(self, x: int, z: int) -> bool:
         """Check if coordinates are within the grid."""
         return 0 <= x < self.width and 0 <= z < self.height
@@ -49,6 +83,51 @@ class TerrainMap(ABC):
             return self.tiles[x][z]
         return None
 
+    def set_tile(self, x: int, z: int, tile: Tile):
+        """
+        Replaces a tile. All terrain edits must go through here so that
+        listeners (hashes, indexes...) stay in sync with the grid.
+        """
+        old = self.tiles[x][z]
+        if x not in self._owned_columns:
+            # Copy-on-write: the column is shared with a fork (or its parent)
+            self.tiles[x] = list(self.tiles[x])
+            self._owned_columns.add(x)
+        self.tiles[x][z] = tile
+        for listener in self._listeners:
+            listener.on_tile_changed(x, z, old, tile)
+
+    def fork(self) -> "TerrainMap":
+        """
+        Returns a copy-on-write copy of the map: columns are shared, and
+        whichever side edits one first through set_tile copies it.
+        Listeners are not carried over.
+        """
+        branch = copy.copy(self)
+        branch.tiles = list(self.tiles)
+        branch._listeners = []
+        branch._owned_columns = set()
+        branch._features = None
+        self._owned_columns = set()
+        return branch
+
+    def unchanged_since(self, branch: "TerrainMap") -> bool:
+        """Whether neither this map nor `branch`, a fork of it, has edited a tile since the fork."""
+        return all(column is shared for column, shared in zip(self.tiles, branch.tiles))
+
+    def restore(self, checkpoint: "TerrainMap"):
+        """Rewinds the map to a fork of it taken earlier, replaying only the edited tiles."""
+        for x, (column, saved) in enumerate(zip(self.tiles, checkpoint.tiles)):
+            if column is saved:
+                continue
+            for z, (tile, old) in enumerate(zip(column, saved)):
+                if tile is not old:
+                    self.set_tile(x, z, old)
+            # Share the checkpoint's column again rather than keep a private copy
+            self.tiles[x] = saved
+            self._owned_columns.discard(x)
+        checkpoint._owned_columns = set()
+
     def neighbors(self, x: int, z: int) -> Iterator[Tuple[int, int, Tile]]:
         """Yields adjacent coordinates and their tiles."""
         for dx, dz in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
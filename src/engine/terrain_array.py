@@ -0,0 +1,135 @@
+from typing import ClassVar, Iterator
+
+import numpy as np
+
+from engine.terrain import TerrainGenerationParams, TerrainMap, TerrainType, Tile
+
+
+class _TileColumn:
+    """Read view of one column of an ArrayTerrainMap, indexable like list[Tile]."""
+    __slots__ = ("_terrain", "_x")
+
+    def __init__(self, terrain: "ArrayTerrainMap", x: int):
+        self._terrain = terrain
+        self._x = x
+
+    def __getitem__(self, z: int) -> Tile:
+        return self._terrain._tiles[self._terrain.codes[self._x, z]]
+
+    def __len__(self) -> int:
+        return self._terrain.height
+
+    def __iter__(self) -> Iterator[Tile]:
+        tiles = self._terrain._tiles
+        return iter([tiles[code] for code in self._terrain.codes[self._x].tolist()])
+
+
+class _TileGrid:
+    """Read view standing in for TerrainMap.tiles; tiles[x][z] is a Tile."""
+    __slots__ = ("_terrain",)
+
+    def __init__(self, terrain: "ArrayTerrainMap"):
+        self._terrain = terrain
+
+    def __getitem__(self, x: int) -> _TileColumn:
+        if not 0 <= x < self._terrain.width:
+            raise IndexError(x)
+        return _TileColumn(self._terrain, x)
+
+    def __len__(self) -> int:
+        return self._terrain.width
+
+    def __iter__(self) -> Iterator[_TileColumn]:
+        return (_TileColumn(self._terrain, x) for x in range(self._terrain.width))
+
+
+class ArrayTerrainMap(TerrainMap):
+    """
+    Terrain stored as a (width, height) uint8 array of indices into a palette
+    of terrain types: one byte per tile instead of one Tile model, and the
+    direct output of engine.generators. `tiles` is a read-only view that hands
+    out one shared Tile per terrain type; edits go through set_tile as usual.
+
+    Subclasses name their TerrainType in `terrain_type` to get a generate()
+    driven by NoiseTerrainParams.
+    """
+    terrain_type: ClassVar[type[TerrainType]]
+
+    def __init__(self, width: int, height: int, codes: np.ndarray, palette: list[TerrainType]):
+        if codes.shape != (width, height):
+            raise ValueError(f"Expected codes of shape {(width, height)}, got {codes.shape}")
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        self.palette = list(palette)
+        # Flyweights: every tile of a type is the same Tile instance
+        self._tiles = [Tile(terrain=kind) for kind in self.palette]
+        self._palette_index = {kind: code for code, kind in enumerate(self.palette)}
+        # False while the array is shared with a fork (or the map it was forked from)
+        self._owns_codes = True
+        super().__init__(width, height, _TileGrid(self))
+
+    @classmethod
+    def generate(cls, width: int, height: int, params: TerrainGenerationParams) -> "ArrayTerrainMap":
+        from engine.generators import generate_codes
+
+        codes, palette = generate_codes(cls.terrain_type, width, height, params)
+        return cls(width, height, codes, palette)
+
+    @classmethod
+    def filled(cls, width: int, height: int, kind: TerrainType) -> "ArrayTerrainMap":
+        """A map of a single terrain type."""
+        return cls(width, height, np.zeros((width, height), dtype=np.uint8), [kind])
+
+    def tile_at(self, x: int, z: int) -> Tile | None:
+        if self.in_bounds(x, z):
+            return self._tiles[self.codes[x, z]]
+        return None
+
+    def code_of(self, kind: TerrainType) -> int:
+        """Palette index of a terrain type, adding it to the palette if needed."""
+        code = self._palette_index.get(kind)
+        if code is None:
+            if len(self.palette) == 256:
+                raise ValueError("An ArrayTerrainMap holds at most 256 terrain types")
+            code = self._palette_index[kind] = len(self.palette)
+            self.palette.append(kind)
+            self._tiles.append(Tile(terrain=kind))
+        return code
+
+    def set_tile(self, x: int, z: int, tile: Tile):
+        code = self.code_of(tile.terrain)
+        old = self._tiles[self.codes[x, z]]
+        if not self._owns_codes:
+            self.codes = self.codes.copy()
+            self._owns_codes = True
+        self.codes[x, z] = code
+        new = self._tiles[code]
+        for listener in self._listeners:
+            listener.on_tile_changed(x, z, old, new)
+
+    def neighbors(self, x: int, z: int) -> Iterator[tuple[int, int, Tile]]:
+        for dx, dz in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, nz = x + dx, z + dz
+            if self.in_bounds(nx, nz):
+                yield nx, nz, self._tiles[self.codes[nx, nz]]
+
+    def fork(self) -> "ArrayTerrainMap":
+        # Copy-on-write at array granularity: copying a uint8 array is cheap
+        branch = super().fork()
+        branch.palette = list(self.palette)
+        branch._tiles = list(self._tiles)
+        branch._palette_index = dict(self._palette_index)
+        branch.tiles = _TileGrid(branch)
+        branch._owns_codes = False
+        self._owns_codes = False
+        return branch
+
+    def unchanged_since(self, branch: "ArrayTerrainMap") -> bool:
+        return self.codes is branch.codes
+
+    def restore(self, checkpoint: "ArrayTerrainMap"):
+        if self.codes is not checkpoint.codes:
+            for x, z in np.argwhere(self.codes != checkpoint.codes).tolist():
+                self.set_tile(x, z, checkpoint._tiles[checkpoint.codes[x, z]])
+            self.codes = checkpoint.codes
+            self._owns_codes = False
+        checkpoint._owns_codes = False
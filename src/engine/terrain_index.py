@@ -0,0 +1,256 @@
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from engine.terrain import TerrainListener, TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+
+if TYPE_CHECKING:
+    from engine.terrain import TerrainMap
+
+_UNREACHED = -1
+
+
+class _DistanceField:
+    """Grid steps to, and index of, the nearest tile of one type, for every cell."""
+    def __init__(self, size: int):
+        self.distance = array("i", [_UNREACHED]) * size
+        self.nearest = array("i", [_UNREACHED]) * size
+        self.stale = True
+
+
+class TerrainIndex(TerrainListener):
+    """
+    Answers spatial questions about terrain without scanning the grid:
+
+    - tiles_of: the set of (x, z) of each terrain type
+    - count / tiles_in: tiles of a type inside a rectangle, from a summed-area
+      table per type, O(1) plus the edits made since it was built; past
+      MAX_PENDING_EDITS, the next query folds them in, rebuilding only the
+      columns from the lowest edited x onwards
+    - nearest / distance: the closest tile of a type, from a distance transform
+      per type (grid steps through the 4-neighbourhood, as TerrainMap.neighbors)
+
+    Everything is built in bulk from the grid and then kept current through
+    TerrainMap.set_tile. Distance fields are computed on first use and then
+    repaired in place: a tile gaining a type propagates outwards from it, a
+    tile losing one only recomputes the cells that were nearest to it.
+    """
+    # Pending edits a summed-area table absorbs before it is rebuilt
+    MAX_PENDING_EDITS = 64
+
+    def __init__(self, terrain: "TerrainMap"):
+        self.terrain = terrain
+        self.width = terrain.width
+        self.height = terrain.height
+        self._sets: dict[TerrainType, set[tuple[int, int]]] = {}
+        if isinstance(terrain, ArrayTerrainMap):
+            for code, kind in enumerate(terrain.palette):
+                xs, zs = np.nonzero(terrain.codes == code)
+                if len(xs):
+                    self._sets[kind] = set(zip(xs.tolist(), zs.tolist()))
+        else:
+            for x, column in enumerate(terrain.tiles):
+                for z, tile in enumerate(column):
+                    self._sets.setdefault(tile.terrain, set()).add((x, z))
+
+        self._tables: dict[TerrainType, array] = {kind: self._build_table(kind) for kind in self._sets}
+        # (x, z, +1/-1) edits per type not yet folded into its table
+        self._pending: dict[TerrainType, list[tuple[int, int, int]]] = {}
+        # Types with more than MAX_PENDING_EDITS edits: only the lowest edited
+        # column is kept, as that is all the rebuild on their next query needs
+        self._dirty_from: dict[TerrainType, int] = {}
+        self._fields: dict[TerrainType, _DistanceField] = {}
+        terrain.add_listener(self)
+
+    def detach(self):
+        self.terrain.remove_listener(self)
+
+    def tiles_of(self, kind: TerrainType) -> set[tuple[int, int]]:
+        """All coordinates currently holding `kind`. Do not modify the returned set."""
+        return self._sets.get(kind, set())
+
+    def count(self, kind: TerrainType, x0: int, z0: int, x1: int, z1: int) -> int:
+        """Number of `kind` tiles in the rectangle [x0, x1] x [z0, z1], bounds inclusive."""
+        x0, z0 = max(x0, 0), max(z0, 0)
+        x1, z1 = min(x1, self.width - 1), min(z1, self.height - 1)
+        if x0 > x1 or z0 > z1:
+            return 0
+
+        pending = self._pending.get(kind, ())
+        if kind in self._dirty_from:
+            self._fold(kind)
+            pending = ()
+
+        total = 0
+        table = self._tables.get(kind)
+        if table is not None:
+            stride = self.height + 1
+            total = (
+                table[(x1 + 1) * stride + z1 + 1] - table[x0 * stride + z1 + 1]
+                - table[(x1 + 1) * stride + z0] + table[x0 * stride + z0]
+            )
+        for x, z, delta in pending:
+            if x0 <= x <= x1 and z0 <= z <= z1:
+                total += delta
+        return total
+
+    def tiles_in(self, kind: TerrainType, x0: int, z0: int, x1: int, z1: int) -> list[tuple[int, int]]:
+        """Coordinates of the `kind` tiles in a rectangle, bounds inclusive, sorted."""
+        if not self.count(kind, x0, z0, x1, z1):
+            return []
+        tiles = self.tiles_of(kind)
+        if len(tiles) < (x1 - x0 + 1) * (z1 - z0 + 1):
+            return sorted((x, z) for x, z in tiles if x0 <= x <= x1 and z0 <= z <= z1)
+        return [
+            (x, z)
+            for x in range(max(x0, 0), min(x1, self.width - 1) + 1)
+            for z in range(max(z0, 0), min(z1, self.height - 1) + 1)
+            if (x, z) in tiles
+        ]
+
+    def nearest(self, kind: TerrainType, x: int, z: int) -> tuple[int, int] | None:
+        """The closest `kind` tile to (x, z) in grid steps, or None if there is none."""
+        if not self.terrain.in_bounds(x, z):
+            return None
+        source = self._field(kind).nearest[x * self.height + z]
+        return None if source == _UNREACHED else divmod(source, self.height)
+
+    def distance(self, kind: TerrainType, x: int, z: int) -> int | None:
+        """Grid steps from (x, z) to the closest `kind` tile, or None if there is none."""
+        if not self.terrain.in_bounds(x, z):
+            return None
+        steps = self._field(kind).distance[x * self.height + z]
+        return None if steps == _UNREACHED else steps
+
+    # --- TerrainListener ---
+
+    def on_tile_changed(self, x: int, z: int, old: Tile, new: Tile):
+        if old.terrain == new.terrain:
+            return
+        self._sets[old.terrain].discard((x, z))
+        self._sets.setdefault(new.terrain, set()).add((x, z))
+        self._record(old.terrain, x, z, -1)
+        self._record(new.terrain, x, z, +1)
+
+        # Losing a source lengthens the paths that led to it, and only those
+        lost = self._fields.get(old.terrain)
+        if lost is not None and not lost.stale:
+            self._withdraw(lost, x * self.height + z)
+        # Gaining one only shortens them: propagate from the new source
+        gained = self._fields.get(new.terrain)
+        if gained is not None and not gained.stale:
+            self._propagate(gained, [x * self.height + z])
+
+    # --- Internals ---
+
+    def _record(self, kind: TerrainType, x: int, z: int, delta: int):
+        # Edits stay O(1) on the tick thread; count() folds them in when needed
+        dirty_from = self._dirty_from.get(kind)
+        if dirty_from is not None:
+            self._dirty_from[kind] = min(dirty_from, x)
+            return
+        pending = self._pending.setdefault(kind, [])
+        pending.append((x, z, delta))
+        if len(pending) > self.MAX_PENDING_EDITS:
+            self._dirty_from[kind] = min(x for x, _, _ in pending)
+            del self._pending[kind]
+
+    def _fold(self, kind: TerrainType):
+        pending = self._pending.pop(kind, [])
+        start = min([x for x, _, _ in pending] + [self._dirty_from.pop(kind, self.width)])
+        table = self._tables.get(kind)
+        if table is None:
+            self._tables[kind] = self._build_table(kind)
+        else:
+            self._tables[kind] = self._build_table(kind, table, start=start)
+
+    def _build_table(self, kind: TerrainType, table: array | None = None, start: int = 0) -> array:
+        # table[(x + 1) * (height + 1) + z + 1] = tiles of `kind` in [0, x] x [0, z]
+        stride = self.height + 1
+        if isinstance(self.terrain, ArrayTerrainMap):
+            # A query must not grow the palette: an unseen type simply has no tiles
+            code = self.terrain._palette_index.get(kind)
+            if code is None:
+                return array("i", [0]) * ((self.width + 1) * stride)
+            padded = np.zeros((self.width + 1, stride), dtype=np.int32)
+            mask = self.terrain.codes == code
+            padded[1:, 1:] = mask.cumsum(axis=0, dtype=np.int32).cumsum(axis=1, dtype=np.int32)
+            return array("i", padded.tobytes())
+
+        # Rows before `start` are unaffected by the edits being folded in
+        if table is None:
+            table = array("i", [0]) * ((self.width + 1) * stride)
+        tiles = self._sets.get(kind, ())
+        for x in range(start, self.width):
+            row_sum = 0
+            above, here = x * stride, (x + 1) * stride
+            for z in range(self.height):
+                row_sum += (x, z) in tiles
+                table[here + z + 1] = table[above + z + 1] + row_sum
+        return table
+
+    def _field(self, kind: TerrainType) -> _DistanceField:
+        field = self._fields.get(kind)
+        if field is None:
+            field = self._fields[kind] = _DistanceField(self.width * self.height)
+        if field.stale:
+            field.distance[:] = array("i", [_UNREACHED]) * len(field.distance)
+            field.nearest[:] = array("i", [_UNREACHED]) * len(field.nearest)
+            field.stale = False
+            self._propagate(field, [x * self.height + z for x, z in sorted(self.tiles_of(kind))])
+        return field
+
+    def _propagate(self, field: _DistanceField, sources: list[int]):
+        # Works both for a full build and for adding sources to an existing field
+        distance, nearest = field.distance, field.nearest
+        queue = deque()
+        for cell in sources:
+            if distance[cell] != 0:
+                distance[cell] = 0
+                nearest[cell] = cell
+                queue.append(cell)
+        self._relax(field, queue)
+
+    def _withdraw(self, field: _DistanceField, source: int):
+        # The cells whose nearest tile was `source` form a connected region
+        # around it: each one took its distance from a neighbour with the same
+        # nearest tile. Clear that region, then refill it from its border
+        distance, nearest, height, width = field.distance, field.nearest, self.height, self.width
+        distance[source] = nearest[source] = _UNREACHED
+        region = [source]
+        for cell in region:
+            x, z = divmod(cell, height)
+            for nx, nz in ((x - 1, z), (x + 1, z), (x, z - 1), (x, z + 1)):
+                if 0 <= nx < width and 0 <= nz < height:
+                    neighbour = nx * height + nz
+                    if nearest[neighbour] == source:
+                        distance[neighbour] = nearest[neighbour] = _UNREACHED
+                        region.append(neighbour)
+
+        border = set()
+        for cell in region:
+            x, z = divmod(cell, height)
+            for nx, nz in ((x - 1, z), (x + 1, z), (x, z - 1), (x, z + 1)):
+                if 0 <= nx < width and 0 <= nz < height and distance[nx * height + nz] != _UNREACHED:
+                    border.add(nx * height + nz)
+        # Closest first, so that most cells are settled on their first visit
+        self._relax(field, deque(sorted(border, key=distance.__getitem__)))
+
+    def _relax(self, field: _DistanceField, queue: deque):
+        # BFS that only ever improves distances, so the queue may start from
+        # cells at different distances; a cell improved twice is simply revisited
+        distance, nearest, height, width = field.distance, field.nearest, self.height, self.width
+        while queue:
+            cell = queue.popleft()
+            steps = distance[cell] + 1
+            x, z = divmod(cell, height)
+            for nx, nz in ((x - 1, z), (x + 1, z), (x, z - 1), (x, z + 1)):
+                if 0 <= nx < width and 0 <= nz < height:
+                    neighbour = nx * height + nz
+                    if distance[neighbour] == _UNREACHED or distance[neighbour] > steps:
+                        distance[neighbour] = steps
+                        nearest[neighbour] = nearest[cell]
+                        queue.append(neighbour)
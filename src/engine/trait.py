@@ -1,6 +1,11 @@
+import copy
+import json
+import types
 from enum import Enum
-from typing import ClassVar
-from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Union, get_args, get_origin
+from pydantic import BaseModel, Field, PrivateAttr
+from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
 
 
 class InteractionVerb(Enum):
@@ -8,10 +13,197 @@ class InteractionVerb(Enum):
 
 
 class BaseTrait(BaseModel):
-    pass
+    # The entity carrying this trait, so that mutations can be reported upwards
+    _owner = PrivateAttr(default=None)
+
+    def __setattr__(self, name, value):
+        owner = self._owner if name[0] != "_" else None
+        if owner is not None:
+            owner._before_write()
+        super().__setattr__(name, value)
+        if owner is not None:
+            owner.touch(self)
+
+    def __getstate__(self):
+        # The owning entity re-links itself when it is unpickled
+        state = super().__getstate__()
+        state["__pydantic_private__"] = {**state["__pydantic_private__"], "_owner": None}
+        return state
+
+    def __deepcopy__(self, memo=None):
+        clone = type(self).__new__(type(self))
+        clone.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return clone
+
+    def _unshare(self):
+        # Field values of a shallow copy (see BaseEntity._fork_shell) become its own
+        object.__setattr__(self, "__dict__", copy.deepcopy(self.__dict__))
+
+    def __eq__(self, other):
+        # Compare state only: the owner back-reference is bookkeeping
+        if not isinstance(other, BaseTrait):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+
+_MISSING = object()
+
+
+def _is_classvar(annotation) -> bool:
+    if isinstance(annotation, str):
+        return annotation.startswith(("ClassVar", "typing.ClassVar"))
+    return annotation is ClassVar or get_origin(annotation) is ClassVar
+
+
+def _coerce(annotation, value):
+    """Best-effort conversion of decoded JSON back to the declared type (tuples, enums)."""
+    if value is None or isinstance(annotation, str):
+        return value
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        for option in get_args(annotation):
+            if option is not type(None):
+                return _coerce(option, value)
+    if origin is tuple and isinstance(value, (list, tuple)):
+        args = get_args(annotation)
+        if len(args) == 2 and args[1] is Ellipsis:
+            return tuple(_coerce(args[0], item) for item in value)
+        return tuple(_coerce(arg, item) for arg, item in zip(args, value))
+    if origin is list and isinstance(value, list):
+        (item_type,) = get_args(annotation) or (Any,)
+        return [_coerce(item_type, item) for item in value]
+    if isinstance(annotation, type) and issubclass(annotation, Enum) and not isinstance(value, annotation):
+        return annotation(value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+class _CompactTraitMeta(type):
+    """
+    Turns annotated class attributes into __slots__, the way pydantic turns them
+    into fields, so compact traits are declared exactly like BaseTrait ones.
+    """
+    def __new__(mcs, name, bases, namespace):
+        # field name -> (annotation, default, default factory)
+        fields: dict[str, tuple[Any, Any, Any]] = {}
+        for base in reversed(bases):
+            fields.update(getattr(base, "_fields", {}))
+        inherited = set(fields)
+
+        annotations = namespace.get("__annotations__", {})
+        for field, annotation in annotations.items():
+            if _is_classvar(annotation):
+                continue
+            default = namespace.pop(field, _MISSING)
+            if isinstance(default, FieldInfo):
+                factory = default.default_factory
+                default = default.default if default.default is not PydanticUndefined else _MISSING
+                fields[field] = (annotation, default, factory)
+            else:
+                fields[field] = (annotation, default, None)
+
+        own = tuple(field for field in annotations if field in fields and field not in inherited)
+        namespace["__slots__"] = tuple(namespace.get("__slots__", ())) + own
+        namespace["_fields"] = fields
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class CompactTrait(metaclass=_CompactTraitMeta):
+    """
+    A trait without pydantic: fields live in __slots__ and assignments are not
+    validated, which cuts the per-instance footprint several times over.
+    Meant for hot traits carried by many entities. Subclasses are written like
+    BaseTrait ones (annotated defaults, Field(default_factory=...), ClassVars),
+    and model_dump / model_dump_json / model_validate(_json) are provided so
+    generic code can treat both kinds alike.
+    """
+    __slots__ = ("_owner",)
+    _fields: ClassVar[dict[str, tuple[Any, Any, Any]]]
+
+    def __init__(self, **data):
+        set_field = object.__setattr__
+        set_field(self, "_owner", None)
+        for field, (_, default, factory) in self._fields.items():
+            value = data.pop(field, _MISSING)
+            if value is _MISSING:
+                if factory is not None:
+                    value = factory()
+                elif default is _MISSING:
+                    raise TypeError(f"{type(self).__name__} is missing required field '{field}'")
+                else:
+                    # Same as pydantic: never share a mutable default between instances
+                    value = default if isinstance(default, (int, float, str, bool, tuple, Enum, type(None))) else copy.copy(default)
+            set_field(self, field, value)
+        if data:
+            raise TypeError(f"{type(self).__name__} got unexpected fields: {', '.join(data)}")
+
+    def __setattr__(self, name, value):
+        owner = self._owner if name[0] != "_" else None
+        if owner is not None:
+            owner._before_write()
+        object.__setattr__(self, name, value)
+        if owner is not None:
+            owner.touch(self)
+
+    def __getstate__(self):
+        return self.model_dump()
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "_owner", None)
+        for field, value in state.items():
+            object.__setattr__(self, field, value)
+
+    def __copy__(self):
+        clone = object.__new__(type(self))
+        set_field = object.__setattr__
+        set_field(clone, "_owner", None)
+        for field in self._fields:
+            set_field(clone, field, getattr(self, field))
+        return clone
+
+    def _unshare(self):
+        for field in self._fields:
+            object.__setattr__(self, field, copy.deepcopy(getattr(self, field)))
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactTrait):
+            return NotImplemented
+        return type(self) is type(other) and all(
+            getattr(self, field) == getattr(other, field) for field in self._fields
+        )
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"{type(self).__name__}({values})"
+
+    def model_dump(self) -> dict[str, Any]:
+        return {field: getattr(self, field) for field in self._fields}
+
+    def model_dump_json(self) -> str:
+        return json.dumps(self.model_dump(), separators=(",", ":"), default=_json_default)
+
+    @classmethod
+    def model_validate(cls, data: dict[str, Any]):
+        return cls(**{
+            field: _coerce(cls._fields[field][0], value) if field in cls._fields else value
+            for field, value in data.items()
+        })
+
+    @classmethod
+    def model_validate_json(cls, data: str | bytes):
+        return cls.model_validate(json.loads(data))
+
+
+# Anything that can sit in BaseEntity.traits
+Trait = BaseTrait | CompactTrait
 
 
-class MovableTrait(BaseTrait):
+class MovableTrait(CompactTrait):
     speed: float = 1.0
     destination: tuple[float, float] | None = None
     path: list[tuple[float, float]] = Field(default_factory=list)
@@ -32,16 +224,18 @@ class MovableTrait(BaseTrait):
         self.path = []
 
 
-class ActorTrait(BaseTrait):
+class ActorTrait(CompactTrait):
     """Base for traits that INITIATE an action (Actor)."""
     verb: ClassVar[InteractionVerb]  # Must be defined by subclasses
+    # Fields holding entity handles, remapped when the entity migrates between shards
+    handle_fields: ClassVar[tuple[str, ...]] = ("target_id",)
     range: float = 1.0
     cooldown: float = 0.0
     # State tracking
-    target_id: str | None = None
+    target_id: int | None = None
     is_active: bool = False
 
-    def activate(self, target_id: str):
+    def activate(self, target_id: int):
         self.target_id = target_id
         self.is_active = True
 
@@ -50,6 +244,6 @@ class ActorTrait(BaseTrait):
         self.is_active = False
 
 
-class ReceiverTrait(BaseTrait):
+class ReceiverTrait(CompactTrait):
     """Base for traits that RECEIVE an action (Target)."""
     verb: ClassVar[InteractionVerb]  # Must be defined by subclasses
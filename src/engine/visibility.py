@@ -0,0 +1,264 @@
+from math import floor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from engine.entity import BaseEntity, EntityListener
+from engine.system import MovementSystem, System
+from engine.terrain import TerrainListener, TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+from engine.trait import CompactTrait, Trait
+
+if TYPE_CHECKING:
+    from engine.game import Game
+
+# (xx, xy, yx, yy) transforms mapping the first octant onto each of the eight
+_OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+class SightTrait(CompactTrait):
+    """Lets an entity reveal the tiles within `radius` to its player."""
+    radius: int = 6
+    player: int = 0
+
+
+class VisibilitySystem(System, EntityListener, TerrainListener):
+    """
+    Per-player fog of war over the terrain grid.
+
+    Each player has a grid counting how many of its units see every tile, and a
+    grid of tiles ever seen. A unit's field of view is cast once (recursive
+    shadowcasting against `blocking` terrain) and only re-cast when it moves to
+    another tile, changes sight, or the terrain around it changes opacity.
+    Fields of view are cached per origin tile, so units sharing a tile, or
+    coming back to one, cost a lookup. Changes are collected as they happen and
+    applied once per tick, in one batch per player.
+
+    The system runs right after the MovementSystem, so fog matches the tick's
+    moves. Positions changed later in the tick (event handlers, spawns) are
+    picked up on the next tick.
+
+    Usage:
+        visibility = VisibilitySystem(blocking={MyTerrain.ROCK})
+        visibility.attach(game)
+        visibility.is_visible(player, x, z)   # simulation thread only
+        snapshot.is_visible(player, x, z)     # any thread
+    """
+    MAX_CACHED_VIEWS = 4096
+
+    def __init__(self, blocking: set[TerrainType] = frozenset()):
+        self.blocking = set(blocking)
+        self.game: "Game | None" = None
+        self._counts: dict[int, np.ndarray] = {}
+        self._explored: dict[int, np.ndarray] = {}
+        # entity id -> (player, origin tile, radius, flat indices it sees)
+        self._sources: dict[int, tuple[int, tuple[int, int], int, np.ndarray]] = {}
+        self._dirty: set[int] = set()
+        self._views: dict[tuple[int, int, int], np.ndarray] = {}
+
+    def attach(self, game: "Game"):
+        """
+        Starts tracking a game's units and terrain, and sees the world as it is now.
+        Installs the system after the last MovementSystem (or last of all) and
+        exposes it as game.visibility.
+        """
+        self.game = game
+        terrain = game.terrain
+        if isinstance(terrain, ArrayTerrainMap):
+            blocking_codes = [code for kind, code in terrain._palette_index.items() if kind in self.blocking]
+            self._opaque = np.isin(terrain.codes, blocking_codes)
+        else:
+            self._opaque = np.zeros((terrain.width, terrain.height), dtype=bool)
+            for x in range(terrain.width):
+                for z, tile in enumerate(terrain.tiles[x]):
+                    self._opaque[x, z] = tile.terrain in self.blocking
+
+        movers = [i for i, system in enumerate(game.systems) if isinstance(system, MovementSystem)]
+        game.systems.insert(movers[-1] + 1 if movers else len(game.systems), self)
+        game.visibility = self
+        game.entities.add_listener(self)
+        terrain.add_listener(self)
+        self._dirty.update(entity.id for entity in game.entities.query(SightTrait))
+        self.refresh()
+
+    def detach(self):
+        self.game.systems.remove(self)
+        self.game.visibility = None
+        self.game.entities.remove_listener(self)
+        self.game.terrain.remove_listener(self)
+
+    # --- Queries ---
+
+    def is_visible(self, player: int, x: float, z: float) -> bool:
+        counts = self._counts.get(player)
+        tile = self._tile_of((x, z))
+        return counts is not None and tile is not None and bool(counts[tile])
+
+    def is_explored(self, player: int, x: float, z: float) -> bool:
+        explored = self._explored.get(player)
+        tile = self._tile_of((x, z))
+        return explored is not None and tile is not None and bool(explored[tile])
+
+    def visible_mask(self, player: int) -> np.ndarray:
+        """(width, height) boolean grid of the tiles a player currently sees."""
+        counts = self._counts.get(player)
+        return counts > 0 if counts is not None else np.zeros(self._opaque.shape, dtype=bool)
+
+    def visible_masks(self) -> dict[int, np.ndarray]:
+        """A fresh visible mask for every player with units, as captured by snapshots."""
+        return {player: counts > 0 for player, counts in self._counts.items()}
+
+    def explored_mask(self, player: int) -> np.ndarray:
+        explored = self._explored.get(player)
+        return explored.copy() if explored is not None else np.zeros(self._opaque.shape, dtype=bool)
+
+    # --- System ---
+
+    def update(self, game: "Game", dt: float):
+        # Forks share their parent's systems; visibility follows the attached game only
+        if game is self.game:
+            self.refresh()
+
+    def refresh(self):
+        """Applies the changes collected since the last refresh."""
+        if not self._dirty:
+            return
+        added: dict[int, list[np.ndarray]] = {}
+        removed: dict[int, list[np.ndarray]] = {}
+
+        entities = self.game.entities
+        for entity_id in self._dirty:
+            old = self._sources.pop(entity_id, None)
+            if old is not None:
+                removed.setdefault(old[0], []).append(old[3])
+
+            entity = entities.get(entity_id)
+            sight = entity.get_trait(SightTrait) if entity is not None else None
+            tile = self._tile_of(entity.position) if sight is not None else None
+            if tile is None:
+                continue
+            cells = self._view(tile, sight.radius)
+            self._sources[entity_id] = (sight.player, tile, sight.radius, cells)
+            added.setdefault(sight.player, []).append(cells)
+        self._dirty.clear()
+
+        for player, chunks in removed.items():
+            np.subtract.at(self._counts[player].reshape(-1), np.concatenate(chunks), 1)
+        for player, chunks in added.items():
+            cells = np.concatenate(chunks)
+            np.add.at(self._grid(self._counts, player, np.uint16).reshape(-1), cells, 1)
+            self._grid(self._explored, player, bool).reshape(-1)[cells] = True
+
+    # --- EntityListener ---
+
+    def on_entity_added(self, entity: BaseEntity):
+        if entity.get_trait(SightTrait) is not None:
+            self._dirty.add(entity.id)
+
+    def on_entity_removed(self, entity: BaseEntity):
+        if entity.id in self._sources:
+            self._dirty.add(entity.id)
+
+    def on_entity_changed(self, entity: BaseEntity, trait: Trait | None):
+        source = self._sources.get(entity.id)
+        if trait is None:
+            # Moving within a tile changes nothing
+            if source is not None and self._tile_of(entity.position) != source[1]:
+                self._dirty.add(entity.id)
+            elif source is None and entity.get_trait(SightTrait) is not None:
+                self._dirty.add(entity.id)
+        elif isinstance(trait, SightTrait):
+            self._dirty.add(entity.id)
+
+    def on_entity_traits_replaced(self, entity: BaseEntity):
+        if entity.id in self._sources or entity.get_trait(SightTrait) is not None:
+            self._dirty.add(entity.id)
+
+    # --- TerrainListener ---
+
+    def on_tile_changed(self, x: int, z: int, old: Tile, new: Tile):
+        opaque = new.terrain in self.blocking
+        if opaque == self._opaque[x, z]:
+            return
+        self._opaque[x, z] = opaque
+        self._views = {
+            key: cells for key, cells in self._views.items()
+            if max(abs(key[0] - x), abs(key[1] - z)) > key[2]
+        }
+        for entity_id, (_, (ox, oz), radius, _) in self._sources.items():
+            if max(abs(ox - x), abs(oz - z)) <= radius:
+                self._dirty.add(entity_id)
+
+    # --- Internals ---
+
+    def _grid(self, grids: dict[int, np.ndarray], player: int, dtype) -> np.ndarray:
+        grid = grids.get(player)
+        if grid is None:
+            grid = grids[player] = np.zeros(self._opaque.shape, dtype=dtype)
+        return grid
+
+    def _tile_of(self, position: tuple[float, float]) -> tuple[int, int] | None:
+        x, z = floor(position[0]), floor(position[1])
+        width, height = self._opaque.shape
+        return (x, z) if 0 <= x < width and 0 <= z < height else None
+
+    def _view(self, origin: tuple[int, int], radius: int) -> np.ndarray:
+        key = (*origin, radius)
+        cells = self._views.get(key)
+        if cells is None:
+            if len(self._views) >= self.MAX_CACHED_VIEWS:
+                self._views.clear()
+            cells = self._views[key] = self._cast(origin, radius)
+        return cells
+
+    def _cast(self, origin: tuple[int, int], radius: int) -> np.ndarray:
+        height = self._opaque.shape[1]
+        ox, oz = origin
+        seen = {ox * height + oz}
+        for transform in _OCTANTS:
+            self._cast_octant(ox, oz, radius, 1, 1.0, 0.0, transform, seen)
+        return np.fromiter(sorted(seen), dtype=np.int64, count=len(seen))
+
+    def _cast_octant(self, ox: int, oz: int, radius: int, row: int, start: float, end: float,
+                     transform: tuple[int, int, int, int], seen: set[int]):
+        # Recursive shadowcasting: scan rows outwards between two slopes,
+        # recursing past every run of blocking tiles
+        if start < end:
+            return
+        xx, xy, yx, yy = transform
+        opaque = self._opaque
+        width, height = opaque.shape
+        radius_squared = radius * radius
+        next_start = start
+
+        for distance in range(row, radius + 1):
+            dz = -distance
+            blocked = False
+            for dx in range(-distance, 1):
+                left, right = (dx - 0.5) / (dz + 0.5), (dx + 0.5) / (dz - 0.5)
+                if start < right:
+                    continue
+                if end > left:
+                    break
+
+                x, z = ox + dx * xx + dz * xy, oz + dx * yx + dz * yy
+                inside = 0 <= x < width and 0 <= z < height
+                if inside and dx * dx + dz * dz <= radius_squared:
+                    seen.add(x * height + z)
+
+                wall = not inside or opaque[x, z]
+                if blocked:
+                    if wall:
+                        next_start = right
+                    else:
+                        blocked = False
+                        start = next_start
+                elif wall and distance < radius:
+                    blocked = True
+                    self._cast_octant(ox, oz, radius, distance + 1, start, left, transform, seen)
+                    next_start = right
+            if blocked:
+                break
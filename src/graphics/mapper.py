@@ -1,26 +1,81 @@
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel
+from engine.snapshot import WorldSnapshot
 from graphics.asset import AssetModel
 
+if TYPE_CHECKING:
+    from engine.visibility import VisibilitySystem
+
 
 class VisualProxy(BaseModel):
-    entity_id: str
+    # Entity handle, or "tile_x_y" for terrain
+    entity_id: int | str
     asset: AssetModel
     position: tuple[float, float, float]
     is_visible: bool = True
 
 
 class SceneMapper:
-    def __init__(self, asset_library: dict[str, AssetModel]):
+    def __init__(self, asset_library: dict[str, AssetModel], visibility: "VisibilitySystem | None" = None,
+                 player: int = 0):
         self.library = asset_library
+        # Optional fog of war: entities on tiles `player` cannot see are left out.
+        # map_snapshot reads the fog captured in the snapshot, never the live system
+        self.visibility = visibility
+        self.player = player
 
     def map_to_proxies(self, game) -> list[VisualProxy]:
-        proxies = []
+        proxies = self._map_terrain(game.terrain)
+
+        # 2. Map Entities (Dynamic)
+        for eid, entity in game.entities.entities.items():
+            if not self._is_seen(*entity.position):
+                continue
+            # Ensure your BaseEntity has an asset_id attribute!
+            asset = self.library.get(entity.asset)
+            if asset:
+                # Entity pos is (x, y), we map to Ursina (x, layer, z)
+                pos = (entity.position[0], asset.layer * 0.1, entity.position[1])
+                proxies.append(VisualProxy(
+                    entity_id=eid,
+                    asset=asset,
+                    position=pos
+                ))
         
+        return proxies
+
+    def map_snapshot(self, snapshot: WorldSnapshot) -> list[VisualProxy]:
+        """
+        Same as map_to_proxies, but reads from an immutable WorldSnapshot so it
+        can run on the render thread while the simulation keeps ticking.
+        """
+        proxies = self._map_terrain(snapshot.terrain)
+
+        for state in snapshot.entities:
+            if self.visibility is not None and not snapshot.is_visible(self.player, state.x, state.y):
+                continue
+            asset = self.library.get(state.asset)
+            if asset:
+                proxies.append(VisualProxy(
+                    entity_id=state.id,
+                    asset=asset,
+                    position=(state.x, asset.layer * 0.1, state.y)
+                ))
+
+        return proxies
+
+    def _is_seen(self, x: float, y: float) -> bool:
+        return self.visibility is None or self.visibility.is_visible(self.player, x, y)
+
+    def _map_terrain(self, terrain) -> list[VisualProxy]:
+        proxies = []
+
         # 1. Map Terrain (Static)
         # Fix: Iterate through the 2D list using indices
-        for x in range(game.terrain.width):
-            for y in range(game.terrain.height):
-                tile = game.terrain.tiles[x][y]
+        for x in range(terrain.width):
+            for y in range(terrain.height):
+                tile = terrain.tiles[x][y]
                 
                 # Use the terrain enum value as the lookup key for the asset library
                 asset = self.library.get(tile.terrain.value) 
@@ -33,17 +88,4 @@ class SceneMapper:
                         position=pos
                     ))
 
-        # 2. Map Entities (Dynamic)
-        for eid, entity in game.entities.entities.items():
-            # Ensure your BaseEntity has an asset_id attribute!
-            asset = self.library.get(entity.asset)
-            if asset:
-                # Entity pos is (x, y), we map to Ursina (x, layer, z)
-                pos = (entity.position[0], asset.layer * 0.1, entity.position[1])
-                proxies.append(VisualProxy(
-                    entity_id=eid,
-                    asset=asset,
-                    position=pos
-                ))
-        
         return proxies
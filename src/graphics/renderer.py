@@ -1,9 +1,12 @@
-from ursina import Entity, destroy
-
 from graphics.mapper import VisualProxy
 
 class UrsinaRenderer:
     def __init__(self):
+        # Imported here so that importing graphics never drags in Panda3D by itself
+        from ursina import Entity, destroy
+        self._entity_cls = Entity
+        self._destroy = destroy
+
         self.hardware_entities = {} # Map[id, ursina.Entity]
 
     def render(self, proxies: list[VisualProxy]):
@@ -14,7 +17,7 @@ class UrsinaRenderer:
             
             # Create hardware entity if it doesn't exist
             if proxy.entity_id not in self.hardware_entities:
-                self.hardware_entities[proxy.entity_id] = Entity(
+                self.hardware_entities[proxy.entity_id] = self._entity_cls(
                     model=proxy.asset.model,
                     texture=proxy.asset.texture,
                     scale=proxy.asset.scale,
@@ -30,5 +33,5 @@ class UrsinaRenderer:
         # Cleanup: Remove hardware entities that are no longer in the proxy list
         to_remove = set(self.hardware_entities.keys()) - active_ids
         for rid in to_remove:
-            destroy(self.hardware_entities[rid])
+            self._destroy(self.hardware_entities[rid])
             del self.hardware_entities[rid]
@@ -1,46 +1,55 @@
 
+import argparse
 import math
-from ursina import Ursina, EditorCamera, time, held_keys
+import sys
+import time
+from typing import ClassVar
 
 # Engine Imports
 from engine.game import Game
 from engine.entity import BaseEntity, EntityMap
-from engine.system import System, MovementSystem, InteractionSystem
-from engine.terrain import TerrainGenerationParams, TerrainType, Tile, TerrainMap
+from engine.system import System, MovementSystem
+from engine.terrain import TerrainGenerationParams, TerrainType
+from engine.terrain_array import ArrayTerrainMap
 from engine.trait import MovableTrait
 from engine.cqrs import BaseCommand, BaseEvent
+from engine.ingest import CommandServer
+from engine.journal import EventJournal
+from engine.loop import SimulationLoop
+from engine.replay import CommandRecorder, replay
 
-# Graphics Imports
-from graphics.asset import AssetModel
-from graphics.renderer import UrsinaRenderer
-from graphics.mapper import SceneMapper, VisualProxy
+# NOTE: graphics (and with it ursina/Panda3D) is only imported by run_window,
+# so headless runs, servers and tests never pay for it.
 
 # --- 1. CONCRETE ENGINE IMPLEMENTATIONS ---
 
 class MyTerrainType(TerrainType):
     GRASS = "grass"
 
-class BasicTerrain(TerrainMap):
+class BasicTerrain(ArrayTerrainMap):
+    terrain_type = MyTerrainType
+
     @classmethod
     def generate(cls, width: int, height: int, params: TerrainGenerationParams) -> "BasicTerrain":
-        tiles = [[Tile(terrain=MyTerrainType.GRASS) for _ in range(height)] for _ in range(width)]
-        return cls(width=width, height=height, tiles=tiles)
+        return cls.filled(width, height, MyTerrainType.GRASS)
 
 # --- 2. CQRS: COMMANDS, EVENTS, AND HANDLERS ---
 
 class MoveCommand(BaseCommand):
-    entity_id: str
+    handle_fields: ClassVar[tuple[str, ...]] = ("entity_id",)
+    entity_id: int
     target_pos: tuple[float, float]
 
 class EntityCollisionEvent(BaseEvent):
-    source_id: str
-    target_id: str
+    source_id: int
+    target_id: int
 
 
 def handle_move_command(game: Game, command: MoveCommand):
     entity = game.entities.get(command.entity_id)
-    if entity:
-        entity.move_to(command.target_pos)
+    movable = entity.get_trait(MovableTrait) if entity else None
+    if movable:
+        movable.move_to(*command.target_pos)
 
 
 def handle_collision_event(game: Game, event: EntityCollisionEvent):
@@ -80,8 +89,10 @@ def handle_collision_event(game: Game, event: EntityCollisionEvent):
     )
 
     # 4. Stop their current movement (Reset targets)
-    source.move_to(source.position)
-    target.move_to(target.position)
+    for entity in (source, target):
+        movable = entity.get_trait(MovableTrait)
+        if movable:
+            movable.stop_movement()
 
 # --- 3. THE COLLISION SYSTEM ---
 
@@ -108,12 +119,12 @@ class CollisionSystem(System):
 
 class LumberjackGame(Game):
     @classmethod
-    def setup(cls, width: int, height: int) -> "LumberjackGame":
-        params = TerrainGenerationParams()
+    def setup(cls, width: int, height: int, seed: int = 0) -> "LumberjackGame":
+        params = TerrainGenerationParams(seed=seed)
         terrain = BasicTerrain.generate(width, height, params)
         entities = EntityMap()
         
-        instance = cls(terrain_map=terrain, entity_map=entities)
+        instance = cls(terrain_map=terrain, entity_map=entities, seed=seed)
         
         # Register Handlers
         instance.command_processor.register_handler(MoveCommand, handle_move_command)
@@ -122,13 +133,61 @@ class LumberjackGame(Game):
         # Add Systems
         instance.systems.append(MovementSystem())
         instance.systems.append(CollisionSystem()) # Logic for proximity
-        instance.systems.append(InteractionSystem())
+
+        # Add Entities
+        jack = BaseEntity(position=(2.0, 2.0), asset="lumberjack", traits=[MovableTrait(speed=5.0)])
+        entities.add(jack)
+        instance.jack_id = jack.id
+
+        # Scatter some trees
+        entities.add(BaseEntity(position=(width // 2, height // 2), asset="tree"))
+        entities.add(BaseEntity(position=(width - 2, 2), asset="tree"))
         
         return instance
 
 # --- 5. EXECUTION ---
 
-if __name__ == "__main__":
+def run_headless(game: Game, ticks: int, dt: float):
+    """Ticks the game as fast as possible and reports throughput."""
+    start = time.perf_counter()
+    for _ in range(ticks):
+        game.tick(dt)
+    elapsed = time.perf_counter() - start
+
+    rate = ticks / elapsed if elapsed > 0 else float("inf")
+    print(f"ticks={ticks} entities={len(game.entities.entities)} "
+          f"elapsed={elapsed:.3f}s rate={rate:.0f} ticks/s")
+
+
+# Budget for one moving unit (entity + MovableTrait), checked by --measure-memory
+MEMORY_PER_ENTITY_TARGET = 1200
+
+
+def measure_entity_memory(count: int):
+    """Reports the traced allocation cost of `count` moving units."""
+    import tracemalloc
+
+    tracemalloc.start()
+    entities = EntityMap()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(count):
+        entities.add(BaseEntity(position=(float(i), 0.0), asset="lumberjack", traits=[MovableTrait(speed=5.0)]))
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_entity = (used - baseline) / count
+    verdict = "ok" if per_entity <= MEMORY_PER_ENTITY_TARGET else "OVER TARGET"
+    print(f"entities={count} memory/entity={per_entity:.0f}B target={MEMORY_PER_ENTITY_TARGET}B {verdict}")
+
+
+def run_window(game: LumberjackGame, tick_rate: float):
+    # Deferred so that only windowed runs load Panda3D
+    from ursina import Ursina, EditorCamera, held_keys
+
+    from graphics.asset import AssetModel
+    from graphics.mapper import SceneMapper
+    from graphics.renderer import UrsinaRenderer
+
     app = Ursina()
 
     # Asset Library: Use distinct scales/colors to see the difference
@@ -138,34 +197,101 @@ if __name__ == "__main__":
         "tree": AssetModel(asset_id="tree", model="cube", texture="white_cube", scale=(0.8, 3, 0.8), layer=1)
     }
 
-    game_instance = LumberjackGame.setup(width=10, height=10)
-
-    # Add Entities
-    jack = BaseEntity(position=(2.0, 2.0), asset="lumberjack", traits=[MovableTrait(speed=5.0)])
-    game_instance.entity_map.add(jack)
-    
-    # Scatter some trees
-    game_instance.entity_map.add(BaseEntity(position=(5, 5), asset="tree"))
-    game_instance.entity_map.add(BaseEntity(position=(8, 2), asset="tree"))
-
     mapper = SceneMapper(asset_library)
     renderer = UrsinaRenderer()
 
     EditorCamera()
 
+    # The simulation ticks on its own thread; the window only reads snapshots
+    simulation = SimulationLoop(game, tick_rate=tick_rate)
+
     def update():
-        # Input -> Commands
+        snapshot = simulation.buffer.latest()
+        if snapshot is None:
+            return
+
+        # Input -> Commands, aimed from where the last snapshot saw the player
         dx = held_keys['right arrow'] - held_keys['left arrow']
         dy = held_keys['up arrow'] - held_keys['down arrow']
-        if dx != 0 or dy != 0:
-            target = (jack.position[0] + dx, jack.position[1] + dy)
-            game_instance.enqueue_command(MoveCommand(entity_id=jack.id, target_pos=target))
+        jack = snapshot.entity(game.jack_id)
+        if (dx != 0 or dy != 0) and jack is not None:
+            target = (jack.x + dx, jack.y + dy)
+            simulation.enqueue_command(MoveCommand(entity_id=jack.id, target_pos=target))
 
-        # Simulation
-        game_instance.tick(time.dt)
-        
         # Bridge & Render
-        proxies = mapper.map_to_proxies(game_instance)
-        renderer.render(proxies)
+        renderer.render(mapper.map_snapshot(snapshot))
+
+    # Ursina looks the callback up in __main__
+    sys.modules["__main__"].update = update
 
+    simulation.start()
     app.run()
+
+
+def parse_world(value: str) -> tuple[int, int]:
+    """Parses a WIDTHxHEIGHT world size such as '64x64'."""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    return width, height
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Lumberjack demo")
+    parser.add_argument("--headless", action="store_true", help="simulate without opening a window")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks to run in headless mode")
+    parser.add_argument("--world", type=parse_world, default=(10, 10), help="world size as WIDTHxHEIGHT")
+    parser.add_argument("--tick-rate", type=float, default=30.0, help="simulation ticks per second")
+    parser.add_argument("--seed", type=int, default=0, help="world seed")
+    parser.add_argument("--record", metavar="PATH", help="record the session's commands to a replay log")
+    parser.add_argument("--replay", metavar="PATH", help="rebuild a recorded session headlessly and exit")
+    parser.add_argument("--journal", metavar="PATH", help="append every processed event to an event journal")
+    parser.add_argument("--listen", metavar="SOCKET", help="accept JSON commands on a Unix socket (bots, admin console)")
+    parser.add_argument("--measure-memory", type=int, metavar="N", help="report memory per entity for N units and exit")
+    args = parser.parse_args(argv)
+
+    if args.measure_memory:
+        measure_entity_memory(args.measure_memory)
+        return
+
+    if args.replay:
+        start = time.perf_counter()
+        game = replay(args.replay, LumberjackGame)
+        print(f"replayed ticks={game.current_tick} in {time.perf_counter() - start:.3f}s")
+        return
+
+    width, height = args.world
+    game = LumberjackGame.setup(width=width, height=height, seed=args.seed)
+
+    recorder = None
+    if args.record:
+        recorder = CommandRecorder(args.record)
+        recorder.attach(game)
+
+    journal = None
+    if args.journal:
+        journal = EventJournal(args.journal)
+        journal.attach(game)
+
+    server = None
+    if args.listen:
+        server = CommandServer(game.inbox, game.command_processor.command_types(), args.listen)
+        server.serve_in_background()
+
+    try:
+        if args.headless:
+            run_headless(game, args.ticks, 1.0 / args.tick_rate)
+        else:
+            run_window(game, args.tick_rate)
+    finally:
+        if server is not None:
+            server.stop(timeout=2)
+        if journal is not None:
+            journal.close()
+        if recorder is not None:
+            recorder.close()
+
+
+if __name__ == "__main__":
+    main()
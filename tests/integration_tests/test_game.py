@@ -16,12 +16,12 @@ class MyVerbs(InteractionVerb):
 
 
 class ChopCommand(BaseCommand):
-    actor_id: str
-    target_id: str
+    actor_id: int
+    target_id: int
 
 
 class ChopReceivedEvent(BaseEvent):
-    target_id: str
+    target_id: int
     amount: int
 
 class ChopperTrait(ActorTrait):
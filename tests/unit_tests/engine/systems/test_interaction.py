@@ -35,12 +35,11 @@ def test_interaction_handshake_in_range():
     
     # Standardize Verb: Use Verb.CHOP consistently
     actor = BaseEntity(position=(0, 0), traits=[CanChop(range=2.0)], asset="lumberjack")
-    actor.get_trait(CanChop).activate("tree_1")
-
-    target = BaseEntity(id="tree_1", position=(1, 0), traits=[Choppable()], asset="tree")
+    target = BaseEntity(alias="tree_1", position=(1, 0), traits=[Choppable()], asset="tree")
     
     emap.add(actor)
     emap.add(target)
+    actor.get_trait(CanChop).activate(emap.resolve("tree_1").id)
   
     system.update(game, 0.1)
     assert len(game.event_queue) == 2
@@ -0,0 +1,33 @@
+import json
+
+from engine.batch import BatchJob, run_batch, run_job
+
+
+def _job(seed, **overrides):
+    return BatchJob(**{"game": "main:LumberjackGame", "width": 12, "height": 12, "seed": seed, "ticks": 20, **overrides})
+
+
+def test_run_job_reports_hash_and_metrics():
+    result = run_job(_job(3))
+
+    assert result.error is None
+    assert result.metrics["ticks"] == 20
+    assert result.state_hash == run_job(_job(3)).state_hash
+
+
+def test_run_job_captures_errors():
+    result = run_job(_job(0, game="main:DoesNotExist"))
+    assert result.state_hash is None
+    assert "AttributeError" in result.error
+
+
+def test_batch_streams_results_to_jsonl(tmp_path):
+    out = tmp_path / "results.jsonl"
+    jobs = [_job(seed) for seed in range(4)]
+
+    results = list(run_batch(jobs, str(out), workers=2))
+
+    assert sorted(r.job.seed for r in results) == [0, 1, 2, 3]
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(lines) == 4
+    assert all(line["error"] is None for line in lines)
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
-from engine.entity import BaseEntity, EntityMap
+from engine.entity import BaseEntity, EntityMap, handle_index
 from engine.trait import ActorTrait, BaseTrait, InteractionVerb, MovableTrait
 
 # --- Mock Implementation for Testing ---
@@ -16,4 +16,110 @@ class MockChopTrait(ActorTrait):
 # --- Tests ---
 
 def test_implement_me():
-    assert False, "implememt those tests"
\ No newline at end of file
+    assert False, "implememt those tests"
+
+def test_add_assigns_nonzero_handles():
+    emap = EntityMap()
+    first = BaseEntity(position=(0, 0), asset="tree")
+    second = BaseEntity(position=(1, 0), asset="tree")
+    emap.add(first)
+    emap.add(second)
+
+    assert isinstance(first.id, int) and first.id
+    assert first.id != second.id
+    assert emap.get(second.id) is second
+
+
+def test_recycled_slot_makes_old_handle_stale():
+    """A removed entity's slot is reused, but its old handle must not resolve."""
+    emap = EntityMap()
+    old = BaseEntity(position=(0, 0), asset="tree")
+    emap.add(old)
+    stale = old.id
+    emap.remove(stale)
+
+    new = BaseEntity(position=(0, 0), asset="tree")
+    emap.add(new)
+
+    assert handle_index(new.id) == handle_index(stale)
+    assert emap.get(stale) is None
+    assert emap.get(new.id) is new
+    # Removing through a stale handle must not touch the new occupant
+    emap.remove(stale)
+    assert emap.get(new.id) is new
+
+
+def test_alias_lookup():
+    emap = EntityMap()
+    tree = BaseEntity(alias="big_oak", position=(0, 0), asset="tree")
+    emap.add(tree)
+
+    assert emap.resolve("big_oak") is tree
+    emap.remove(tree.id)
+    assert emap.resolve("big_oak") is None
+
+
+def test_duplicate_alias_is_rejected_and_survivor_keeps_it():
+    emap = EntityMap()
+    oak = BaseEntity(alias="big_oak", position=(0, 0), asset="tree")
+    emap.add(oak)
+
+    with pytest.raises(ValueError):
+        emap.add(BaseEntity(alias="big_oak", position=(1, 0), asset="tree"))
+    assert len(emap.entities) == 1
+    assert emap.resolve("big_oak") is oak
+
+    # The alias is free again once its owner is gone
+    emap.remove(oak.id)
+    replacement = BaseEntity(alias="big_oak", position=(1, 0), asset="tree")
+    emap.add(replacement)
+    assert emap.resolve("big_oak") is replacement
+
+
+def test_renaming_a_live_entity_rebinds_its_alias():
+    emap = EntityMap()
+    oak, elm = BaseEntity(alias="oak", position=(0, 0), asset="tree"), BaseEntity(position=(1, 0), asset="tree")
+    emap.add_many([oak, elm])
+
+    oak.alias = "old_oak"
+    elm.alias = "oak"
+    assert emap.resolve("old_oak") is oak
+    assert emap.resolve("oak") is elm
+
+    with pytest.raises(ValueError):
+        oak.alias = "oak"
+    assert oak.alias == "old_oak"
+
+
+def test_add_keeps_preassigned_handle():
+    """Replicas re-insert entities under the handles the server gave them."""
+    source, replica = EntityMap(), EntityMap()
+    for i in range(3):
+        source.add(BaseEntity(position=(i, 0), asset="tree"))
+    handle = list(source.entities)[2]
+
+    replica.add(BaseEntity(id=handle, position=(2, 0), asset="tree"))
+    replica.add(BaseEntity(position=(0, 0), asset="tree"))
+
+    assert replica.get(handle).position == (2, 0)
+    assert len(replica.entities) == 2
+
+
+def test_fork_shares_entities_until_written():
+    emap = EntityMap()
+    for i in range(3):
+        emap.add(BaseEntity(position=(i, 0), asset="unit", traits=[MovableTrait()]))
+    first, second, third = emap.entities
+
+    branch = emap.fork()
+    # Read through the fork: it gets its own copy, the parent is untouched
+    branch.get(first).position = (9, 9)
+    # Written by the parent: the fork keeps the old state
+    emap.get(second).get_trait(MovableTrait).move_to(5, 5)
+
+    assert emap.get(first).position == (0, 0)
+    assert branch.get(second).get_trait(MovableTrait).destination is None
+    assert dict.get(branch.entities, third) is emap.get(third)
+
+    branch.remove(third)
+    assert emap.get(third) is not None
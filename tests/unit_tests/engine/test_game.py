@@ -0,0 +1,159 @@
+from unittest.mock import MagicMock
+
+from engine.entity import BaseEntity, EntityListener, EntityMap
+from engine.game import Game
+from engine.system import MovementSystem, System
+from engine.trait import MovableTrait
+
+
+class BatchRecorder(EntityListener):
+    def __init__(self):
+        self.batches = []
+
+    def on_entities_added(self, entities):
+        self.batches.append(("added", len(entities)))
+
+    def on_entities_removed(self, entities):
+        self.batches.append(("removed", len(entities)))
+
+
+class RegrowthSystem(System):
+    """Spawns a sapling next to every tree and fells the originals, mid-iteration."""
+    def update(self, game, dt):
+        for entity in game.entities.entities.values():
+            game.spawn(BaseEntity(position=(entity.position[0] + 1, 0), asset="sapling"))
+            game.despawn(entity.id)
+
+
+def test_structural_changes_apply_once_at_end_of_tick():
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+    recorder = BatchRecorder()
+    emap.add_listener(recorder)
+    for i in range(5):
+        emap.add(BaseEntity(position=(i, 0), asset="tree"))
+    game.systems.append(RegrowthSystem())
+
+    game.tick(0.1)
+
+    assert recorder.batches == [("removed", 5), ("added", 5)]
+    assert {e.asset for e in emap.entities.values()} == {"sapling"}
+
+
+def test_spawn_handle_is_valid_before_the_entity_lands():
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+
+    handle = game.spawn(BaseEntity(position=(0, 0), asset="tree"))
+    assert emap.get(handle) is None
+
+    game.tick(0.1)
+    assert emap.get(handle).asset == "tree"
+
+
+def test_despawning_a_pending_spawn_cancels_it():
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+
+    handle = game.spawn(BaseEntity(position=(0, 0), asset="tree"))
+    game.despawn(handle)
+    game.tick(0.1)
+
+    assert emap.entities == {}
+    # The released slot is reused under a fresh generation
+    emap.add(BaseEntity(position=(0, 0), asset="rock"))
+    assert emap.get(handle) is None
+
+
+class DriftSystem(System):
+    """Moves every entity one unit to the right per tick, using the game's randomness."""
+    def update(self, game, dt):
+        for entity in game.entities.entities.values():
+            entity.position = (entity.position[0] + 1, game.random.random())
+
+
+def _drifting_game():
+    emap = EntityMap()
+    game = Game(MagicMock(), emap, seed=4)
+    for i in range(3):
+        emap.add(BaseEntity(position=(i, 0), asset="tree"))
+    game.systems.append(DriftSystem())
+    return game
+
+
+def test_fork_simulates_ahead_without_touching_the_parent():
+    game = _drifting_game()
+    before = {eid: e.position for eid, e in game.entities.entities.items()}
+
+    branch = game.fork()
+    for _ in range(3):
+        branch.tick(0.1)
+    branch.discard()
+
+    assert branch.current_tick == 3 and game.current_tick == 0
+    assert {eid: e.position for eid, e in game.entities.entities.items()} == before
+    assert {e.position[0] for e in branch.entities.entities.values()} == {3, 4, 5}
+
+
+def test_rollback_returns_to_a_checkpoint_and_replays_identically():
+    game = _drifting_game()
+    tick = game.checkpoint()
+    for _ in range(2):
+        game.tick(0.1)
+    game.spawn(BaseEntity(position=(0, 0), asset="sapling"))
+    game.tick(0.1)
+    expected = {eid: e.position for eid, e in game.entities.entities.items()}
+
+    game.rollback(tick)
+    assert game.current_tick == 0
+    assert [e.position for e in game.entities.entities.values()] == [(0, 0), (1, 0), (2, 0)]
+
+    for _ in range(2):
+        game.tick(0.1)
+    game.spawn(BaseEntity(position=(0, 0), asset="sapling"))
+    game.tick(0.1)
+    assert {eid: e.position for eid, e in game.entities.entities.items()} == expected
+
+
+def test_released_checkpoints_stop_costing_writes(monkeypatch):
+    game = _drifting_game()
+    game.max_checkpoints = 2
+    for _ in range(4):
+        game.checkpoint()
+        game.tick(0.1)
+
+    # Only the two most recent checkpoints are still forks of the world
+    assert sorted(game._checkpoints) == [2, 3]
+    assert len(game.entities._forks) == 2
+
+    for tick in (2, 3):
+        game.release_checkpoint(tick)
+    preserved = []
+    monkeypatch.setattr(EntityMap, "_preserve", lambda self, entity: preserved.append(entity))
+    game.tick(0.1)
+
+    assert game.entities._forks == [] and preserved == []
+
+
+def test_fork_copies_only_the_entities_it_writes(monkeypatch):
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+    game.systems.append(MovementSystem())
+    for i in range(50):
+        emap.add(BaseEntity(position=(i, 0), asset="unit", traits=[MovableTrait(path=[(i, 5)])]))
+    walkers = list(emap.entities)[:2]
+    for entity_id in walkers:
+        emap.get(entity_id).get_trait(MovableTrait).move_to(0, 9)
+
+    unshared = []
+    unshare = BaseEntity._unshare
+    monkeypatch.setattr(BaseEntity, "_unshare", lambda self: unshared.append(self.id) or unshare(self))
+    branch = game.fork()
+    branch.tick(0.1)
+
+    # Every unit was read, only the two walkers were copied
+    assert sorted(unshared) == sorted(walkers)
+    idle = list(emap.entities)[10]
+    assert branch.entities.get(idle).get_trait(MovableTrait).path is emap.get(idle).get_trait(MovableTrait).path
+    assert emap.get(walkers[0]).position == (0, 0)
+    assert branch.entities.get(walkers[0]).position != (0, 0)
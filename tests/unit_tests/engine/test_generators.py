@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from engine.generators import NOISES, Biome, NoiseTerrainParams, ResourceRule, classify, fbm, heightmap
+from engine.terrain import TerrainType
+from engine.terrain_array import ArrayTerrainMap
+
+
+class Land(TerrainType):
+    WATER = "water"
+    GRASS = "grass"
+    ROCK = "rock"
+    RIVER = "river"
+    TREE = "tree"
+
+
+class LandMap(ArrayTerrainMap):
+    terrain_type = Land
+
+
+def _params(**overrides):
+    return NoiseTerrainParams(**{
+        "seed": 3,
+        "scale": 16.0,
+        "biomes": [Biome(terrain="water", max_height=0.4), Biome(terrain="grass", max_height=0.6),
+                   Biome(terrain="rock", max_height=1.0)],
+        **overrides,
+    })
+
+
+@pytest.mark.parametrize("name", sorted(NOISES))
+def test_noise_is_bounded_smooth_and_seeded(name):
+    noise = NOISES[name]
+    xs, zs = np.arange(64) / 8, np.arange(48) / 8
+
+    values = noise(xs, zs, 1)
+
+    assert values.shape == (64, 48)
+    assert values.min() >= 0.0 and values.max() <= 1.0
+    assert np.abs(np.diff(values, axis=0)).max() < 0.5
+    assert np.array_equal(values, noise(xs, zs, 1))
+    assert not np.array_equal(values, noise(xs, zs, 2))
+
+
+def test_heightmap_chunks_join_seamlessly():
+    params = _params(noise="simplex")
+    whole = heightmap(40, 30, params)
+    left = heightmap(25, 30, params)
+    right = heightmap(15, 30, params, origin=(25, 0))
+
+    assert np.allclose(whole, np.concatenate([left, right]), atol=1e-6)
+    assert np.allclose(fbm(NOISES["perlin"], np.arange(4) / 4, np.arange(4) / 4, 0, octaves=1),
+                       NOISES["perlin"](np.arange(4) / 4, np.arange(4) / 4, 0))
+
+
+def test_classify_assigns_bands():
+    heights = np.array([[0.1, 0.4, 0.59, 0.9]])
+    assert classify(heights, [0.4, 0.6]).tolist() == [[0, 1, 1, 2]]
+
+
+def test_generate_builds_array_terrain_deterministically():
+    params = _params(rivers=3, river_terrain="river",
+                     resources=[ResourceRule(terrain="tree", density=0.2, on=["grass"])])
+
+    terrain = LandMap.generate(64, 48, params)
+
+    assert terrain.codes.shape == (64, 48)
+    assert np.array_equal(terrain.codes, LandMap.generate(64, 48, params).codes)
+    assert {Land.WATER, Land.GRASS, Land.ROCK, Land.TREE} <= set(terrain.palette)
+    # Trees only grow where the band was grass
+    tree = terrain.code_of(Land.TREE)
+    bands = LandMap.generate(64, 48, _params()).codes
+    assert set(bands[terrain.codes == tree].tolist()) == {terrain.code_of(Land.GRASS)}
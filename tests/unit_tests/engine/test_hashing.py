@@ -0,0 +1,71 @@
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.hashing import WorldHasher, diff_snapshots
+from engine.terrain import TerrainMap, TerrainType, Tile
+from engine.trait import MovableTrait
+
+
+class HashTerrainType(TerrainType):
+    GRASS = "grass"
+    WATER = "water"
+
+
+class HashTerrain(TerrainMap):
+    @classmethod
+    def generate(cls, width, height, params):
+        return cls(width, height, [[Tile(terrain=HashTerrainType.GRASS) for _ in range(height)] for _ in range(width)])
+
+
+def _world():
+    emap = EntityMap()
+    game = Game(HashTerrain.generate(4, 4, None), emap)
+    emap.add(BaseEntity(alias="jack", position=(0, 0), traits=[MovableTrait()], asset="lumberjack"))
+    emap.add(BaseEntity(alias="tree", position=(3, 3), asset="tree"))
+    return game
+
+
+def test_identical_worlds_hash_equal():
+    assert WorldHasher(_world()).digest() == WorldHasher(_world()).digest()
+
+
+def test_incremental_hash_matches_fresh_hash():
+    """After mutations, the running digest must equal one computed from scratch."""
+    game = _world()
+    hasher = WorldHasher(game)
+    before = hasher.digest()
+
+    jack = game.entities.resolve("jack")
+    jack.position = (1, 0)
+    jack.get_trait(MovableTrait).move_to(2, 2)
+    game.entities.remove(game.entities.resolve("tree").id)
+    game.entities.add(BaseEntity(position=(1, 1), asset="rock"))
+    game.terrain.set_tile(2, 2, Tile(terrain=HashTerrainType.WATER))
+
+    assert hasher.digest() != before
+    assert hasher.digest() == WorldHasher(game).digest()
+
+
+def test_diff_names_diverging_entities_and_traits():
+    reference, candidate = _world(), _world()
+    ref_hasher, cand_hasher = WorldHasher(reference), WorldHasher(candidate)
+
+    jack = candidate.entities.resolve("jack")
+    tree = candidate.entities.resolve("tree")
+    rock = BaseEntity(position=(1, 1), asset="rock")
+    jack.get_trait(MovableTrait).speed = 3.0
+    tree.position = (2, 3)
+    candidate.entities.add(rock)
+    candidate.terrain.set_tile(1, 0, Tile(terrain=HashTerrainType.WATER))
+
+    diff = diff_snapshots(ref_hasher.snapshot(), cand_hasher.snapshot())
+
+    assert diff.added == [rock.id]
+    assert diff.removed == []
+    assert diff.changed == {jack.id: ["MovableTrait"], tree.id: ["entity"]}
+    assert diff.columns == [1]
+
+
+def test_diff_of_equal_snapshots_is_empty():
+    game = _world()
+    hasher = WorldHasher(game)
+    assert diff_snapshots(hasher.snapshot(), hasher.snapshot()).is_empty
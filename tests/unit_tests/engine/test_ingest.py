@@ -0,0 +1,153 @@
+import asyncio
+import json
+import socket
+import threading
+from unittest.mock import MagicMock
+
+from engine.cqrs import BaseCommand
+from engine.entity import EntityMap
+from engine.game import Game
+from engine.ingest import CommandInbox, CommandServer
+
+
+class NudgeCommand(BaseCommand):
+    amount: int
+
+
+def make_game() -> tuple[Game, list[NudgeCommand]]:
+    game = Game(MagicMock(), EntityMap())
+    received = []
+    game.command_processor.register_handler(NudgeCommand, lambda game, command: received.append(command))
+    return game, received
+
+
+def test_inbox_drops_past_capacity_and_counts():
+    inbox = CommandInbox(capacity=2)
+
+    assert inbox.submit(NudgeCommand(amount=1))
+    assert inbox.submit(NudgeCommand(amount=2))
+    assert not inbox.submit(NudgeCommand(amount=3))
+
+    assert [command.amount for command in inbox.drain()] == [1, 2]
+    assert inbox.metrics() == {"pending": 0, "accepted": 2, "dropped": 1, "drained": 2, "high_water": 2}
+
+
+def test_inbox_drain_limit_defers_the_rest():
+    inbox = CommandInbox(max_per_tick=2)
+    for amount in range(5):
+        inbox.submit(NudgeCommand(amount=amount))
+
+    assert [command.amount for command in inbox.drain()] == [0, 1]
+    assert [command.amount for command in inbox.drain()] == [2, 3]
+    assert len(inbox) == 1
+
+
+def test_tick_processes_commands_submitted_from_other_threads():
+    game, received = make_game()
+    producers = [
+        threading.Thread(target=lambda base=base: [game.inbox.submit(NudgeCommand(amount=base + i)) for i in range(100)])
+        for base in (0, 1000, 2000)
+    ]
+    for producer in producers:
+        producer.start()
+    for producer in producers:
+        producer.join()
+
+    game.tick(0.1)
+
+    assert sorted(command.amount for command in received) == sorted(
+        base + i for base in (0, 1000, 2000) for i in range(100)
+    )
+    assert game.inbox.metrics()["pending"] == 0
+
+
+def test_ingested_commands_are_recorded_with_their_tick():
+    game, _ = make_game()
+    game.recorder = MagicMock()
+    game.current_tick = 7
+    command = NudgeCommand(amount=1)
+    game.inbox.submit(command)
+
+    game.tick(0.1)
+
+    game.recorder.record_command.assert_called_once_with(7, command)
+    game.recorder.record_tick.assert_called_once_with(7, 0.1)
+
+
+def test_fork_does_not_take_the_parents_inbox():
+    game, received = make_game()
+    branch = game.fork()
+    game.inbox.submit(NudgeCommand(amount=1))
+
+    branch.tick(0.1)
+    assert received == []
+    game.tick(0.1)
+    assert [command.amount for command in received] == [1]
+
+
+def test_server_decodes_commands_and_reports_errors(tmp_path):
+    """One JSON command per line in, one JSON reply per line out."""
+    game, received = make_game()
+    game.inbox.capacity = 1
+    server = CommandServer(game.inbox, game.command_processor.command_types(), str(tmp_path / "commands.sock"))
+    server.serve_in_background()
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(server.address)
+            lines = client.makefile("rwb")
+            for message in (
+                b'{"type": "NudgeCommand", "data": {"amount": 4}}',
+                b'{"type": "NudgeCommand", "data": {"amount": 5}}',
+                b'{"type": "Teleport", "data": {}}',
+                b'{"type": "NudgeCommand", "data": {"amount": "lots"}}',
+                b'not json',
+            ):
+                lines.write(message + b"\n")
+            lines.flush()
+            replies = [json.loads(lines.readline()) for _ in range(5)]
+    finally:
+        server.stop(timeout=2)
+
+    assert replies[0] == {"ok": True}
+    assert replies[1] == {"ok": False, "error": "dropped"}
+    assert replies[2] == {"ok": False, "error": "unknown command 'Teleport'"}
+    assert not replies[3]["ok"] and not replies[4]["ok"]
+    assert server.rejected == 3
+
+    game.tick(0.1)
+    assert [command.amount for command in received] == [4]
+
+
+def test_server_runs_on_an_existing_event_loop():
+    inbox = CommandInbox()
+    server = CommandServer(inbox, [NudgeCommand], ("127.0.0.1", 0))
+
+    async def session():
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b'{"type": "NudgeCommand", "data": {"amount": 9}}\n')
+        reply = await reader.readline()
+        writer.close()
+        await server.close()
+        return json.loads(reply)
+
+    assert asyncio.run(session()) == {"ok": True}
+    assert [command.amount for command in inbox.drain()] == [9]
+
+
+def test_server_stops_with_a_client_still_connected(tmp_path):
+    game, _ = make_game()
+    server = CommandServer(game.inbox, game.command_processor.command_types(), str(tmp_path / "commands.sock"))
+    server.serve_in_background()
+    thread = server._thread
+
+    with socket.socket(socket.AF_UNIX) as client:
+        client.connect(server.address)
+        client.sendall(b'{"type": "NudgeCommand", "data": {"amount": 1}}\n')
+        assert json.loads(client.makefile("rb").readline()) == {"ok": True}
+
+        server.stop(timeout=2)
+
+        assert not thread.is_alive()
+        # The idle client was hung up on rather than waited for
+        assert client.recv(1) == b""
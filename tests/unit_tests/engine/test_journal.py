@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from engine.cqrs import BaseEvent, EntityArrivedEvent
+from engine.entity import EntityMap
+from engine.game import Game
+from engine.journal import EventJournal, JournalReader
+
+
+class ChoppedEvent(BaseEvent):
+    tree_id: int
+    wood: int
+
+
+def make_game() -> Game:
+    terrain = MagicMock(width=8, height=8)
+    return Game(terrain, EntityMap(), seed=3)
+
+
+def run(game: Game, ticks: int):
+    """Every tick emits one arrival and, on even ticks, one chop."""
+    for _ in range(ticks):
+        game.enqueue_event(EntityArrivedEvent(entity_id=game.current_tick))
+        if game.current_tick % 2 == 0:
+            game.enqueue_event(ChoppedEvent(tree_id=game.current_tick, wood=5))
+        game.tick(0.1)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "session.journal")
+
+
+def test_journal_round_trips_every_processed_event(journal_path):
+    game = make_game()
+    journal = EventJournal(journal_path, block_size=8)
+    journal.attach(game)
+    run(game, 20)
+    journal.close()
+
+    reader = JournalReader(journal_path, event_types=[EntityArrivedEvent, ChoppedEvent])
+    entries = list(reader.read())
+    reader.close()
+
+    assert reader.metadata["seed"] == 3
+    assert len(entries) == 30
+    assert entries[0] == (0, "EntityArrivedEvent", EntityArrivedEvent(entity_id=0))
+    assert entries[1] == (0, "ChoppedEvent", ChoppedEvent(tree_id=0, wood=5))
+    assert [entry.tick for entry in entries] == sorted(entry.tick for entry in entries)
+    assert journal.metrics()["events"] == 30
+
+
+def test_range_and_type_scans_skip_unrelated_blocks(journal_path):
+    game = make_game()
+    journal = EventJournal(journal_path, block_size=4)
+    journal.attach(game)
+    run(game, 40)
+    journal.close()
+
+    reader = JournalReader(journal_path)
+    chops = list(reader.read(start_tick=10, end_tick=19, types=[ChoppedEvent]))
+
+    assert [entry.tick for entry in chops] == [10, 12, 14, 16, 18]
+    # Unknown classes come back as plain JSON
+    assert chops[0].event == {"tree_id": 10, "wood": 5}
+    assert len(reader.blocks) > 10
+    assert sum(block.first_tick <= 19 and block.last_tick >= 10 for block in reader.blocks) < len(reader.blocks)
+    reader.close()
+
+
+def test_reader_tails_a_journal_being_written(journal_path):
+    game = make_game()
+    journal = EventJournal(journal_path, flush_interval=60)
+    journal.attach(game)
+    reader = JournalReader(journal_path)
+    tail = reader.read(follow=True, poll_interval=0.01, idle_timeout=0.2)
+
+    run(game, 1)
+    journal.flush()
+    assert next(tail).tick == 0
+    assert next(tail).type_name == "ChoppedEvent"
+
+    run(game, 1)
+    journal.flush()
+    assert next(tail).tick == 1
+    assert list(tail) == []
+
+    journal.close()
+    reader.close()
+
+
+def test_forks_do_not_journal(journal_path):
+    game = make_game()
+    journal = EventJournal(journal_path)
+    journal.attach(game)
+    branch = game.fork()
+    run(branch, 5)
+    run(game, 1)
+    journal.close()
+
+    reader = JournalReader(journal_path)
+    assert [entry.tick for entry in reader.read()] == [0, 0]
+    reader.close()
@@ -0,0 +1,87 @@
+from unittest.mock import MagicMock
+
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.lod import LODSystem, ObserverTrait
+from engine.system import MovementSystem
+from engine.trait import MovableTrait
+
+
+def _game(cold_interval=4):
+    game = Game(MagicMock(), EntityMap())
+    game.systems.append(MovementSystem())
+    LODSystem(cell_size=10, cold_interval=cold_interval).attach(game)
+    return game
+
+
+def _walker(game, x, y, speed=1.0):
+    entity = BaseEntity(position=(x, y), asset="unit", traits=[MovableTrait(speed=speed)])
+    game.entities.add(entity)
+    entity.get_trait(MovableTrait).move_to(x + 100, y)
+    return entity
+
+
+def test_observers_and_focus_points_heat_cells():
+    game = _game()
+    game.entities.add(BaseEntity(position=(5, 5), asset="player", traits=[ObserverTrait(radius=1)]))
+    game.lod.set_focus("camera", 55, 55, radius=1)
+    game.tick(0.1)
+
+    assert game.lod.is_hot((2, 2))
+    assert game.lod.is_hot((52, 58))
+    assert not game.lod.is_hot((30, 30))
+
+    game.lod.clear_focus("camera")
+    game.tick(0.1)
+    assert not game.lod.is_hot((52, 58))
+
+
+def test_cold_entities_move_in_coarse_steps_without_losing_time():
+    game = _game(cold_interval=4)
+    game.lod.set_focus("camera", 5, 5, radius=1)
+    hot = _walker(game, 0, 5)
+    cold = _walker(game, 0, 50)
+
+    positions = []
+    for _ in range(8):
+        game.tick(0.5)
+        positions.append(cold.position[0])
+
+    # The hot unit moves every tick; the cold one only once per interval...
+    assert hot.position[0] == 4.0
+    assert sum(a != b for a, b in zip([0.0, *positions], positions)) == 8 // 4
+    # ...but never falls more than an interval behind
+    assert 4.0 - 4 * 0.5 < cold.position[0] <= 4.0
+
+
+def test_promoted_entities_catch_up_immediately():
+    game = _game(cold_interval=100)
+    unit = _walker(game, 0, 50)
+    for _ in range(3):
+        game.tick(1.0)
+    start = unit.position[0]
+
+    game.lod.set_focus("camera", 0, 50, radius=20)
+    game.tick(1.0)
+
+    # Everything owed while cold is simulated on the first hot tick
+    assert unit.position[0] == 4.0
+    assert start < 4.0
+
+
+def test_halting_a_cold_unit_clears_its_debt():
+    game = _game(cold_interval=100)
+    unit = _walker(game, 0, 50)
+    for _ in range(5):
+        game.tick(1.0)
+    start = unit.position[0]
+    unit.get_trait(MovableTrait).stop_movement()
+    game.tick(1.0)
+
+    # A new order, seen at once: one hot tick moves the unit one tick's worth
+    unit.get_trait(MovableTrait).move_to(start + 100, 50)
+    game.lod.set_focus("camera", start, 50, radius=20)
+    game.tick(1.0)
+
+    assert unit.position[0] == start + 1.0
+    assert game.lod.metrics()["lod_deferred"] == 0
@@ -0,0 +1,75 @@
+from typing import ClassVar
+
+from engine.entity import BaseEntity, EntityMap
+from engine.trait import ActorTrait, BaseTrait, InteractionVerb, MovableTrait
+
+
+class Verb(InteractionVerb):
+    CHOP = "chop"
+
+
+class ChopperTrait(ActorTrait):
+    verb: ClassVar[InteractionVerb] = Verb.CHOP
+
+
+class TiredTrait(BaseTrait):
+    level: int = 1
+
+
+def _unit(*traits):
+    return BaseEntity(position=(0, 0), traits=list(traits), asset="unit")
+
+
+def test_query_tracks_adds_removes_and_trait_changes():
+    emap = EntityMap()
+    walker = _unit(MovableTrait())
+    chopper = _unit(MovableTrait(), ChopperTrait())
+    emap.add(walker)
+    emap.add(chopper)
+
+    query = emap.query(MovableTrait, ChopperTrait, without=(TiredTrait,))
+    assert [e.id for e in query] == [chopper.id]
+
+    late = _unit(ChopperTrait(), MovableTrait())
+    emap.add(late)
+    chopper.add_trait(TiredTrait())
+    walker.add_trait(ChopperTrait())
+    emap.remove(late.id)
+
+    assert [e.id for e in query] == [walker.id]
+
+
+def test_queries_are_cached_per_signature():
+    emap = EntityMap()
+    assert emap.query(MovableTrait, ChopperTrait) is emap.query(ChopperTrait, MovableTrait)
+    assert emap.query(MovableTrait) is not emap.query(MovableTrait, without=(TiredTrait,))
+
+
+def test_subclasses_match_base_trait_queries():
+    emap = EntityMap()
+    emap.add(_unit(ChopperTrait()))
+    assert len(emap.query(ActorTrait)) == 1
+
+
+def test_observer_reports_each_entity_once_per_window():
+    emap = EntityMap()
+    existing = _unit(MovableTrait())
+    emap.add(existing)
+    observer = emap.observe(MovableTrait)
+
+    existing.get_trait(MovableTrait).move_to(1, 1)
+    newcomer = _unit(MovableTrait())
+    emap.add(newcomer)
+    newcomer.get_trait(MovableTrait).speed = 3.0
+    ghost = _unit(MovableTrait())
+    emap.add(ghost)
+    emap.remove(ghost.id)
+
+    changes = observer.drain()
+    assert changes.added == {newcomer.id}
+    assert changes.modified == {existing.id}
+    assert changes.removed == set()
+
+    existing.remove_trait(MovableTrait)
+    assert observer.drain().removed == {existing.id}
+    assert observer.drain() == (set(), set(), set())
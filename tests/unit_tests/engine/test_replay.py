@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from engine.cqrs import BaseCommand
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.replay import CommandRecorder, replay
+from engine.system import MovementSystem
+from engine.terrain import TerrainGenerationParams, TerrainMap, TerrainType, Tile
+from engine.trait import MovableTrait
+
+
+class ReplayTerrainType(TerrainType):
+    GRASS = "grass"
+
+
+class ReplayTerrain(TerrainMap):
+    @classmethod
+    def generate(cls, width: int, height: int, params: TerrainGenerationParams) -> "ReplayTerrain":
+        tiles = [[Tile(terrain=ReplayTerrainType.GRASS) for _ in range(height)] for _ in range(width)]
+        return cls(width, height, tiles)
+
+
+class GoCommand(BaseCommand):
+    entity_id: int
+    target: tuple[float, float]
+
+
+def handle_go(game, command: GoCommand):
+    game.entities.get(command.entity_id).get_trait(MovableTrait).move_to(*command.target)
+
+
+class ReplayGame(Game):
+    @classmethod
+    def setup(cls, width: int, height: int, seed: int = 0) -> "ReplayGame":
+        game = cls(ReplayTerrain.generate(width, height, TerrainGenerationParams()), EntityMap(), seed=seed)
+        game.command_processor.register_handler(GoCommand, handle_go)
+        game.systems.append(MovementSystem())
+        for _ in range(3):
+            position = (game.random.uniform(0, width), game.random.uniform(0, height))
+            game.entities.add(BaseEntity(position=position,
+                                         asset="unit", traits=[MovableTrait(speed=1.5)]))
+        return game
+
+
+def _positions(game):
+    return {eid: entity.position for eid, entity in game.entities.entities.items()}
+
+
+def test_replay_reproduces_recorded_session(tmp_path):
+    path = tmp_path / "session.replay"
+    game = ReplayGame.setup(8, 8, seed=42)
+    recorder = CommandRecorder(str(path))
+    recorder.attach(game)
+
+    ids = list(game.entities.entities)
+    player = random.Random(7)
+    for tick in range(30):
+        if tick % 7 == 0:
+            target = (player.uniform(0, 8), player.uniform(0, 8))
+            game.enqueue_command(GoCommand(entity_id=ids[tick % 3], target=target))
+        game.tick(0.1)
+    recorder.close()
+
+    replayed = replay(str(path), ReplayGame)
+
+    assert replayed.current_tick == 30
+    assert _positions(replayed) == _positions(game)
+
+
+def test_replay_can_stop_early(tmp_path):
+    path = tmp_path / "session.replay"
+    game = ReplayGame.setup(4, 4, seed=1)
+    recorder = CommandRecorder(str(path))
+    recorder.attach(game)
+    for _ in range(10):
+        game.tick(0.1)
+    recorder.close()
+
+    assert replay(str(path), ReplayGame, ticks=4).current_tick == 4
+
+
+def test_recording_must_start_at_tick_zero(tmp_path):
+    game = ReplayGame.setup(4, 4)
+    game.tick(0.1)
+
+    with pytest.raises(ValueError):
+        CommandRecorder(str(tmp_path / "late.replay")).attach(game)
+
+
+def test_log_cut_short_by_a_crash_replays_to_its_last_complete_tick(tmp_path):
+    path = tmp_path / "session.replay"
+    game = ReplayGame.setup(8, 8, seed=5)
+    recorder = CommandRecorder(str(path))
+    recorder.attach(game)
+    ids = list(game.entities.entities)
+    for tick in range(12):
+        game.enqueue_command(GoCommand(entity_id=ids[tick % 3], target=(tick % 8, 7 - tick % 8)))
+        game.tick(0.1)
+
+    # Never closed: what the crash leaves behind is what was flushed, cut mid-record
+    crashed = tmp_path / "crashed.replay"
+    crashed.write_bytes(path.read_bytes()[:-3])
+    recorder.close()
+
+    replayed = replay(str(crashed), ReplayGame)
+
+    assert replayed.current_tick == 11
+    assert _positions(replayed) == _positions(replay(str(path), ReplayGame, ticks=11))
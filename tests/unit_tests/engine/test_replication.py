@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.replication import DeltaEncoder, ReplicaDecoder, SnapshotClient, SnapshotPublisher
+from engine.terrain import TerrainMap, TerrainType, Tile
+from engine.trait import MovableTrait
+
+
+class NetTerrainType(TerrainType):
+    GRASS = "grass"
+    WATER = "water"
+
+
+class NetTerrain(TerrainMap):
+    @classmethod
+    def generate(cls, width, height, params):
+        return cls(width, height, [[Tile(terrain=NetTerrainType.GRASS) for _ in range(height)] for _ in range(width)])
+
+
+def _game():
+    emap = EntityMap()
+    game = Game(NetTerrain.generate(3, 2, None), emap)
+    emap.add(BaseEntity(alias="jack", position=(0.5, 1.25), traits=[MovableTrait(speed=2.0)], asset="lumberjack"))
+    emap.add(BaseEntity(alias="tree", position=(2, 1), asset="tree"))
+    return game
+
+
+def _decoder():
+    return ReplicaDecoder(NetTerrain, NetTerrainType, [MovableTrait])
+
+
+def _assert_same_world(replica, game):
+    assert replica.entities.entities.keys() == game.entities.entities.keys()
+    for eid, entity in game.entities.entities.items():
+        mirrored = replica.entities.get(eid)
+        assert mirrored.asset == entity.asset
+        assert mirrored.position == pytest.approx(entity.position, abs=1 / 256)
+        assert mirrored.traits == entity.traits
+
+
+def test_full_state_then_deltas_rebuild_the_world():
+    game = _game()
+    encoder = DeltaEncoder(game)
+    decoder = _decoder()
+    decoder.apply(encoder.encode_full())
+
+    jack = game.entities.resolve("jack")
+    jack.position = (1.1, 1.3)
+    jack.get_trait(MovableTrait).move_to(2, 0)
+    game.entities.remove(game.entities.resolve("tree").id)
+    game.entities.add(BaseEntity(alias="rock", position=(1, 0), asset="rock"))
+    game.terrain.set_tile(1, 1, Tile(terrain=NetTerrainType.WATER))
+    decoder.apply(encoder.encode_delta())
+
+    replica = decoder.game
+    _assert_same_world(replica, game)
+    assert replica.terrain.tile_at(1, 1).terrain == NetTerrainType.WATER
+    assert replica.terrain.tile_at(0, 1).terrain == NetTerrainType.GRASS
+
+
+def test_delta_size_follows_changes_not_world_size():
+    game = _game()
+    for i in range(500):
+        game.entities.add(BaseEntity(position=(i, 0), asset="tree"))
+    encoder = DeltaEncoder(game)
+    encoder.encode_full()
+
+    idle = encoder.encode_delta()
+    game.entities.resolve("jack").position = (3, 3)
+    one_move = encoder.encode_delta()
+
+    assert len(idle) < 32
+    assert len(one_move) - len(idle) < 32
+
+
+def test_publisher_streams_to_client():
+    game = _game()
+    publisher = SnapshotPublisher(game, ("127.0.0.1", 0))
+    client = SnapshotClient(publisher.address, _decoder())
+    try:
+        publisher.publish()
+        game.entities.resolve("jack").position = (2.0, 0.0)
+        game.current_tick += 1
+        publisher.publish()
+
+        deadline = time.monotonic() + 2
+        while (client.game is None or client.game.current_tick < 1) and time.monotonic() < deadline:
+            client.poll()
+
+        assert client.game.entities.resolve("jack").position == (2.0, 0.0)
+    finally:
+        client.close()
+        publisher.close()
+
+
+def test_replaced_traits_and_asset_changes_reach_the_replica():
+    game = _game()
+    encoder = DeltaEncoder(game)
+    decoder = _decoder()
+    decoder.apply(encoder.encode_full())
+
+    jack = game.entities.resolve("jack")
+    tree = game.entities.resolve("tree")
+    jack.traits = [MovableTrait(speed=9.0)]
+    tree.traits = [MovableTrait(speed=1.0)]
+    tree.asset = "stump"
+    decoder.apply(encoder.encode_delta())
+    _assert_same_world(decoder.game, game)
+
+    jack.traits = []
+    decoder.apply(encoder.encode_delta())
+    _assert_same_world(decoder.game, game)
@@ -0,0 +1,183 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import ClassVar
+
+import pytest
+
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.shard import ShardContext, ShardLayout, ShardedSimulation, _border_buffer_size
+from engine.system import InteractionSystem, MovementSystem, System
+from engine.trait import ActorTrait, InteractionVerb, MovableTrait
+from main import BasicTerrain, LumberjackGame, MoveCommand
+
+
+def test_layout_assigns_positions_to_regions():
+    layout = ShardLayout(width=12, height=8, columns=2, rows=2)
+
+    assert layout.shard_at(1, 1) == 0
+    assert layout.shard_at(7, 1) == 1
+    assert layout.shard_at(1, 5) == 2
+    assert layout.shard_at(11.9, 7.9) == 3
+    # Off-map positions clamp to the nearest region
+    assert layout.shard_at(-3, 20) == 2
+    assert layout.region(3) == (6.0, 4.0, 12.0, 8.0)
+
+
+def test_border_buffers_expose_ghosts_to_neighbours():
+    layout = ShardLayout(width=12, height=4, columns=2)
+    buffers = [SharedMemory(create=True, size=_border_buffer_size(8)) for _ in range(2)]
+    try:
+        left, right = (ShardContext(i, layout, buffers, halo=2.0, capacity=8) for i in range(2))
+        left.publish_border([
+            BaseEntity(asset="a", position=(5.0, 1.0)),  # near the shared edge
+            BaseEntity(asset="a", position=(3.0, 2.0)),  # interior
+        ])
+        right.publish_border([])
+
+        assert right.ghosts() == [(5.0, 1.0)]
+        assert left.ghosts() == []
+
+        # Running ahead into the next tick does not disturb a neighbour still reading this one
+        left.publish_border([BaseEntity(asset="a", position=(5.5, 3.0))])
+        assert right.ghosts() == [(5.0, 1.0)]
+        right.publish_border([])
+        assert right.ghosts() == [(5.5, 3.0)]
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+
+def test_entities_migrate_between_shards():
+    width, height = 12, 4
+    jack_id = LumberjackGame.setup(width, height).jack_id
+    layout = ShardLayout(width=width, height=height, columns=2)
+
+    with ShardedSimulation("main:LumberjackGame", width, height, layout) as sim:
+        sim.enqueue_command(MoveCommand(entity_id=jack_id, target_pos=(10.0, 3.5)), at=(2.0, 2.0))
+        for _ in range(25):
+            sim.tick(0.1)
+        left, right = sim.collect()
+
+    assert left == []
+    jack = next(e for e in right if e.asset == "lumberjack")
+    assert jack.position == (10.0, 3.5)
+    assert jack.alias == f"0:{jack_id}"
+    assert sum(m["entities"] for m in sim.metrics) == 3
+
+
+class ChaseVerbs(InteractionVerb):
+    CHASE = "chase"
+
+
+class ChaseTrait(ActorTrait):
+    verb: ClassVar[InteractionVerb] = ChaseVerbs.CHASE
+
+
+class ChaseSystem(System):
+    """Hunters head for wherever their target is now, or east when they cannot see it."""
+    def update(self, game, dt):
+        for hunter, chase in game.entities.yield_entities_with_trait(ChaseTrait):
+            prey = game.entities.get(chase.target_id)
+            movable = hunter.get_trait(MovableTrait)
+            if prey is not None:
+                movable.move_to(*prey.position)
+            elif not movable.is_moving:
+                movable.move_to(9.0, 2.0)
+
+
+class ChaseGame(Game):
+    @classmethod
+    def setup(cls, width, height, seed=0):
+        game = cls(BasicTerrain.generate(width, height, None), EntityMap(), seed=seed)
+        game.systems += [ChaseSystem(), MovementSystem()]
+        prey = BaseEntity(alias="prey", position=(4.0, 2.0), asset="deer", traits=[MovableTrait(speed=2.0)])
+        game.entities.add(prey)
+        prey.get_trait(MovableTrait).move_to(11.0, 2.0)
+        hunter = BaseEntity(alias="hunter", position=(1.0, 2.0), asset="wolf", traits=[
+            MovableTrait(speed=1.5), ChaseTrait(target_id=prey.id, is_active=True),
+        ])
+        game.entities.add(hunter)
+        return game
+
+
+def test_references_follow_entities_across_shards():
+    """The prey crosses first, the hunter later; on arrival the hunter's target is the prey again."""
+    layout = ShardLayout(width=12, height=4, columns=2)
+
+    with ShardedSimulation(f"{__name__}:ChaseGame", 12, 4, layout) as sim:
+        for _ in range(80):
+            sim.tick(0.1)
+        left, right = sim.collect()
+
+    assert left == []
+    hunter = next(e for e in right if e.alias == "hunter")
+    prey = next(e for e in right if e.alias == "prey")
+    assert hunter.get_trait(ChaseTrait).target_id == prey.id
+    assert hunter.position == pytest.approx(prey.position)
+
+
+def test_queued_command_follows_an_entity_that_just_migrated():
+    width, height = 12, 4
+    jack_id = LumberjackGame.setup(width, height).jack_id
+    layout = ShardLayout(width=width, height=height, columns=2)
+
+    with ShardedSimulation("main:LumberjackGame", width, height, layout) as sim:
+        sim.enqueue_command(MoveCommand(entity_id=jack_id, target_pos=(10.0, 3.5)), at=(2.0, 2.0))
+        while not any(e.asset == "lumberjack" for e in sim.collect()[1]):
+            sim.tick(0.1)
+        # Addressed with the old handle, to the shard the jack just left
+        sim.enqueue_command(MoveCommand(entity_id=jack_id, target_pos=(9.0, 3.5)), at=(2.0, 2.0))
+        for _ in range(20):
+            sim.tick(0.1)
+        _, right = sim.collect()
+
+    jack = next(e for e in right if e.asset == "lumberjack")
+    assert jack.position == (9.0, 3.5)
+    assert all(metrics["ghosts"] >= 0 for metrics in sim.metrics)
+
+
+class ChaseInteraction(InteractionSystem):
+    actor_trait_subclass = ChaseTrait
+
+    def can_act(self, actor, target):
+        return True
+
+    def handle_action(self, actor, target):
+        return []
+
+
+def test_actor_keeps_its_order_while_its_target_is_in_another_shard():
+    layout = ShardLayout(width=12, height=4, columns=2)
+    buffers = [SharedMemory(create=True, size=_border_buffer_size(8)) for _ in range(2)]
+    try:
+        contexts = [ShardContext(i, layout, buffers, halo=2.0, capacity=8) for i in range(2)]
+        games = []
+        for context in contexts:
+            game = Game(BasicTerrain.generate(12, 4, None), EntityMap())
+            game.systems.append(ChaseInteraction())
+            game.shard, context.entities = context, game.entities
+            games.append(game)
+
+        prey = BaseEntity(alias="prey", position=(4.0, 2.0), asset="deer")
+        games[0].entities.add(prey)
+        hunter = BaseEntity(alias="hunter", position=(1.0, 2.0), asset="wolf", traits=[ChaseTrait()])
+        games[0].entities.add(hunter)
+        hunter.get_trait(ChaseTrait).activate(prey.id)
+
+        prey.position = (8.0, 2.0)
+        contexts[1].immigrate(contexts[0].emigrate())
+        games[0].tick(0.1)
+
+        chase = hunter.get_trait(ChaseTrait)
+        assert chase.is_active and chase.target_id is None
+
+        # Back in one shard, the order is picked up again
+        hunter.position = (7.0, 2.0)
+        contexts[1].immigrate(contexts[0].emigrate())
+        games[1].tick(0.1)
+        assert chase.is_active and chase.target_id == prey.id
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+from engine.cqrs import BaseCommand
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.loop import SimulationLoop
+from engine.snapshot import SnapshotBuffer, WorldSnapshot
+from engine.system import MovementSystem
+from engine.terrain import TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+from engine.trait import MovableTrait
+
+
+class PingCommand(BaseCommand):
+    pass
+
+
+def test_snapshot_is_detached_from_world():
+    """Mutating the world after capture must not leak into the snapshot."""
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+    entity = BaseEntity(position=(1, 2), asset="lumberjack")
+    emap.add(entity)
+
+    snapshot = WorldSnapshot.capture(game)
+    entity.position = (5, 5)
+
+    state = snapshot.entities[0]
+    assert (state.x, state.y) == (1, 2)
+    assert snapshot.tick == 0
+
+
+def test_buffer_keeps_previous_and_current():
+    buffer = SnapshotBuffer()
+    assert buffer.latest() is None
+
+    first, second = MagicMock(), MagicMock()
+    buffer.publish(first)
+    buffer.publish(second)
+
+    assert buffer.latest() is second
+    assert buffer.pair() == (first, second)
+
+
+def test_loop_step_drains_commands_and_publishes():
+    """A manual step behaves like one iteration of the background thread."""
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+    game.systems.append(MovementSystem())
+    received = []
+    game.command_processor.register_handler(PingCommand, lambda game, command: received.append(command))
+
+    entity = BaseEntity(position=(0, 0), traits=[MovableTrait(speed=3.0)], asset="lumberjack")
+    emap.add(entity)
+    entity.get_trait(MovableTrait).move_to(10, 0)
+
+    loop = SimulationLoop(game, tick_rate=10)
+    command = PingCommand()
+    loop.enqueue_command(command)
+    loop.step()
+
+    assert received == [command]
+    snapshot = loop.buffer.latest()
+    assert snapshot.tick == 1
+    assert snapshot.entities[0].x == entity.position[0]
+
+
+def test_loop_thread_starts_and_stops():
+    game = Game(MagicMock(), EntityMap())
+    loop = SimulationLoop(game, tick_rate=200)
+    loop.start()
+    loop.stop(timeout=2)
+
+    assert not loop.is_alive()
+    assert loop.buffer.latest() is not None
+
+
+def test_snapshot_looks_up_entities_by_handle():
+    emap = EntityMap()
+    game = Game(MagicMock(), emap)
+    entity = BaseEntity(position=(3, 4), asset="lumberjack")
+    emap.add(entity)
+    entity_id = entity.id
+
+    snapshot = WorldSnapshot.capture(game)
+
+    assert (snapshot.entity(entity_id).x, snapshot.entity(entity_id).y) == (3, 4)
+    assert snapshot.entity(entity_id + 1) is None
+
+
+class Ground(TerrainType):
+    GRASS = "grass"
+    WATER = "water"
+
+
+class GroundMap(ArrayTerrainMap):
+    terrain_type = Ground
+
+
+def test_snapshot_terrain_is_detached_and_shared_until_an_edit():
+    terrain = GroundMap.filled(4, 4, Ground.GRASS)
+    game = Game(terrain, EntityMap())
+
+    first = WorldSnapshot.capture(game)
+    second = WorldSnapshot.capture(game, first)
+    assert second.terrain is first.terrain
+
+    terrain.set_tile(1, 2, Tile(terrain=Ground.WATER))
+    third = WorldSnapshot.capture(game, second)
+
+    assert first.terrain.tile_at(1, 2).terrain == Ground.GRASS
+    assert first.terrain.palette == [Ground.GRASS]
+    assert third.terrain is not first.terrain
+    assert third.terrain.tile_at(1, 2).terrain == Ground.WATER
@@ -39,3 +39,21 @@ def test_tile_at_out_of_bounds():
     t_map = GameMap.generate(5, 5, GameParams())
     assert t_map.tile_at(-1, 2) is None
     assert t_map.tile_at(5, 5) is None
+
+
+def test_fork_copies_columns_on_write():
+    """A fork shares columns until either side edits one."""
+    t_map = GameMap.generate(3, 3, GameParams())
+    branch = t_map.fork()
+    assert branch.tiles[1] is t_map.tiles[1]
+
+    branch.set_tile(1, 1, Tile(terrain=GameTerrain.WATER))
+    t_map.set_tile(2, 0, Tile(terrain=GameTerrain.WATER))
+
+    assert t_map.tile_at(1, 1).terrain == GameTerrain.GRASS
+    assert branch.tile_at(2, 0).terrain == GameTerrain.GRASS
+    assert branch.tiles[0] is t_map.tiles[0]
+
+    t_map.restore(branch)
+    assert t_map.tile_at(1, 1).terrain == GameTerrain.WATER
+    assert t_map.tile_at(2, 0).terrain == GameTerrain.GRASS
@@ -0,0 +1,63 @@
+import numpy as np
+
+from engine.terrain import TerrainListener, TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+
+
+class Ground(TerrainType):
+    GRASS = "grass"
+    WATER = "water"
+
+
+class GroundMap(ArrayTerrainMap):
+    terrain_type = Ground
+
+
+class Edits(TerrainListener):
+    def __init__(self):
+        self.edits = []
+
+    def on_tile_changed(self, x, z, old, new):
+        self.edits.append((x, z, old.terrain, new.terrain))
+
+
+def test_tiles_view_reads_like_a_tile_grid():
+    terrain = GroundMap.filled(3, 2, Ground.GRASS)
+
+    assert len(terrain.tiles) == 3 and len(terrain.tiles[0]) == 2
+    assert terrain.tiles[2][1] == Tile(terrain=Ground.GRASS)
+    assert [tile.terrain for tile in terrain.tiles[1]] == [Ground.GRASS, Ground.GRASS]
+    assert terrain.tile_at(5, 0) is None
+
+
+def test_set_tile_extends_palette_and_notifies():
+    terrain = GroundMap.filled(3, 2, Ground.GRASS)
+    edits = Edits()
+    terrain.add_listener(edits)
+
+    terrain.set_tile(1, 1, Tile(terrain=Ground.WATER))
+
+    assert terrain.palette == [Ground.GRASS, Ground.WATER]
+    assert terrain.codes.tolist() == [[0, 0], [0, 1], [0, 0]]
+    assert edits.edits == [(1, 1, Ground.GRASS, Ground.WATER)]
+
+
+def test_fork_copies_the_array_on_write():
+    terrain = GroundMap.filled(3, 2, Ground.GRASS)
+    branch = terrain.fork()
+    assert branch.codes is terrain.codes
+
+    branch.set_tile(0, 0, Tile(terrain=Ground.WATER))
+    assert terrain.tile_at(0, 0).terrain == Ground.GRASS
+
+    terrain.set_tile(2, 1, Tile(terrain=Ground.WATER))
+    terrain.restore(branch)
+    assert np.array_equal(terrain.codes, branch.codes)
+
+
+def test_counting_an_absent_type_leaves_the_palette_alone():
+    terrain = GroundMap.filled(3, 2, Ground.GRASS)
+
+    assert terrain.features.count(Ground.WATER, 0, 0, 2, 1) == 0
+    assert terrain.features.count(Ground.GRASS, 0, 0, 2, 1) == 6
+    assert terrain.palette == [Ground.GRASS]
@@ -0,0 +1,105 @@
+from engine.terrain import TerrainMap, TerrainType, Tile
+
+
+class Ground(TerrainType):
+    GRASS = "grass"
+    FOREST = "forest"
+    WATER = "water"
+
+
+class StripedMap(TerrainMap):
+    @classmethod
+    def generate(cls, width, height, params=None):
+        # A forest column every fourth x, grass elsewhere
+        tiles = [
+            [Tile(terrain=Ground.FOREST if x % 4 == 0 else Ground.GRASS) for _ in range(height)]
+            for x in range(width)
+        ]
+        return cls(width, height, tiles)
+
+
+def test_tiles_and_rectangle_counts_by_type():
+    terrain = StripedMap.generate(8, 5)
+    index = terrain.features
+
+    assert index.tiles_of(Ground.FOREST) == {(x, z) for x in (0, 4) for z in range(5)}
+    assert index.count(Ground.FOREST, 0, 0, 7, 4) == 10
+    assert index.count(Ground.FOREST, 1, 0, 3, 4) == 0
+    # Rectangles are clipped to the map
+    assert index.count(Ground.GRASS, -5, -5, 2, 0) == 2
+    assert index.tiles_in(Ground.FOREST, 3, 1, 5, 2) == [(4, 1), (4, 2)]
+
+
+def test_nearest_of_type():
+    terrain = StripedMap.generate(8, 5)
+    index = terrain.features
+
+    assert index.nearest(Ground.FOREST, 2, 3) in {(0, 3), (4, 3)}
+    assert index.distance(Ground.FOREST, 2, 3) == 2
+    assert index.distance(Ground.FOREST, 7, 0) == 3
+    assert index.nearest(Ground.WATER, 2, 3) is None
+
+
+def test_index_follows_tile_edits():
+    terrain = StripedMap.generate(8, 5)
+    index = terrain.features
+    index.distance(Ground.WATER, 0, 0)
+    index.distance(Ground.FOREST, 0, 0)
+
+    terrain.set_tile(6, 2, Tile(terrain=Ground.WATER))
+    assert index.count(Ground.WATER, 0, 0, 7, 4) == 1
+    assert index.nearest(Ground.WATER, 7, 4) == (6, 2)
+    assert index.distance(Ground.WATER, 0, 0) == 8
+
+    for z in range(5):
+        terrain.set_tile(4, z, Tile(terrain=Ground.GRASS))
+    assert index.count(Ground.FOREST, 0, 0, 7, 4) == 5
+    assert index.distance(Ground.FOREST, 7, 0) == 7
+
+
+def test_many_edits_are_folded_in_at_query_time(monkeypatch):
+    """Felling a forest must not rebuild tables on the tick; the next count catches up."""
+    terrain = StripedMap.generate(12, 6)
+    index = terrain.features
+    index.MAX_PENDING_EDITS = 4
+    builds = []
+    build_table = index._build_table
+    monkeypatch.setattr(index, "_build_table", lambda kind, *args, **kw: builds.append(kind) or build_table(kind, *args, **kw))
+
+    for z in range(6):
+        terrain.set_tile(8, z, Tile(terrain=Ground.GRASS))
+        terrain.set_tile(5, z, Tile(terrain=Ground.FOREST))
+    assert builds == []
+
+    assert index.count(Ground.FOREST, 0, 0, 11, 5) == 18
+    assert index.count(Ground.FOREST, 5, 0, 8, 5) == 6
+    assert index.count(Ground.GRASS, 0, 0, 11, 5) == 72 - 18
+    assert builds == [Ground.FOREST, Ground.GRASS]
+
+    # A long edit log is not kept: only the column the rebuild starts from
+    for _ in range(50):
+        terrain.set_tile(1, 1, Tile(terrain=Ground.WATER))
+        terrain.set_tile(1, 1, Tile(terrain=Ground.GRASS))
+    assert Ground.GRASS not in index._pending and index._dirty_from[Ground.GRASS] == 1
+    assert index.count(Ground.WATER, 0, 0, 11, 5) == 0
+    assert index.count(Ground.GRASS, 0, 0, 11, 5) == 72 - 18
+
+
+def test_losing_a_source_repairs_only_its_cells(monkeypatch):
+    terrain = StripedMap.generate(12, 6)
+    index = terrain.features
+    index.distance(Ground.FOREST, 0, 0)
+    rebuilds = []
+    monkeypatch.setattr(index, "_propagate", lambda *args: rebuilds.append(args))
+
+    # Chop a forest down to a single tile, one tree at a time
+    for x, z in sorted(index.tiles_of(Ground.FOREST) - {(8, 3)}):
+        terrain.set_tile(x, z, Tile(terrain=Ground.GRASS))
+        sources = index.tiles_of(Ground.FOREST)
+        for cx in range(12):
+            for cz in range(6):
+                expected = min(abs(cx - sx) + abs(cz - sz) for sx, sz in sources)
+                assert index.distance(Ground.FOREST, cx, cz) == expected
+                nx, nz = index.nearest(Ground.FOREST, cx, cz)
+                assert (nx, nz) in sources and abs(cx - nx) + abs(cz - nz) == expected
+    assert rebuilds == []
@@ -0,0 +1,82 @@
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from engine.entity import BaseEntity, EntityListener, EntityMap
+from engine.trait import ActorTrait, CompactTrait, InteractionVerb, MovableTrait, ReceiverTrait
+
+
+class Verb(InteractionVerb):
+    CHOP = "chop"
+
+
+class CanChop(ActorTrait):
+    verb: ClassVar[InteractionVerb] = Verb.CHOP
+    range: float = 0
+    damage: int = 20
+
+
+class Choppable(ReceiverTrait):
+    verb: Verb = Verb.CHOP
+    hp: int
+
+
+class Inventory(CompactTrait):
+    items: list[str] = Field(default_factory=list)
+    tags: list[str] = []
+
+
+def test_compact_traits_are_slotted():
+    trait = CanChop()
+    assert not hasattr(trait, "__dict__")
+    with pytest.raises(AttributeError):
+        trait.not_a_field = 1
+
+
+def test_subclass_fields_defaults_and_classvars():
+    trait = CanChop(range=1.5)
+    assert (trait.range, trait.damage, trait.cooldown, trait.target_id) == (1.5, 20, 0.0, None)
+    assert CanChop.verb == Verb.CHOP
+    assert Choppable(hp=10).verb == Verb.CHOP
+
+
+def test_required_and_unknown_fields_raise():
+    with pytest.raises(TypeError):
+        Choppable()
+    with pytest.raises(TypeError):
+        Choppable(hp=1, colour="green")
+
+
+def test_mutable_defaults_are_not_shared():
+    a, b = Inventory(), Inventory()
+    a.items.append("log")
+    a.tags.append("heavy")
+    assert b.items == [] and b.tags == []
+
+
+def test_json_round_trip_restores_tuples_and_enums():
+    movable = MovableTrait(speed=2.0)
+    movable.move_to(3, 4)
+    movable.set_path([(1.0, 1.0), (3.0, 4.0)])
+
+    assert MovableTrait.model_validate_json(movable.model_dump_json()) == movable
+    assert Choppable.model_validate_json(Choppable(hp=5).model_dump_json()).verb is Verb.CHOP
+
+
+def test_assignments_are_reported_to_the_map():
+    class Recorder(EntityListener):
+        changes = []
+
+        def on_entity_changed(self, entity, trait):
+            self.changes.append(trait)
+
+    emap = EntityMap()
+    recorder = Recorder()
+    emap.add_listener(recorder)
+    entity = BaseEntity(position=(0, 0), traits=[CanChop()], asset="lumberjack")
+    emap.add(entity)
+
+    entity.get_trait(CanChop).activate(7)
+
+    assert recorder.changes == [entity.get_trait(CanChop)] * 2
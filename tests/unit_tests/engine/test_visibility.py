@@ -0,0 +1,127 @@
+from engine.entity import BaseEntity, EntityMap
+from engine.game import Game
+from engine.snapshot import WorldSnapshot
+from engine.system import MovementSystem, System
+from engine.terrain import TerrainType, Tile
+from engine.terrain_array import ArrayTerrainMap
+from engine.trait import MovableTrait
+from engine.visibility import SightTrait, VisibilitySystem
+
+
+class Ground(TerrainType):
+    GRASS = "grass"
+    WALL = "wall"
+
+
+class GroundMap(ArrayTerrainMap):
+    terrain_type = Ground
+
+
+class IdleSystem(System):
+    def update(self, game, dt):
+        pass
+
+
+def _world(width=20, height=20):
+    terrain = GroundMap.filled(width, height, Ground.GRASS)
+    game = Game(terrain, EntityMap())
+    visibility = VisibilitySystem(blocking={Ground.WALL})
+    visibility.attach(game)
+    return game, visibility
+
+
+def _scout(game, x, z, radius=4, player=0):
+    scout = BaseEntity(position=(x, z), asset="scout", traits=[SightTrait(radius=radius, player=player)])
+    game.entities.add(scout)
+    return scout
+
+
+def test_sight_reveals_a_disc_per_player():
+    game, visibility = _world()
+    _scout(game, 5.5, 5.5, radius=3)
+    _scout(game, 15.5, 15.5, radius=3, player=1)
+    game.tick(0.1)
+
+    assert visibility.is_visible(0, 8, 5)
+    assert not visibility.is_visible(0, 9, 5)
+    assert not visibility.is_visible(0, 8, 8)
+    assert not visibility.is_visible(0, 15, 15)
+    assert visibility.is_visible(1, 15, 15)
+    assert visibility.visible_mask(0).sum() == visibility.visible_mask(1).sum()
+
+
+def test_walls_cast_shadows():
+    game, visibility = _world()
+    for z in range(20):
+        game.terrain.set_tile(8, z, Tile(terrain=Ground.WALL))
+    _scout(game, 5.5, 5.5, radius=6)
+    game.tick(0.1)
+
+    assert visibility.is_visible(0, 8, 5)      # the wall itself is seen
+    assert not visibility.is_visible(0, 9, 5)  # but not what is behind it
+
+    game.terrain.set_tile(8, 5, Tile(terrain=Ground.GRASS))
+    game.tick(0.1)
+    assert visibility.is_visible(0, 10, 5)
+
+
+def test_counts_follow_moves_across_tiles_only():
+    game, visibility = _world()
+    scout = _scout(game, 2.5, 2.5, radius=2)
+    other = _scout(game, 2.2, 2.7, radius=2)
+    game.tick(0.1)
+    cast = len(visibility._views)
+
+    scout.position = (2.9, 2.1)   # same tile: nothing to recompute
+    game.tick(0.1)
+    assert len(visibility._views) == cast
+
+    scout.position = (12.5, 2.5)
+    game.tick(0.1)
+    assert visibility.is_visible(0, 12, 4)
+    assert visibility.is_visible(0, 2, 4)      # still seen by the other scout
+    assert visibility.is_explored(0, 12, 4)
+
+    game.entities.remove(other.id)
+    game.tick(0.1)
+    assert not visibility.is_visible(0, 2, 4)
+    assert visibility.is_explored(0, 2, 4)
+
+
+def test_fog_follows_moves_made_in_the_same_tick():
+    terrain = GroundMap.filled(20, 20, Ground.GRASS)
+    game = Game(terrain, EntityMap())
+    movement, later = MovementSystem(), IdleSystem()
+    game.systems.extend([movement, later])
+    visibility = VisibilitySystem()
+    visibility.attach(game)
+    scout = BaseEntity(position=(2.5, 2.5), asset="scout", traits=[SightTrait(radius=2), MovableTrait(speed=1000.0)])
+    game.entities.add(scout)
+    game.tick(0.1)
+
+    assert game.systems == [movement, visibility, later] and game.visibility is visibility
+    scout.get_trait(MovableTrait).move_to(12.5, 2.5)
+    game.tick(0.1)
+    assert visibility.is_visible(0, 12, 4)
+    assert not visibility.is_visible(0, 2, 4)
+
+
+def test_snapshot_carries_the_fog_for_the_render_thread():
+    game, visibility = _world()
+    for z in range(20):
+        game.terrain.set_tile(8, z, Tile(terrain=Ground.WALL))
+    # A fresh system reads the walls straight from the array
+    visibility.detach()
+    fresh = VisibilitySystem(blocking={Ground.WALL})
+    fresh.attach(game)
+    assert fresh._opaque[8].all() and fresh._opaque.sum() == 20
+
+    _scout(game, 5.5, 5.5, radius=6)
+    game.tick(0.1)
+    snapshot = WorldSnapshot.capture(game)
+    game.entities.remove(next(iter(game.entities.entities)))
+    game.tick(0.1)
+
+    assert snapshot.is_visible(0, 8, 5) and not snapshot.is_visible(0, 9, 5)
+    assert not snapshot.is_visible(1, 5, 5)
+    assert not fresh.is_visible(0, 8, 5)
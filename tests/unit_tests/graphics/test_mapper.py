@@ -0,0 +1,48 @@
+from main import LumberjackGame
+from engine.snapshot import WorldSnapshot
+from engine.visibility import SightTrait, VisibilitySystem
+from graphics.asset import AssetModel
+from graphics.mapper import SceneMapper
+
+
+LIBRARY = {
+    "lumberjack": AssetModel(asset_id="lumberjack", model="cube", texture="white_cube", layer=1),
+    "tree": AssetModel(asset_id="tree", model="cube", texture="white_cube", layer=1),
+}
+
+
+def test_snapshot_proxies_carry_entity_handles():
+    game = LumberjackGame.setup(6, 6)
+
+    proxies = SceneMapper(LIBRARY).map_snapshot(WorldSnapshot.capture(game))
+
+    assert sorted(proxy.entity_id for proxy in proxies) == sorted(game.entities.entities)
+
+
+def test_fog_of_war_hides_unseen_entities():
+    game = LumberjackGame.setup(12, 12)
+    visibility = VisibilitySystem()
+    visibility.attach(game)
+    jack = game.entities.get(game.jack_id)
+    jack.add_trait(SightTrait(radius=3))
+    game.tick(0.1)
+
+    proxies = SceneMapper(LIBRARY, visibility=visibility).map_to_proxies(game)
+
+    # Only the lumberjack sees itself; both trees are out of sight
+    assert [proxy.entity_id for proxy in proxies if proxy.asset.asset_id != "grass"] == [jack.id]
+
+
+def test_snapshot_fog_of_war_comes_from_the_snapshot():
+    game = LumberjackGame.setup(12, 12)
+    visibility = VisibilitySystem()
+    visibility.attach(game)
+    jack = game.entities.get(game.jack_id)
+    jack.add_trait(SightTrait(radius=3))
+    game.tick(0.1)
+    snapshot = WorldSnapshot.capture(game)
+    visibility.detach()
+
+    proxies = SceneMapper(LIBRARY, visibility=visibility).map_snapshot(snapshot)
+
+    assert [proxy.entity_id for proxy in proxies if proxy.asset.asset_id != "grass"] == [jack.id]
@@ -0,0 +1,16 @@
+import sys
+
+import main
+
+
+def test_headless_run_does_not_load_graphics(capsys):
+    """Headless runs must not pay for importing ursina/Panda3D."""
+    main.main(["--headless", "--ticks", "10", "--world", "16x8"])
+
+    out = capsys.readouterr().out
+    assert "ticks=10" in out
+    assert "ursina" not in sys.modules
+
+
+def test_world_size_parsing():
+    assert main.parse_world("64x32") == (64, 32)